@@ -0,0 +1,53 @@
+"""add_games
+
+Revision ID: 3c9a1e5b7d42
+Revises: 5ff7de97baea
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3c9a1e5b7d42"
+down_revision: Union[str, Sequence[str], None] = "5ff7de97baea"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "games",
+        sa.Column("url", sa.String(length=255), nullable=False),
+        sa.Column("time_class", sa.String(length=20), nullable=True),
+        sa.Column("time_control", sa.String(length=20), nullable=True),
+        sa.Column("rules", sa.String(length=20), nullable=False),
+        sa.Column("rated", sa.Boolean(), nullable=False),
+        sa.Column("white_username", sa.String(length=100), nullable=False),
+        sa.Column("white_rating", sa.Integer(), nullable=True),
+        sa.Column("white_result", sa.String(length=30), nullable=True),
+        sa.Column("black_username", sa.String(length=100), nullable=False),
+        sa.Column("black_rating", sa.Integer(), nullable=True),
+        sa.Column("black_result", sa.String(length=30), nullable=True),
+        sa.Column("end_time", sa.DateTime(), nullable=False),
+        sa.Column("pgn", sa.Text(), nullable=True),
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id", name=op.f("games_pkey")),
+        sa.UniqueConstraint("url", name=op.f("games_url_key")),
+    )
+    op.create_index(op.f("ix_games_white_username"), "games", ["white_username"], unique=False)
+    op.create_index(op.f("ix_games_black_username"), "games", ["black_username"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_games_black_username"), table_name="games")
+    op.drop_index(op.f("ix_games_white_username"), table_name="games")
+    op.drop_table("games")
@@ -0,0 +1,43 @@
+"""add_game_results
+
+Revision ID: 8d2f4b6a1c90
+Revises: 3c9a1e5b7d42
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8d2f4b6a1c90"
+down_revision: Union[str, Sequence[str], None] = "3c9a1e5b7d42"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "game_results",
+        sa.Column("idempotency_key", sa.String(length=64), nullable=False),
+        sa.Column("player_id", sa.Integer(), nullable=False),
+        sa.Column("opponent_id", sa.Integer(), nullable=False),
+        sa.Column("game_type", sa.String(length=50), nullable=False),
+        sa.Column("won", sa.Boolean(), nullable=False),
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["player_id"], ["user_profiles.id"], name=op.f("game_results_player_id_fkey")),
+        sa.ForeignKeyConstraint(["opponent_id"], ["user_profiles.id"], name=op.f("game_results_opponent_id_fkey")),
+        sa.PrimaryKeyConstraint("id", name=op.f("game_results_pkey")),
+        sa.UniqueConstraint("idempotency_key", name=op.f("game_results_idempotency_key_key")),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("game_results")
@@ -0,0 +1,28 @@
+"""index_game_results_history
+
+Revision ID: b71e4c2d9a53
+Revises: 8d2f4b6a1c90
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b71e4c2d9a53"
+down_revision: Union[str, Sequence[str], None] = "8d2f4b6a1c90"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f("ix_game_results_game_type_id"), "game_results", ["game_type", "id"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_game_results_game_type_id"), table_name="game_results")
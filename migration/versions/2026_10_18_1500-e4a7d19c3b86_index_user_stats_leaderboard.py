@@ -0,0 +1,34 @@
+"""index_user_stats_leaderboard
+
+Revision ID: e4a7d19c3b86
+Revises: b71e4c2d9a53
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e4a7d19c3b86"
+down_revision: Union[str, Sequence[str], None] = "b71e4c2d9a53"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        op.f("ix_user_stats_leaderboard"),
+        "user_stats",
+        ["game_type", sa.text("current_rating DESC"), "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_user_stats_leaderboard"), table_name="user_stats")
@@ -1,12 +1,27 @@
 from .client import init_redis
-from .deps import get_cache_service, get_redis
+from .decorators import CachedValue, CacheTTL, NotModified, cached, invalidate_namespace, invalidate_tags, previous_meta
+from .deps import build_cache_service, create_cache_service, create_local_cache, get_cache_service, get_redis
+from .local import LocalCache, run_invalidation_listener
 from .router import router as cache_router
-from .service import CacheService
+from .service import CacheService, TieredCacheService
 
 __all__ = [
     "init_redis",
     "get_redis",
     "get_cache_service",
+    "create_cache_service",
+    "build_cache_service",
+    "create_local_cache",
     "cache_router",
     "CacheService",
+    "TieredCacheService",
+    "LocalCache",
+    "run_invalidation_listener",
+    "CacheTTL",
+    "cached",
+    "invalidate_tags",
+    "invalidate_namespace",
+    "CachedValue",
+    "NotModified",
+    "previous_meta",
 ]
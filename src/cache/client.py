@@ -6,5 +6,5 @@ def init_redis() -> aioredis.Redis:
     return aioredis.from_url(
         redis_config.URL,
         encoding="utf-8",
-        decode_responses=True,
+        decode_responses=False,  # Cache values are binary, see codec.py
     )
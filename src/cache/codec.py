@@ -0,0 +1,86 @@
+"""Binary encoding of cached values.
+
+Encoded values start with a 3-byte header: a zero magic byte, the serializer id and the
+compression id. JSON text never starts with a zero byte, so entries written before the
+header existed are still decoded as plain JSON.
+"""
+
+import json
+import zlib
+from typing import Any, Callable
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional speedup
+    msgpack = None
+
+MAGIC = 0x00
+
+SERIALIZER_IDS = {"json": 1, "orjson": 2, "msgpack": 3}
+COMPRESSION_IDS = {"none": 0, "zlib": 1}
+
+
+def _json_dumps(value) -> bytes:
+    return json.dumps(value, separators=(",", ":")).encode()
+
+
+_dumps: dict[int, Callable[[Any], bytes]] = {1: _json_dumps}
+_loads: dict[int, Callable[[bytes], Any]] = {1: json.loads}
+
+if orjson is not None:
+    _dumps[2] = orjson.dumps
+    _loads[2] = orjson.loads
+
+if msgpack is not None:
+    _dumps[3] = msgpack.packb
+    _loads[3] = msgpack.unpackb
+
+
+class CodecError(ValueError):
+    """Raised when a cached value was written with a codec this worker cannot read."""
+
+
+class CacheCodec:
+    """Serializes cache values and compresses the large ones."""
+
+    def __init__(self, serializer: str = "auto", compression: str = "zlib", threshold: int = 1024, level: int = 1):
+        if serializer == "auto":
+            serializer = "msgpack" if msgpack is not None else "orjson" if orjson is not None else "json"
+        if SERIALIZER_IDS.get(serializer) not in _dumps:
+            raise ValueError(f"Cache serializer '{serializer}' is not available")
+        if compression not in COMPRESSION_IDS:
+            raise ValueError(f"Unknown cache compression '{compression}'")
+
+        self.serializer_id = SERIALIZER_IDS[serializer]
+        self.compression_id = COMPRESSION_IDS[compression]
+        self.threshold = threshold
+        self.level = level
+
+    def encode(self, value) -> bytes:
+        payload = _dumps[self.serializer_id](value)
+        compression_id = 0
+        if self.compression_id and len(payload) >= self.threshold:
+            payload = zlib.compress(payload, self.level)
+            compression_id = self.compression_id
+
+        return bytes((MAGIC, self.serializer_id, compression_id)) + payload
+
+    def decode(self, data: bytes | str):
+        if isinstance(data, str):
+            data = data.encode()
+        if not data or data[0] != MAGIC:
+            return json.loads(data)  # Written before the codec header existed
+
+        serializer_id, compression_id = data[1], data[2]
+        if serializer_id not in _loads or compression_id not in COMPRESSION_IDS.values():
+            raise CodecError(f"Unsupported cache codec (serializer={serializer_id}, compression={compression_id})")
+
+        payload = data[3:]
+        if compression_id:
+            payload = zlib.decompress(payload)
+        return _loads[serializer_id](payload)
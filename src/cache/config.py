@@ -1,4 +1,5 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from typing import Literal
 
 
 class RedisConfig(BaseSettings):
@@ -12,5 +13,16 @@ class RedisConfig(BaseSettings):
 
     URL: str
 
+    # Encoding of cached values: auto picks msgpack, then orjson, then the stdlib json module
+    CACHE_SERIALIZER: Literal["auto", "json", "orjson", "msgpack"] = "auto"
+    CACHE_COMPRESSION: Literal["none", "zlib"] = "zlib"
+    CACHE_COMPRESSION_THRESHOLD: int = 1024  # Payloads smaller than this (bytes) are stored uncompressed
+
+    # In-process (L1) cache in front of Redis, disabled by default
+    LOCAL_CACHE_ENABLED: bool = False
+    LOCAL_CACHE_MAX_SIZE: int = 10_000
+    LOCAL_CACHE_TTL: int = 30  # Upper bound in seconds; the Redis TTL wins if it is shorter
+    INVALIDATION_CHANNEL: str = "cache:invalidate"
+
 
 redis_config = RedisConfig()
@@ -0,0 +1,285 @@
+"""Reusable caching for async service methods.
+
+Entries are stored as `{"value": ..., "stored_at": ..., "tags": {...}, "meta": {...}}`. Every
+entry records the version of each of its tags at write time; bumping a tag (a single INCR)
+makes all entries that carry it stale without touching them.
+"""
+
+import asyncio
+import functools
+import inspect
+import logging
+import time
+from .service import CacheService
+from .singleflight import SingleFlight
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pydantic import TypeAdapter
+from typing import Any, Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+KeyBuilder = str | Callable[..., str]
+
+default_flights = SingleFlight()
+
+_refresh_tasks: set[asyncio.Task] = set()
+
+# Entry being recomputed by the current call, if any (see `previous_meta`)
+_previous_entry: ContextVar[dict | None] = ContextVar("previous_entry", default=None)
+
+
+@dataclass(frozen=True)
+class CacheTTL:
+    """Soft/hard expiry for a cached value, in seconds.
+
+    Past `soft` the cached value is still served, but a background refresh is scheduled.
+    Past `hard` the caller waits for the value to be recomputed. If that fails, the old value
+    is still served for up to `stale_if_error` more seconds.
+    """
+
+    soft: int
+    hard: int
+    stale_if_error: int = 0
+
+
+@dataclass
+class CachedValue:
+    """Return value of a cached method that also stores metadata (e.g. HTTP validators) in the entry."""
+
+    value: Any
+    meta: dict[str, Any] = field(default_factory=dict)
+
+
+class NotModified(Exception):
+    """Raised by a cached method when the value it cached before is still current.
+
+    The previous value is kept and its age is reset, without serializing it again from scratch.
+    """
+
+    def __init__(self, meta: dict[str, Any] | None = None):
+        super().__init__("not modified")
+        self.meta = meta or {}
+
+
+def previous_meta() -> dict[str, Any]:
+    """Metadata of the entry the running cached method is recomputing ({} on a cold miss)."""
+    entry = _previous_entry.get()
+    return entry.get("meta", {}) if entry else {}
+
+
+def tag_key(tag: str) -> str:
+    return f"tag:{tag}"
+
+
+def namespace_tag(namespace: str) -> str:
+    return f"ns:{namespace}"
+
+
+async def invalidate_tags(cache: CacheService, *tags: str) -> None:
+    """Invalidate every entry carrying any of `tags` in O(1) per tag."""
+    await cache.cache_incr(*(tag_key(tag) for tag in tags))
+
+
+async def invalidate_namespace(cache: CacheService, namespace: str) -> None:
+    """Invalidate every entry cached under `namespace`."""
+    await invalidate_tags(cache, namespace_tag(namespace))
+
+
+def _build(template: KeyBuilder, arguments: dict[str, Any]) -> str:
+    return template.format(**arguments) if isinstance(template, str) else template(**arguments)
+
+
+async def _lookup(cache: CacheService, key: str, tag_keys: list[str]) -> tuple[dict | None, dict[str, int]]:
+    """Read an entry and the current versions of its tags in one round trip.
+
+    Returns the entry (None on miss or if any tag was bumped since it was written) and the
+    current tag versions to store with a new entry.
+    """
+    # A tag that was never bumped has no key; reading it as version 0 lets a tiered cache keep it
+    values = await cache.cache_get_many([key, *tag_keys], defaults=dict.fromkeys(tag_keys, 0))
+    versions = {tag: int(values[tag]) for tag in tag_keys}
+
+    entry = values.get(key)
+    if not isinstance(entry, dict) or "stored_at" not in entry or entry.get("tags") != versions:
+        return None, versions
+    return entry, versions
+
+
+def cached(
+    key: KeyBuilder,
+    ttl: int | CacheTTL,
+    *,
+    namespace: str = "cache",
+    version: int = 1,
+    tags: Iterable[KeyBuilder] = (),
+    invalidates: Iterable[KeyBuilder] = (),
+    model: Any = None,
+    negative_on: tuple[type[Exception], ...] = (),
+    negative_ttl: int = 30,
+    flights: SingleFlight | None = None,
+    cache_attr: str = "cache",
+):
+    """Cache the result of an async method in the CacheService found at `self.<cache_attr>`.
+
+    `key` and `tags` are format strings (or callables) over the method's arguments, e.g.
+    `"player:{username}"`. The full key is prefixed with `namespace` and `version`, so bumping
+    `version` in code, or calling `invalidate_namespace` at runtime, drops the whole namespace.
+
+    With a `CacheTTL`, stale values are served while a refresh runs through
+    `self.background_tasks` when the instance has one (FastAPI BackgroundTasks), otherwise as
+    a detached task. Misses are coalesced with single-flight. `model` is a type used to dump
+    results to JSON-compatible data and validate cached data back; None results are not cached.
+
+    Past the hard TTL, a failed recompute falls back to the expired value while it is within
+    `ttl.stale_if_error`.
+
+    When recomputing an existing entry, the method can read its metadata with `previous_meta()`
+    and raise `NotModified` to keep the old value (conditional revalidation). It can return
+    `CachedValue(value, meta)` to store new metadata.
+
+    Tags in `invalidates` are bumped whenever a recomputed value differs from the one it
+    replaces, which drops entries derived from this one (e.g. a summary built from it).
+
+    Exceptions listed in `negative_on` are cached as tombstones for `negative_ttl` seconds and
+    re-raised (as the same type, with the same message) on every hit.
+
+    `Class.method.prefetch(self, *args, lead=...)` recomputes an entry ahead of time, before
+    a caller finds it stale.
+    """
+    ttl = ttl if isinstance(ttl, CacheTTL) else CacheTTL(soft=ttl, hard=ttl)
+    adapter = TypeAdapter(model) if model is not None else None
+    flights = flights or default_flights
+    negative_types = {exc_type.__name__: exc_type for exc_type in negative_on}
+
+    def dump(value):
+        return adapter.dump_python(value, mode="json") if adapter is not None else value
+
+    def unwrap(entry: dict):
+        if "error" in entry:
+            raise negative_types[entry["error"]](entry["message"])
+        value = entry["value"]
+        return adapter.validate_python(value) if adapter is not None and value is not None else value
+
+    def is_fresh(entry: dict | None, lead: float = 0) -> bool:
+        # Tombstones stay valid for as long as Redis keeps them
+        return entry is not None and ("error" in entry or time.time() - entry["stored_at"] < ttl.soft - lead)
+
+    def decorator(func):
+        signature = inspect.signature(func)
+        self_name = next(iter(signature.parameters))
+
+        def prepare(self, args, kwargs):
+            """Build the keys of one call and a `refresh` that recomputes its entry with single-flight."""
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            arguments = {name: value for name, value in bound.arguments.items() if name != self_name}
+
+            cache: CacheService = getattr(self, cache_attr)
+            cache_key = f"{namespace}:v{version}:{_build(key, arguments)}"
+            tag_keys = [tag_key(namespace_tag(namespace)), *(tag_key(_build(tag, arguments)) for tag in tags)]
+            calls = []
+
+            async def get_fresh():
+                entry, _ = await _lookup(cache, cache_key, tag_keys)
+                return entry if is_fresh(entry) else None
+
+            async def compute(lead: float):
+                entry, versions = await _lookup(cache, cache_key, tag_keys)
+                # A concurrent refresh may have finished while this one was queued
+                if is_fresh(entry, lead):
+                    return entry
+
+                previous = entry if entry is not None and "error" not in entry else None
+                token = _previous_entry.set(previous)
+                calls.append(cache_key)
+                try:
+                    result = await func(self, *args, **kwargs)
+                except NotModified as e:
+                    if previous is None:
+                        raise RuntimeError(f"{func.__qualname__} raised NotModified without a cached value") from e
+                    entry = {**previous, "stored_at": time.time(), "tags": versions}
+                    entry["meta"] = {**previous.get("meta", {}), **e.meta}
+                    await cache.cache_set(cache_key, entry, ttl=ttl.hard + ttl.stale_if_error)
+                    return entry
+                except negative_on as e:
+                    tombstone = {
+                        "error": type(e).__name__,
+                        "message": str(e),
+                        "stored_at": time.time(),
+                        "tags": versions,
+                    }
+                    await cache.cache_set(cache_key, tombstone, ttl=negative_ttl)
+                    raise
+                finally:
+                    _previous_entry.reset(token)
+
+                meta = {}
+                if isinstance(result, CachedValue):
+                    result, meta = result.value, result.meta
+                value = dump(result)
+                entry = {"value": value, "stored_at": time.time(), "tags": versions, "meta": meta}
+                if value is not None:
+                    await cache.cache_set(cache_key, entry, ttl=ttl.hard + ttl.stale_if_error)
+                    # Bumped after the write, so a dependent value computed meanwhile cannot outlive it
+                    if invalidates and previous is not None and previous["value"] != value:
+                        await invalidate_tags(cache, *(_build(tag, arguments) for tag in invalidates))
+                return entry
+
+            async def refresh(lead: float = 0):
+                return await flights.run(cache.redis, cache_key, functools.partial(compute, lead), get_fresh)
+
+            return cache, cache_key, tag_keys, refresh, calls
+
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            cache, cache_key, tag_keys, refresh, _ = prepare(self, args, kwargs)
+
+            async def refresh_in_background():
+                try:
+                    await refresh()
+                except Exception:
+                    logger.exception(f"[CACHE][REFRESH] background refresh failed for key={cache_key}")
+
+            entry, _ = await _lookup(cache, cache_key, tag_keys)
+            if entry is None:
+                return unwrap(await refresh())
+
+            if "error" not in entry and time.time() - entry["stored_at"] >= ttl.hard:
+                # Expired, only kept around in case recomputing it fails
+                try:
+                    return unwrap(await refresh())
+                except negative_on:
+                    raise
+                except Exception as e:
+                    logger.warning(f"[CACHE][STALE-IF-ERROR] serving stale key={cache_key}: {e!r}")
+                    return unwrap(entry)
+
+            if not is_fresh(entry) and not flights.in_flight(cache_key):
+                background_tasks = getattr(self, "background_tasks", None)
+                if background_tasks is not None:
+                    background_tasks.add_task(refresh_in_background)
+                else:
+                    task = asyncio.create_task(refresh_in_background())
+                    _refresh_tasks.add(task)
+                    task.add_done_callback(_refresh_tasks.discard)
+
+            return unwrap(entry)
+
+        async def prefetch(self, *args, lead: float = 0, **kwargs) -> bool:
+            """Recompute the entry now if it is missing or turns stale within `lead` seconds.
+
+            Returns True if the method itself was called (e.g. an upstream request was made).
+            """
+            cache, cache_key, tag_keys, refresh, calls = prepare(self, args, kwargs)
+            entry, _ = await _lookup(cache, cache_key, tag_keys)
+            if is_fresh(entry, lead) or flights.in_flight(cache_key):
+                return False
+
+            await refresh(lead)
+            return bool(calls)
+
+        wrapper.prefetch = prefetch
+        return wrapper
+
+    return decorator
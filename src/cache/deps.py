@@ -1,6 +1,28 @@
 import redis.asyncio as redis
-from .service import CacheService
-from fastapi import Request
+from .config import redis_config
+from .local import LocalCache
+from .service import CacheService, TieredCacheService
+from fastapi import FastAPI, Request
+from typing import Optional
+
+
+def create_local_cache() -> Optional[LocalCache]:
+    """The in-process cache of a worker, or None if local caching is disabled."""
+    if redis_config.LOCAL_CACHE_ENABLED:
+        return LocalCache(redis_config.LOCAL_CACHE_MAX_SIZE, redis_config.LOCAL_CACHE_TTL)
+    return None
+
+
+def build_cache_service(redis_client: redis.Redis, local_cache: Optional[LocalCache] = None) -> CacheService:
+    """Build a CacheService over `redis_client`; with a local cache, invalidations also reach other workers."""
+    if local_cache is not None:
+        return TieredCacheService(redis_client, local_cache, redis_config.INVALIDATION_CHANNEL)
+    return CacheService(redis_client)
+
+
+def create_cache_service(app: FastAPI) -> CacheService:
+    """Build a CacheService from the app state, for use outside of a request (background jobs)."""
+    return build_cache_service(app.state.redis, getattr(app.state, "local_cache", None))
 
 
 async def get_redis(request: Request) -> redis.Redis:
@@ -8,5 +30,4 @@ async def get_redis(request: Request) -> redis.Redis:
 
 
 async def get_cache_service(request: Request) -> "CacheService":
-    redis_client = await get_redis(request)
-    return CacheService(redis_client)
+    return create_cache_service(request.app)
@@ -0,0 +1,98 @@
+"""In-process (L1) cache that sits in front of Redis."""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from redis.exceptions import RedisError
+from typing import Any, Iterable
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class LocalCache:
+    """Bounded in-process cache with LRU eviction and per-entry expiry.
+
+    Values are kept as decoded Python objects and returned as-is, so callers must not mutate them.
+    """
+
+    def __init__(self, max_size: int, max_ttl: int):
+        self.max_size = max_size
+        self.max_ttl = max_ttl
+        self.instance_id = uuid.uuid4().hex
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, default=_MISSING):
+        """Return a live entry and mark it as recently used. Returns `default` on miss."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return default
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value, ttl: float | None = None) -> None:
+        """Store a value for at most `max_ttl` seconds (or less, if the Redis TTL is shorter)."""
+        ttl = self.max_ttl if ttl is None else min(ttl, self.max_ttl)
+        if ttl <= 0:
+            self._entries.pop(key, None)
+            return
+
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def delete(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+def invalidation_message(local_cache: LocalCache, keys: Iterable[str]) -> str:
+    """Build the pub/sub payload announcing that `keys` changed in this worker."""
+    return json.dumps({"origin": local_cache.instance_id, "keys": list(keys)})
+
+
+async def run_invalidation_listener(redis_client, local_cache: LocalCache, channel: str) -> None:
+    """Drop local entries whenever another worker broadcasts a write or delete.
+
+    If the subscription breaks, the local cache is cleared because messages may have been missed.
+    """
+    while True:
+        pubsub = redis_client.pubsub()
+        try:
+            await pubsub.subscribe(channel)
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+
+                try:
+                    payload = json.loads(message["data"])
+                    if payload.get("origin") != local_cache.instance_id:
+                        local_cache.delete(payload.get("keys", []))
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    # A bad message must not end the listener for the life of the worker
+                    logger.warning(f"[CACHE][L1] skipping malformed invalidation message: {message.get('data')!r}")
+        except asyncio.CancelledError:
+            raise
+        except RedisError:
+            logger.exception("[CACHE][L1] invalidation listener disconnected, clearing local cache")
+            local_cache.clear()
+            await asyncio.sleep(1)
+        finally:
+            await pubsub.aclose()
@@ -1,7 +1,16 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class CacheItem(BaseModel):
     key: str
     value: str
     ttl: int  # Time to live in seconds
+
+
+class CacheItems(BaseModel):
+    items: dict[str, str] = Field(..., description="Mapping of keys to values to store")
+    ttl: int  # Time to live in seconds, applied to every item
+
+
+class CacheKeys(BaseModel):
+    keys: list[str] = Field(..., description="Keys to read in a single round trip")
@@ -1,5 +1,5 @@
 from .deps import get_cache_service
-from .models import CacheItem
+from .models import CacheItem, CacheItems, CacheKeys
 from .service import CacheService
 from fastapi import APIRouter, Depends, HTTPException
 
@@ -19,3 +19,17 @@ async def get_cache_item(key: str, cache_service: CacheService = Depends(get_cac
         raise HTTPException(status_code=404, detail="Key not found") from None
 
     return {"key": key, "value": value}
+
+
+@router.post("/mset", summary="Set several values in the cache")
+async def set_cache_items(batch: CacheItems, cache_service: CacheService = Depends(get_cache_service)):
+    await cache_service.cache_set_many(batch.items, ttl=batch.ttl)
+    return {"status": "saved", "keys": list(batch.items)}
+
+
+@router.post("/mget", summary="Get several values from the cache")
+async def get_cache_items(batch: CacheKeys, cache_service: CacheService = Depends(get_cache_service)):
+    values = await cache_service.cache_get_many(batch.keys)
+    missing = [key for key in dict.fromkeys(batch.keys) if key not in values]
+
+    return {"values": values, "missing": missing}
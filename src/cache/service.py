@@ -1,13 +1,192 @@
-import json
+import logging
+from .codec import CacheCodec, CodecError
+from .config import redis_config
+from .local import LocalCache, invalidation_message
+from typing import Any, Iterable, Mapping
+
+logger = logging.getLogger(__name__)
+
+default_codec = CacheCodec(
+    serializer=redis_config.CACHE_SERIALIZER,
+    compression=redis_config.CACHE_COMPRESSION,
+    threshold=redis_config.CACHE_COMPRESSION_THRESHOLD,
+)
 
 
 class CacheService:
-    def __init__(self, redis_client):
+    def __init__(self, redis_client, codec: CacheCodec | None = None):
         self.redis = redis_client
+        self.codec = codec or default_codec
+
+    def _encode(self, value) -> bytes:
+        return self.codec.encode(value)
+
+    def _decode(self, data):
+        """Decode a stored value; entries this worker cannot read are treated as misses."""
+        if not data:
+            return None
+        try:
+            return self.codec.decode(data)
+        except CodecError:
+            logger.warning("[CACHE] skipping entry written with an unsupported codec")
+            return None
 
     async def cache_set(self, key: str, value, ttl: int | None = None):
-        await self.redis.set(key, json.dumps(value), ex=ttl)
+        await self.redis.set(key, self._encode(value), ex=ttl)
 
     async def cache_get(self, key: str):
         data = await self.redis.get(key)
-        return json.loads(data) if data else None
+        return self._decode(data)
+
+    async def cache_set_many(self, values: Mapping[str, Any], ttl: int | None = None):
+        """Store several values in one round trip (pipelined SET with TTL)."""
+        if not values:
+            return
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key, value in values.items():
+                pipe.set(key, self._encode(value), ex=ttl)
+            await pipe.execute()
+
+    async def cache_get_many(self, keys: Iterable[str], defaults: Mapping[str, Any] | None = None) -> dict[str, Any]:
+        """Fetch several values with a single MGET.
+
+        Missing keys are omitted from the result, or take their value from `defaults`.
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+
+        data = await self.redis.mget(keys)
+        values = {key: self._decode(raw) for key, raw in zip(keys, data, strict=True)}
+        values = {key: (defaults or {}).get(key) if value is None else value for key, value in values.items()}
+        return {key: value for key, value in values.items() if value is not None}
+
+    async def cache_delete(self, *keys: str):
+        if keys:
+            await self.redis.delete(*keys)
+
+    async def cache_incr(self, *keys: str) -> list[int]:
+        """Atomically increment integer counters (e.g. tag versions) in one round trip."""
+        if not keys:
+            return []
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.incr(key)
+            return await pipe.execute()
+
+
+class TieredCacheService(CacheService):
+    """CacheService with an in-process L1 layer in front of Redis.
+
+    Local entries never outlive the Redis TTL. Writes and deletes are published on
+    `channel` so that other workers drop their local copies.
+    """
+
+    def __init__(self, redis_client, local_cache: LocalCache, channel: str, codec: CacheCodec | None = None):
+        super().__init__(redis_client, codec)
+        self.local = local_cache
+        self.channel = channel
+
+    async def cache_set(self, key: str, value, ttl: int | None = None):
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.set(key, self._encode(value), ex=ttl)
+            pipe.publish(self.channel, invalidation_message(self.local, [key]))
+            await pipe.execute()
+
+        self.local.set(key, value, ttl)
+
+    async def cache_get(self, key: str):
+        value = self.local.get(key, None)
+        if value is not None:
+            return value
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.get(key)
+            pipe.pttl(key)
+            data, pttl = await pipe.execute()
+
+        value = self._decode(data)
+        if value is None:
+            return None
+
+        self.local.set(key, value, self._ttl_from_pttl(pttl))
+        return value
+
+    async def cache_set_many(self, values: Mapping[str, Any], ttl: int | None = None):
+        if not values:
+            return
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key, value in values.items():
+                pipe.set(key, self._encode(value), ex=ttl)
+            pipe.publish(self.channel, invalidation_message(self.local, values.keys()))
+            await pipe.execute()
+
+        for key, value in values.items():
+            self.local.set(key, value, ttl)
+
+    async def cache_get_many(self, keys: Iterable[str], defaults: Mapping[str, Any] | None = None) -> dict[str, Any]:
+        """Defaults of missing keys are kept locally too, until a write to the key is broadcast."""
+        keys = list(dict.fromkeys(keys))
+        defaults = defaults or {}
+        result = {}
+        missing = []
+        for key in keys:
+            value = self.local.get(key, None)
+            if value is None:
+                missing.append(key)
+            else:
+                result[key] = value
+
+        if not missing:
+            return result
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.mget(missing)
+            for key in missing:
+                pipe.pttl(key)
+            data, *pttls = await pipe.execute()
+
+        for key, raw, pttl in zip(missing, data, pttls, strict=True):
+            value = self._decode(raw)
+            if value is not None:
+                result[key] = value
+                self.local.set(key, value, self._ttl_from_pttl(pttl))
+            elif key in defaults:
+                result[key] = defaults[key]
+                self.local.set(key, defaults[key])
+
+        return result
+
+    async def cache_delete(self, *keys: str):
+        if not keys:
+            return
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.delete(*keys)
+            pipe.publish(self.channel, invalidation_message(self.local, keys))
+            await pipe.execute()
+
+        self.local.delete(keys)
+
+    async def cache_incr(self, *keys: str) -> list[int]:
+        if not keys:
+            return []
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.incr(key)
+            pipe.publish(self.channel, invalidation_message(self.local, keys))
+            *values, _ = await pipe.execute()
+
+        self.local.delete(keys)
+        return values
+
+    @staticmethod
+    def _ttl_from_pttl(pttl: int) -> float | None:
+        """Translate a Redis PTTL reply into seconds (-1 means no expiry, -2 means gone)."""
+        if pttl == -1:
+            return None
+        return max(pttl, 0) / 1000
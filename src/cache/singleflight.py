@@ -0,0 +1,87 @@
+"""Request coalescing: at most one load per key runs at a time."""
+
+import asyncio
+import logging
+import time
+import uuid
+from redis.exceptions import WatchError
+from typing import Any, Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+Loader = Callable[[], Awaitable[Any]]
+Checker = Callable[[], Awaitable[Any]]
+
+
+class SingleFlight:
+    """Coalesce concurrent loads of the same key.
+
+    Callers in the same worker share one in-flight task. Across workers a short Redis lock
+    elects the loader; the others poll `check` until the result shows up in the cache.
+    """
+
+    def __init__(self, lock_ttl: float = 10.0, wait_timeout: float = 10.0, poll_interval: float = 0.05):
+        self.lock_ttl = lock_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self._flights: dict[str, asyncio.Task] = {}
+
+    def in_flight(self, key: str) -> bool:
+        """Whether a load for `key` is currently running in this worker."""
+        return key in self._flights
+
+    async def run(self, redis_client, key: str, load: Loader, check: Checker):
+        """Return the result of `load()`, calling it at most once per key at a time.
+
+        `check` must return the cached result, or None while it is not available yet.
+        """
+        task = self._flights.get(key)
+        if task is None:
+            task = asyncio.create_task(self._load_once(redis_client, key, load, check))
+            self._flights[key] = task
+            task.add_done_callback(lambda _: self._flights.pop(key, None))
+
+        # The load keeps running for the other waiters if this caller is cancelled
+        return await asyncio.shield(task)
+
+    async def _load_once(self, redis_client, key: str, load: Loader, check: Checker):
+        lock_key = f"lock:{key}"
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.wait_timeout
+
+        while True:
+            if await redis_client.set(lock_key, token, nx=True, px=int(self.lock_ttl * 1000)):
+                try:
+                    return await load()
+                finally:
+                    await self._release(redis_client, lock_key, token)
+
+            # Another worker is loading this key: wait for its result instead of loading too
+            while await redis_client.exists(lock_key):
+                result = await check()
+                if result is not None:
+                    return result
+                if time.monotonic() >= deadline:
+                    logger.warning(f"[CACHE][SINGLE-FLIGHT] timed out waiting for key={key}, loading directly")
+                    return await load()
+                await asyncio.sleep(self.poll_interval)
+
+            result = await check()
+            if result is not None:
+                return result
+
+    @staticmethod
+    async def _release(redis_client, lock_key: str, token: str) -> None:
+        """Delete the lock only if it is still ours (it may have expired and been taken over)."""
+        async with redis_client.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(lock_key)
+                current = await pipe.get(lock_key)
+                if isinstance(current, bytes):
+                    current = current.decode()
+                if current == token:
+                    pipe.multi()
+                    pipe.delete(lock_key)
+                    await pipe.execute()
+            except WatchError:
+                pass
@@ -1,5 +1,7 @@
+from .result_queue import run_result_consumer
 from .router import router as chess_router
 
 __all__ = [
     "chess_router",
+    "run_result_consumer",
 ]
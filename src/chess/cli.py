@@ -0,0 +1,97 @@
+"""Maintenance commands for chess data.
+
+Usage:
+    python -m src.chess.cli replay-ratings [--game-type blitz] [--chunk-size 100000] [--force]
+    python -m src.chess.cli rebuild-ranks [--game-type blitz] [--batch-size 10000]
+"""
+
+import argparse
+import asyncio
+from .config import CACHE_NAMESPACE, RANKS_REBUILD_BATCH_SIZE, REPLAY_CHUNK_SIZE, GameTypes
+from .ranking import RankingService
+from .rating_replay import IncompleteHistoryError, replay_ratings
+from src.cache import build_cache_service, create_local_cache, init_redis, invalidate_namespace
+from src.database.connect import AsyncSessionLocal, engine
+from src.telemetry import setup_logging
+
+
+def selected_game_types(args: argparse.Namespace) -> list[GameTypes]:
+    return [GameTypes(args.game_type)] if args.game_type else list(GameTypes)
+
+
+async def rebuild_ranks(redis_client, game_types: list[GameTypes], batch_size: int) -> None:
+    ranking = RankingService(redis_client)
+    for game_type in game_types:
+        async with AsyncSessionLocal() as session:
+            players = await ranking.rebuild(session, game_type, batch_size)
+        print(f"{game_type}: ranked {players} players")
+
+
+async def replay_ratings_command(args: argparse.Namespace) -> None:
+    game_types = selected_game_types(args)
+    refused = []
+    for game_type in game_types:
+        async with AsyncSessionLocal() as session:
+            try:
+                players = await replay_ratings(session, game_type, args.chunk_size, force=args.force)
+            except IncompleteHistoryError as e:
+                print(f"{game_type}: not replayed, {e}; pass --force to overwrite them")
+                refused.append(game_type)
+                continue
+        print(f"{game_type}: recomputed {players} players")
+
+    redis = init_redis()
+    try:
+        # With local caching on, the invalidation is also published to the app workers' local caches
+        await invalidate_namespace(build_cache_service(redis, create_local_cache()), CACHE_NAMESPACE)
+        await rebuild_ranks(redis, game_types, RANKS_REBUILD_BATCH_SIZE)
+    finally:
+        await redis.aclose()
+
+    if refused:
+        raise SystemExit(1)
+
+
+async def rebuild_ranks_command(args: argparse.Namespace) -> None:
+    redis = init_redis()
+    try:
+        await rebuild_ranks(redis, selected_game_types(args), args.batch_size)
+    finally:
+        await redis.aclose()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m src.chess.cli", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    replay = commands.add_parser("replay-ratings", help="Recompute ratings and counters from game_results")
+    replay.add_argument("--game-type", choices=[game_type.value for game_type in GameTypes])
+    replay.add_argument("--chunk-size", type=int, default=REPLAY_CHUNK_SIZE, help="Games loaded per query")
+    replay.add_argument(
+        "--force", action="store_true", help="Also overwrite players with more games in user_stats than in game_results"
+    )
+    replay.set_defaults(handler=replay_ratings_command)
+
+    ranks = commands.add_parser("rebuild-ranks", help="Repopulate the Redis rank sets from user_stats")
+    ranks.add_argument("--game-type", choices=[game_type.value for game_type in GameTypes])
+    ranks.add_argument("--batch-size", type=int, default=RANKS_REBUILD_BATCH_SIZE, help="Stats rows streamed per batch")
+    ranks.set_defaults(handler=rebuild_ranks_command)
+
+    return parser
+
+
+async def run(args: argparse.Namespace) -> None:
+    try:
+        await args.handler(args)
+    finally:
+        await engine.dispose()
+
+
+def main(argv: list[str] | None = None) -> None:
+    setup_logging()
+    args = build_parser().parse_args(argv)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
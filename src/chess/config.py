@@ -8,3 +8,39 @@ class GameTypes(StrEnum):
 
 
 K_FACTOR = 32
+DEFAULT_RATING = 1200  # Rating of a player's first game in a game type
+RECORD_BATCH_MAX_SIZE = 50_000  # Game results accepted by one batch request (one transaction)
+GAME_RESULTS_INSERT_CHUNK = 2_000  # History rows per INSERT (below the bind parameter limit)
+REPLAY_CHUNK_SIZE = 100_000  # Game results loaded per query when replaying ratings
+
+RANDOM_PROFILE_MAX_COUNT = 100  # Profiles returned by one random sample
+RANDOM_PROFILE_ATTEMPTS = 3  # Sampling queries before returning fewer profiles than requested
+
+LEADERBOARD_PAGE_SIZE = 50
+LEADERBOARD_MAX_PAGE_SIZE = 200
+
+# Ranks per game type, mirrored into Redis sorted sets
+RANKS_KEY_PREFIX = "chess:ranks"
+RANKS_REBUILD_BATCH_SIZE = 10_000  # Stats rows streamed from Postgres per batch
+RANKS_REBUILD_TIMEOUT = 3600  # Seconds after which an unfinished rebuild stops receiving live updates
+RANKS_NEIGHBOURHOOD_RADIUS = 5
+RANKS_MAX_NEIGHBOURHOOD_RADIUS = 50
+
+CACHE_NAMESPACE = "chess"
+CACHE_TTL = 300  # Seconds; entries are also invalidated through "profile:{id}" tags on writes
+
+# Bulk ingestion of chess.com players
+INGEST_CONCURRENCY = 8  # Players fetched from chess.com at the same time
+INGEST_BATCH_SIZE = 100  # Players upserted per transaction
+INGEST_LOCK_TTL = 300  # Seconds a worker owns a running job without making progress
+INGEST_JOB_TTL = 7 * 24 * 3600  # Seconds a finished job's progress stays readable
+INGEST_GAMES_BATCH_SIZE = 500  # Archived games inserted per statement
+
+# Write-behind queue for game results (Redis Stream with a consumer group)
+RESULT_QUEUE_STREAM = "chess:game_results"
+RESULT_QUEUE_GROUP = "game-results"
+RESULT_QUEUE_CONSUMER_ENABLED = True  # Run a consumer in every app worker
+RESULT_QUEUE_BATCH_SIZE = 500  # Results applied per transaction
+RESULT_QUEUE_BLOCK_MS = 1000  # How long a consumer waits for new results
+RESULT_QUEUE_CLAIM_IDLE_MS = 60_000  # Results pending this long (e.g. their consumer died) are taken over
+RESULT_QUEUE_RETRY_DELAY = 5  # Seconds to wait after a batch failed to apply
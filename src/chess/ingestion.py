@@ -0,0 +1,402 @@
+"""Bulk import of chess.com players (profiles and stats) and their game archives into the chess database.
+
+Job state lives in Redis so that progress can be read from any worker and an interrupted
+job can be resumed from the last committed batch.
+"""
+
+import abc
+import asyncio
+import logging
+import uuid
+from .config import (
+    INGEST_BATCH_SIZE,
+    INGEST_CONCURRENCY,
+    INGEST_GAMES_BATCH_SIZE,
+    INGEST_JOB_TTL,
+    INGEST_LOCK_TTL,
+    GameTypes,
+)
+from .models import IngestionJobOut, IngestionKind, IngestionStatus
+from .repositories import GameRepository, UserProfileRepository, UserStatsRepository
+from .services import profile_tag, profile_username_tag
+from datetime import datetime, timezone
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from src.cache import CacheService, invalidate_tags
+from src.external_api.exceptions import CircuitOpenError, RateLimitedError
+from src.external_api.models.api import PlayerProfileAPI, PlayerStatsAPI
+from src.external_api.models.api.value import ModeStats
+from src.external_api.service import ChessService
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+FAILED_USERNAMES_SHOWN = 100
+
+_running_jobs: set[asyncio.Task] = set()
+
+# Deletes the lock only while it still holds the owner's token, so a worker whose lock expired
+# cannot release the lock taken over by another worker.
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def _decode(value) -> Optional[str]:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class IngestionJobStore:
+    """Redis-backed state of ingestion jobs.
+
+    A finished job expires after `INGEST_JOB_TTL`; resuming it makes it permanent again.
+    """
+
+    def __init__(self, redis_client):
+        self.redis = redis_client
+        self._release = redis_client.register_script(RELEASE_SCRIPT)
+
+    @staticmethod
+    def _key(job_id: str) -> str:
+        return f"ingest:{job_id}"
+
+    async def create(
+        self,
+        usernames: list[str],
+        kind: IngestionKind = IngestionKind.PLAYERS,
+        title: Optional[str] = None,
+        since: Optional[str] = None,
+    ) -> str:
+        job_id = uuid.uuid4().hex
+        key = self._key(job_id)
+        # chess.com usernames are case-insensitive
+        usernames = list(dict.fromkeys(username.lower() for username in usernames))
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(
+                key,
+                mapping={
+                    "kind": kind,
+                    "status": IngestionStatus.RUNNING,
+                    "title": title or "",
+                    "since": since or "",
+                    "total": len(usernames),
+                    "processed": 0,
+                    "imported": 0,
+                    "failed": 0,
+                },
+            )
+            if usernames:
+                pipe.rpush(f"{key}:usernames", *usernames)
+            await pipe.execute()
+
+        return job_id
+
+    async def get(self, job_id: str) -> Optional[IngestionJobOut]:
+        key = self._key(job_id)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hgetall(key)
+            pipe.lrange(f"{key}:failed", 0, FAILED_USERNAMES_SHOWN - 1)
+            state, failed_usernames = await pipe.execute()
+
+        if not state:
+            return None
+
+        state = {_decode(field): _decode(value) for field, value in state.items()}
+        return IngestionJobOut(
+            job_id=job_id,
+            kind=state.get("kind", IngestionKind.PLAYERS),
+            status=state["status"],
+            title=state["title"] or None,
+            since=state.get("since") or None,
+            total=int(state["total"]),
+            processed=int(state["processed"]),
+            imported=int(state["imported"]),
+            failed=int(state["failed"]),
+            failed_usernames=[_decode(username) for username in failed_usernames],
+            error=state.get("error"),
+        )
+
+    async def usernames(self, job_id: str, start: int, count: int) -> list[str]:
+        values = await self.redis.lrange(f"{self._key(job_id)}:usernames", start, start + count - 1)
+        return [_decode(value) for value in values]
+
+    async def advance(self, job_id: str, processed: int, imported: int, failed_usernames: list[str]) -> None:
+        """Record a committed batch; the job resumes after it."""
+        key = self._key(job_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hincrby(key, "processed", processed)
+            pipe.hincrby(key, "imported", imported)
+            pipe.hincrby(key, "failed", len(failed_usernames))
+            if failed_usernames:
+                pipe.rpush(f"{key}:failed", *failed_usernames)
+            pipe.expire(f"{key}:lock", INGEST_LOCK_TTL)
+            await pipe.execute()
+
+    async def keep_alive(self, job_id: str) -> None:
+        """Extend ownership of a job that is making progress within a batch."""
+        await self.redis.expire(f"{self._key(job_id)}:lock", INGEST_LOCK_TTL)
+
+    async def set_status(self, job_id: str, status: IngestionStatus, error: Optional[str] = None) -> None:
+        key = self._key(job_id)
+        mapping = {"status": status}
+        if error is not None:
+            mapping["error"] = error
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping=mapping)
+            if error is None:
+                pipe.hdel(key, "error")
+            for state_key in (key, f"{key}:usernames", f"{key}:failed"):
+                if status == IngestionStatus.RUNNING:
+                    pipe.persist(state_key)
+                else:
+                    pipe.expire(state_key, INGEST_JOB_TTL)
+            await pipe.execute()
+
+    async def acquire(self, job_id: str) -> Optional[str]:
+        """Take ownership of a job so that it never runs twice at the same time.
+
+        Returns the token to release the job with, or None if another worker owns it.
+        """
+        token = uuid.uuid4().hex
+        if await self.redis.set(f"{self._key(job_id)}:lock", token, nx=True, ex=INGEST_LOCK_TTL):
+            return token
+        return None
+
+    async def release(self, job_id: str, token: str) -> None:
+        await self._release(keys=[f"{self._key(job_id)}:lock"], args=[token])
+
+
+def profile_row(profile: PlayerProfileAPI) -> dict:
+    return {
+        "username": profile.username,
+        "name": profile.name or profile.username,
+        "profile_url": str(profile.url),
+        "avatar_url": str(profile.avatar) if profile.avatar else None,
+    }
+
+
+def stats_rows(profile_id: int, stats: PlayerStatsAPI) -> list[dict]:
+    """Map chess.com per-mode records onto local user_stats rows (modes never played are skipped)."""
+    modes: dict[GameTypes, Optional[ModeStats]] = {
+        GameTypes.BULLET: stats.chess_bullet,
+        GameTypes.BLITZ: stats.chess_blitz,
+        GameTypes.RAPID: stats.chess_rapid,
+    }
+
+    rows = []
+    for game_type, mode in modes.items():
+        if mode is None or mode.last is None:
+            continue
+        record = mode.record
+        wins, losses, draws = (record.win, record.loss, record.draw) if record else (0, 0, 0)
+        rows.append(
+            {
+                "profile_id": profile_id,
+                "game_type": game_type,
+                "games_played": wins + losses + draws,
+                "games_won": wins,
+                "current_rating": mode.last.rating,
+                "highest_rating": mode.best.rating if mode.best else mode.last.rating,
+            }
+        )
+    return rows
+
+
+def game_row(game: dict) -> dict:
+    """Map a game from a chess.com monthly archive onto a local games row."""
+    white, black = game.get("white", {}), game.get("black", {})
+    return {
+        "url": game["url"],
+        "time_class": game.get("time_class"),
+        "time_control": game.get("time_control"),
+        "rules": game.get("rules", "chess"),
+        "rated": game.get("rated", True),
+        "white_username": white.get("username", ""),
+        "white_rating": white.get("rating"),
+        "white_result": white.get("result"),
+        "black_username": black.get("username", ""),
+        "black_rating": black.get("rating"),
+        "black_result": black.get("result"),
+        "end_time": datetime.fromtimestamp(game["end_time"], timezone.utc).replace(tzinfo=None),
+        "pgn": game.get("pgn"),
+    }
+
+
+def parse_month(value: Optional[str]) -> Optional[tuple[int, int]]:
+    """Parse 'YYYY-MM' into (year, month)."""
+    if not value:
+        return None
+    year, month = value.split("-")
+    return int(year), int(month)
+
+
+class IngestionPipeline(abc.ABC):
+    """Works through a job's usernames batch by batch, with bounded concurrency towards chess.com.
+
+    Subclasses import one batch in `_process_batch`. A batch only counts as processed once its
+    rows are committed, so a job that stops early resumes with the batch it was working on.
+    """
+
+    batch_size = INGEST_BATCH_SIZE
+
+    def __init__(
+        self,
+        chess_service: ChessService,
+        session_factory: async_sessionmaker[AsyncSession],
+        store: IngestionJobStore,
+        cache: CacheService,
+    ):
+        self.chess_service = chess_service
+        self.session_factory = session_factory
+        self.store = store
+        self.cache = cache
+        self.semaphore = asyncio.Semaphore(INGEST_CONCURRENCY)
+
+    @abc.abstractmethod
+    async def _process_batch(self, job: IngestionJobOut, usernames: list[str]) -> tuple[int, list[str]]:
+        """Import the players and return the number of imported rows and the usernames that failed."""
+
+    async def run(self, job_id: str) -> None:
+        """Process the job from its last committed batch until done or until chess.com stops answering."""
+        token = await self.store.acquire(job_id)
+        if token is None:
+            logger.info(f"[CHESS][INGEST] job={job_id} is already running")
+            return
+
+        try:
+            job = await self.store.get(job_id)
+            await self.store.set_status(job_id, IngestionStatus.RUNNING)
+            offset = job.processed
+
+            while usernames := await self.store.usernames(job_id, offset, self.batch_size):
+                imported, failed = await self._process_batch(job, usernames)
+                await self.store.advance(job_id, len(usernames), imported, failed)
+                offset += len(usernames)
+
+            await self.store.set_status(job_id, IngestionStatus.COMPLETED)
+            logger.info(f"[CHESS][INGEST] job={job_id} completed")
+        except Exception as e:
+            logger.exception(f"[CHESS][INGEST] job={job_id} failed")
+            await self.store.set_status(job_id, IngestionStatus.FAILED, error=str(e) or type(e).__name__)
+        finally:
+            await self.store.release(job_id, token)
+
+    def start(self, job_id: str) -> None:
+        """Run the job as a detached task in this worker."""
+        task = asyncio.create_task(self.run(job_id))
+        _running_jobs.add(task)
+        task.add_done_callback(_running_jobs.discard)
+
+    @staticmethod
+    def _split_failures(job_id: str, usernames: list[str], results: list) -> tuple[list, list[str]]:
+        """Separate successful results from per-player failures.
+
+        Raises if chess.com is unavailable, so that resuming retries the whole batch.
+        """
+        for result in results:
+            if isinstance(result, (CircuitOpenError, RateLimitedError)):
+                raise result
+
+        succeeded, failed = [], []
+        for username, result in zip(usernames, results, strict=True):
+            if isinstance(result, BaseException):
+                logger.warning(f"[CHESS][INGEST] job={job_id} skipping username={username}: {result!r}")
+                failed.append(username)
+            else:
+                succeeded.append(result)
+        return succeeded, failed
+
+
+class PlayerIngestionPipeline(IngestionPipeline):
+    """Fetches players' profiles and stats and upserts them batch by batch."""
+
+    async def _fetch(self, username: str) -> tuple[PlayerProfileAPI, PlayerStatsAPI]:
+        async with self.semaphore:
+            return await asyncio.gather(
+                self.chess_service.get_player_profile(username),
+                self.chess_service.get_player_stats(username),
+            )
+
+    async def _save(self, players: list[tuple[PlayerProfileAPI, PlayerStatsAPI]]) -> None:
+        # One upsert cannot touch a row twice, and usernames differing only in case are one player
+        unique: dict[str, tuple[PlayerProfileAPI, PlayerStatsAPI]] = {}
+        for profile, stats in players:
+            unique.setdefault(profile.username.lower(), (profile, stats))
+        players = list(unique.values())
+
+        async with self.session_factory() as session, session.begin():
+            profile_ids = await UserProfileRepository(session).upsert_many(
+                [profile_row(profile) for profile, _ in players]
+            )
+            await UserStatsRepository(session).upsert_many(
+                [row for profile, stats in players for row in stats_rows(profile_ids[profile.username], stats)]
+            )
+
+        # Existing players' cached reads still hold the profiles and stats that were just overwritten
+        if profile_ids:
+            await invalidate_tags(
+                self.cache,
+                *(profile_tag(profile_id) for profile_id in profile_ids.values()),
+                *(profile_username_tag(username) for username in profile_ids),
+            )
+
+    async def _process_batch(self, job: IngestionJobOut, usernames: list[str]) -> tuple[int, list[str]]:
+        results = await asyncio.gather(*(self._fetch(username) for username in usernames), return_exceptions=True)
+        players, failed = self._split_failures(job.job_id, usernames, results)
+        await self._save(players)
+        return len(players), failed
+
+
+class GameIngestionPipeline(IngestionPipeline):
+    """Streams players' monthly game archives into the games table.
+
+    Archives are parsed while they download and inserted `INGEST_GAMES_BATCH_SIZE` games per
+    statement, so memory stays flat however much history a player has. Games that were already
+    imported are skipped, which makes re-running a batch safe.
+    """
+
+    batch_size = INGEST_CONCURRENCY
+
+    async def _insert(self, rows: list[dict]) -> int:
+        async with self.session_factory() as session, session.begin():
+            return await GameRepository(session).insert_many(rows)
+
+    async def import_archive(self, username: str, year: int, month: int) -> int:
+        """Import one monthly archive and return the number of new games."""
+        imported, rows = 0, []
+        async for game in self.chess_service.iter_archive_games(username, year, month):
+            rows.append(game_row(game))
+            if len(rows) >= INGEST_GAMES_BATCH_SIZE:
+                imported += await self._insert(rows)
+                rows = []
+        if rows:
+            imported += await self._insert(rows)
+        return imported
+
+    async def _import_player(self, job: IngestionJobOut, username: str) -> int:
+        async with self.semaphore:
+            since = parse_month(job.since)
+            imported = 0
+            for year, month in await self.chess_service.get_game_archives(username):
+                if since is not None and (year, month) < since:
+                    continue
+                imported += await self.import_archive(username, year, month)
+                await self.store.keep_alive(job.job_id)
+            return imported
+
+    async def _process_batch(self, job: IngestionJobOut, usernames: list[str]) -> tuple[int, list[str]]:
+        results = await asyncio.gather(
+            *(self._import_player(job, username) for username in usernames), return_exceptions=True
+        )
+        counts, failed = self._split_failures(job.job_id, usernames, results)
+        return sum(counts), failed
+
+
+PIPELINES: dict[IngestionKind, type[IngestionPipeline]] = {
+    IngestionKind.PLAYERS: PlayerIngestionPipeline,
+    IngestionKind.GAMES: GameIngestionPipeline,
+}
@@ -1,5 +1,6 @@
-from .config import GameTypes
-from pydantic import BaseModel, ConfigDict, Field, HttpUrl, field_serializer
+from .config import RECORD_BATCH_MAX_SIZE, GameTypes
+from enum import StrEnum
+from pydantic import BaseModel, ConfigDict, Field, HttpUrl, field_serializer, model_validator
 from src.database.base_schema import BaseOutSchema
 from typing import Optional
 
@@ -118,10 +119,136 @@ class UserStatsOut(BaseOutSchema):
     model_config = ConfigDict(from_attributes=True)
 
 
+class LeaderboardEntry(BaseModel):
+    """One player on a leaderboard."""
+
+    profile_id: int
+    username: str
+    current_rating: int
+    highest_rating: Optional[int] = None
+    games_played: int = 0
+    games_won: int = 0
+
+
+class LeaderboardPage(BaseModel):
+    """Players of one game type by current rating, best first."""
+
+    game_type: GameTypes
+    entries: list[LeaderboardEntry]
+    next_cursor: Optional[str] = Field(None, description="Pass as `cursor` to get the next page; None on the last page")
+
+
+class RankOut(BaseModel):
+    """Position of a player among the rated players of a game type."""
+
+    profile_id: int
+    game_type: GameTypes
+    rating: int
+    rank: int = Field(..., description="1 for the best player; equal ratings share a rank")
+    total: int = Field(..., description="Number of rated players")
+    percentile: float = Field(..., description="Percentage of rated players ranked below this one")
+
+
+class RankedPlayerOut(BaseModel):
+    """A player in a neighbourhood of ranks."""
+
+    profile_id: int
+    rating: int
+    rank: int
+
+
+class GameResultIn(BaseModel):
+    """Result of one game, from the point of view of `player_id`."""
+
+    player_id: int
+    opponent_id: int
+    game_type: GameTypes
+    won: bool
+
+    @model_validator(mode="after")
+    def _check_players(self):
+        if self.player_id == self.opponent_id:
+            raise ValueError("A player cannot play against themselves")
+        return self
+
+
+class GameResultsIn(BaseModel):
+    """Results to record, in the order the games were played."""
+
+    results: list[GameResultIn] = Field(..., min_length=1, max_length=RECORD_BATCH_MAX_SIZE)
+
+
+class IngestionKind(StrEnum):
+    PLAYERS = "players"  # Profiles and stats
+    GAMES = "games"  # Monthly game archives
+
+
+class IngestionStatus(StrEnum):
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class IngestionRequest(BaseModel):
+    """Players to import from chess.com: everyone with a title, or an explicit list."""
+
+    title: Optional[str] = Field(
+        None,
+        description="Chess title abbreviation (GM, IM, FM, ...) whose players are imported",
+    )
+    usernames: Optional[list[str]] = Field(
+        None,
+        description="Usernames to import",
+    )
+
+    @model_validator(mode="after")
+    def _check_source(self):
+        if (self.title is None) == (self.usernames is None):
+            raise ValueError("Provide either 'title' or 'usernames'")
+        return self
+
+
+class GameIngestionRequest(IngestionRequest):
+    """Players whose chess.com game archives are imported."""
+
+    since: Optional[str] = Field(
+        None,
+        pattern=r"^\d{4}-(0[1-9]|1[0-2])$",
+        description="First month to import (YYYY-MM); all archives by default",
+    )
+
+
+class IngestionJobOut(BaseModel):
+    """Progress of a bulk ingestion job."""
+
+    job_id: str
+    kind: IngestionKind = IngestionKind.PLAYERS
+    status: IngestionStatus
+    title: Optional[str] = None
+    since: Optional[str] = None
+    total: int = Field(0, description="Number of players in the job")
+    processed: int = Field(0, description="Players handled so far; a resumed job continues from here")
+    imported: int = Field(0, description="Players upserted into the database, or new games for a games job")
+    failed: int = Field(0, description="Players that could not be fetched")
+    failed_usernames: list[str] = Field([], description="First failed usernames")
+    error: Optional[str] = Field(None, description="Why the job stopped, if it failed")
+
+
 __all__ = [
     "UserProfileCreate",
     "UserProfileUpdate",
     "UserProfileOut",
     "UserProfileFullOut",
     "UserStatsOut",
+    "LeaderboardEntry",
+    "LeaderboardPage",
+    "RankOut",
+    "RankedPlayerOut",
+    "GameResultIn",
+    "GameResultsIn",
+    "IngestionKind",
+    "IngestionStatus",
+    "IngestionRequest",
+    "GameIngestionRequest",
+    "IngestionJobOut",
 ]
@@ -0,0 +1,156 @@
+"""Player ranks per game type, mirrored from `user_stats` into Redis sorted sets.
+
+Each game type has a sorted set of profile ids scored by current rating, so rank, percentile
+and neighbourhood lookups are O(log n). Writers update it after committing new ratings; if an
+update is lost (e.g. Redis was down), `rebuild` repopulates the set from Postgres.
+
+Ranks are competition ranks: players with the same rating share a rank, and the next rating
+down ranks after all of them (1, 2, 2, 4).
+"""
+
+import logging
+from .config import RANKS_KEY_PREFIX, RANKS_REBUILD_BATCH_SIZE, RANKS_REBUILD_TIMEOUT, GameTypes
+from .models import RankedPlayerOut, RankOut
+from .repositories import UserStatsRepository
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Ratings written while a rebuild runs also go to the set being rebuilt, so the swap at the
+# end does not lose them.
+UPDATE_SCRIPT = """
+redis.call('ZADD', KEYS[1], unpack(ARGV))
+if redis.call('EXISTS', KEYS[3]) == 1 then
+    redis.call('ZADD', KEYS[2], unpack(ARGV))
+end
+return 1
+"""
+
+# Replaces the live set with the rebuilt one (or drops it if no player is rated).
+SWAP_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    redis.call('RENAME', KEYS[2], KEYS[1])
+else
+    redis.call('DEL', KEYS[1])
+end
+redis.call('DEL', KEYS[3])
+return 1
+"""
+
+UPDATE_CHUNK = 1000  # Players per script call (Lua's unpack has a limited stack)
+
+
+class RankingService:
+    def __init__(self, redis_client, prefix: str = RANKS_KEY_PREFIX):
+        self.redis = redis_client
+        self.prefix = prefix
+        self._update = redis_client.register_script(UPDATE_SCRIPT)
+        self._swap = redis_client.register_script(SWAP_SCRIPT)
+
+    def _keys(self, game_type: GameTypes) -> list[str]:
+        """Live set, set being rebuilt, and the flag telling that a rebuild runs."""
+        key = f"{self.prefix}:{game_type}"
+        return [key, f"{key}:rebuild", f"{key}:rebuilding"]
+
+    async def update(self, game_type: GameTypes, ratings: dict[int, int]) -> None:
+        """Set the current rating of players."""
+        items = list(ratings.items())
+        for start in range(0, len(items), UPDATE_CHUNK):
+            args = [
+                value for profile_id, rating in items[start : start + UPDATE_CHUNK] for value in (rating, profile_id)
+            ]
+            await self._update(keys=self._keys(game_type), args=args)
+
+    async def rank(self, game_type: GameTypes, profile_id: int) -> Optional[RankOut]:
+        """Rank of a player among rated players of the game type; None if the player is not rated."""
+        key = self._keys(game_type)[0]
+        rating = await self.redis.zscore(key, profile_id)
+        if rating is None:
+            return None
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zcount(key, f"({rating}", "+inf")
+            pipe.zcount(key, "-inf", f"({rating}")
+            pipe.zcard(key)
+            higher, lower, total = await pipe.execute()
+
+        return RankOut(
+            profile_id=profile_id,
+            game_type=game_type,
+            rating=int(rating),
+            rank=higher + 1,
+            total=total,
+            percentile=round(100 * lower / total, 2),
+        )
+
+    async def around(self, game_type: GameTypes, profile_id: int, radius: int) -> Optional[list[RankedPlayerOut]]:
+        """Players ranked up to `radius` places above and below the player, best first.
+
+        None if the player is not rated.
+        """
+        key = self._keys(game_type)[0]
+        position = await self.redis.zrevrank(key, profile_id)
+        if position is None:
+            return None
+
+        start = max(position - radius, 0)
+        window = await self.redis.zrevrange(key, start, position + radius, withscores=True)
+        if not window:
+            # The player dropped out between the two calls
+            return None
+
+        # Ranks are shared by equal ratings, so only the first one needs a count
+        players = []
+        rank = await self.redis.zcount(key, f"({window[0][1]}", "+inf") + 1
+        previous = None
+        for offset, (member, rating) in enumerate(window):
+            if previous is not None and rating != previous:
+                rank = start + offset + 1
+            previous = rating
+            players.append(RankedPlayerOut(profile_id=int(member), rating=int(rating), rank=rank))
+        return players
+
+    async def rebuild(
+        self, session: AsyncSession, game_type: GameTypes, batch_size: int = RANKS_REBUILD_BATCH_SIZE
+    ) -> int:
+        """Repopulate the set of a game type from `user_stats` and return the number of rated players.
+
+        Rows are streamed in batches into a new set that replaces the live one at the end, so
+        readers never see a partial set. Ratings written meanwhile are applied to both sets, and
+        streamed rows do not overwrite them.
+        """
+        live, building, flag = self._keys(game_type)
+        await self.redis.delete(building)
+        # Set before the rows are read, so every rating committed after the read snapshot is mirrored
+        await self.redis.set(flag, 1, ex=RANKS_REBUILD_TIMEOUT)
+
+        players = 0
+        try:
+            async for rows in UserStatsRepository(session).iter_ratings(game_type, batch_size):
+                await self.redis.zadd(building, {profile_id: rating for profile_id, rating in rows}, nx=True)
+                players += len(rows)
+        except BaseException:
+            await self.redis.delete(building, flag)
+            raise
+
+        await self._swap(keys=[live, building, flag])
+        logger.info(f"[CHESS][RANKS] game_type={game_type}: rebuilt with {players} players")
+        return players
+
+
+async def mirror_ratings(ranking: RankingService, stats: Iterable) -> None:
+    """Write the ratings of committed stats rows to the rank sets; failures are only logged.
+
+    The sets are a derived copy: a missed update is fixed by the next game or a rebuild.
+    """
+    by_game_type: dict[GameTypes, dict[int, int]] = {}
+    for entry in stats:
+        if entry.current_rating is not None:
+            by_game_type.setdefault(entry.game_type, {})[entry.profile_id] = entry.current_rating
+
+    for game_type, ratings in by_game_type.items():
+        try:
+            await ranking.update(game_type, ratings)
+        except Exception as e:
+            logger.warning(f"[CHESS][RANKS] could not update ranks for game_type={game_type}: {e!r}")
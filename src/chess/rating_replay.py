@@ -0,0 +1,200 @@
+"""Recomputation of ratings and counters from the recorded game history.
+
+Used after changing `K_FACTOR` or fixing bad rows in `game_results`: every player of a game type
+starts again at `DEFAULT_RATING`, and the history is replayed in recording (id) order.
+
+The replay needs the complete history of its players. Games counted in `user_stats` but missing
+from `game_results` (played before results were recorded, or imported from chess.com) would be
+lost, so a replay that would lower a player's `games_played` is refused unless forced.
+
+With NumPy installed, each loaded chunk is split into waves of games that share no player; a
+wave only depends on earlier waves, so its Elo updates are computed as array operations.
+Without NumPy, games are replayed one by one with the same results.
+"""
+
+import logging
+from .config import DEFAULT_RATING, K_FACTOR, REPLAY_CHUNK_SIZE, GameTypes
+from .repositories import GameResultRepository, UserStatsRepository
+from .services import calculate_elo_change
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Sequence
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional speedup
+    np = None
+
+logger = logging.getLogger(__name__)
+
+HistoryRow = tuple[int, int, int, bool]  # id, player_id, opponent_id, won
+
+PLAYERS_SHOWN = 10  # Profile ids listed in an IncompleteHistoryError
+
+
+class IncompleteHistoryError(Exception):
+    """Raised when `user_stats` counts games of players that are not in `game_results`."""
+
+    def __init__(self, game_type: GameTypes, profile_ids: Sequence[int]):
+        self.game_type = game_type
+        self.profile_ids = list(profile_ids)
+        shown = ", ".join(str(profile_id) for profile_id in self.profile_ids[:PLAYERS_SHOWN])
+        super().__init__(
+            f"{len(self.profile_ids)} players of game_type={game_type} have more games in user_stats than in "
+            f"game_results (profile ids {shown}{', ...' if len(self.profile_ids) > PLAYERS_SHOWN else ''})"
+        )
+
+
+def schedule_waves(player_ids: Sequence[int], opponent_ids: Sequence[int]) -> list[int]:
+    """Assign each game the earliest wave after every earlier game of both its players.
+
+    Games in one wave share no player, and each player's games keep their order across waves.
+    """
+    if not player_ids:
+        return []
+    # Indexed by profile id: a list lookup is much cheaper than a dict one in this hot loop
+    last_wave = [-1] * (max(max(player_ids), max(opponent_ids)) + 1)
+    waves = []
+    for player_id, opponent_id in zip(player_ids, opponent_ids, strict=True):
+        player_wave, opponent_wave = last_wave[player_id], last_wave[opponent_id]
+        wave = (player_wave if player_wave > opponent_wave else opponent_wave) + 1
+        last_wave[player_id] = last_wave[opponent_id] = wave
+        waves.append(wave)
+    return waves
+
+
+class RatingReplay:
+    """Replays the history of one game type, fed in chunks in recording order."""
+
+    def __init__(self, vectorized: bool | None = None):
+        self.vectorized = np is not None if vectorized is None else vectorized
+        if self.vectorized and np is None:
+            raise RuntimeError("Vectorized rating replay requires numpy")
+
+        if self.vectorized:
+            # Indexed by profile id, grown on demand
+            self._rating = np.zeros(0, dtype=np.int64)
+            self._highest = np.zeros(0, dtype=np.int64)
+            self._played = np.zeros(0, dtype=np.int64)
+            self._won = np.zeros(0, dtype=np.int64)
+        else:
+            self._stats: dict[int, list[int]] = {}  # profile id -> [played, won, rating, highest]
+
+    def feed(self, rows: Sequence[HistoryRow]) -> None:
+        """Apply the next chunk of games."""
+        if not rows:
+            return
+        if self.vectorized:
+            self._feed_arrays(rows)
+        else:
+            self._feed_games(rows)
+
+    def _feed_games(self, rows: Sequence[HistoryRow]) -> None:
+        for _, player_id, opponent_id, won in rows:
+            player = self._stats.setdefault(player_id, [0, 0, DEFAULT_RATING, DEFAULT_RATING])
+            opponent = self._stats.setdefault(opponent_id, [0, 0, DEFAULT_RATING, DEFAULT_RATING])
+            new_rating1, new_rating2 = calculate_elo_change(player[2], opponent[2], won)
+            for stats, rating, result in ((player, new_rating1, won), (opponent, new_rating2, not won)):
+                highest = rating if stats[0] == 0 else max(stats[3], rating)
+                stats[:] = [stats[0] + 1, stats[1] + int(result), rating, highest]
+
+    def _grow(self, size: int) -> None:
+        if size <= len(self._rating):
+            return
+        size = max(size, 2 * len(self._rating))
+        extra = size - len(self._rating)
+        self._rating = np.concatenate([self._rating, np.full(extra, DEFAULT_RATING, dtype=np.int64)])
+        self._highest = np.concatenate([self._highest, np.full(extra, np.iinfo(np.int64).min, dtype=np.int64)])
+        self._played = np.concatenate([self._played, np.zeros(extra, dtype=np.int64)])
+        self._won = np.concatenate([self._won, np.zeros(extra, dtype=np.int64)])
+
+    def _feed_arrays(self, rows: Sequence[HistoryRow]) -> None:
+        games = np.array(rows, dtype=np.int64)
+        players, opponents = games[:, 1], games[:, 2]
+        scores = games[:, 3].astype(np.float64)
+        self._grow(int(max(players.max(), opponents.max())) + 1)
+
+        size = len(self._rating)
+        self._played += np.bincount(players, minlength=size) + np.bincount(opponents, minlength=size)
+        self._won += (
+            np.bincount(players, weights=scores, minlength=size)
+            + np.bincount(opponents, weights=1 - scores, minlength=size)
+        ).astype(np.int64)
+
+        waves = np.asarray(schedule_waves(players.tolist(), opponents.tolist()))
+        order = np.argsort(waves, kind="stable")
+        bounds = np.flatnonzero(np.diff(waves[order])) + 1
+        for wave in np.split(order, bounds):
+            self._apply_wave(players[wave], opponents[wave], scores[wave])
+
+    def _apply_wave(self, players, opponents, scores) -> None:
+        # Same arithmetic as calculate_elo_change, so both paths give identical ratings
+        rating1 = self._rating[players]
+        rating2 = self._rating[opponents]
+        expected1 = 1 / (1 + 10 ** ((rating2 - rating1) / 400))
+        expected2 = 1 / (1 + 10 ** ((rating1 - rating2) / 400))
+        new_rating1 = np.rint(rating1 + K_FACTOR * (scores - expected1)).astype(np.int64)
+        new_rating2 = np.rint(rating2 + K_FACTOR * ((1 - scores) - expected2)).astype(np.int64)
+
+        self._rating[players] = new_rating1
+        self._rating[opponents] = new_rating2
+        self._highest[players] = np.maximum(self._highest[players], new_rating1)
+        self._highest[opponents] = np.maximum(self._highest[opponents], new_rating2)
+
+    def results(self) -> dict[str, list[int]]:
+        """Final statistics of every player seen, as columns for `UserStatsRepository.replace_many`."""
+        if self.vectorized:
+            ids = np.flatnonzero(self._played)
+            columns = (ids, self._played[ids], self._won[ids], self._rating[ids], self._highest[ids])
+            columns = [column.tolist() for column in columns]
+        else:
+            ids = sorted(self._stats)
+            columns = [ids, *([self._stats[profile_id][i] for profile_id in ids] for i in range(4))]
+
+        names = ["profile_id", "games_played", "games_won", "current_rating", "highest_rating"]
+        return dict(zip(names, columns, strict=True))
+
+
+async def replay_ratings(
+    session: AsyncSession,
+    game_type: GameTypes,
+    chunk_size: int = REPLAY_CHUNK_SIZE,
+    vectorized: bool | None = None,
+    force: bool = False,
+) -> int:
+    """Recompute the statistics of every player of a game type from `game_results` and commit them.
+
+    New results wait until the replay is committed, so none is lost by the overwrite. Players
+    without games in the history keep their statistics. Raises IncompleteHistoryError, without
+    changing anything, if the history has fewer games of a player than `user_stats` counts,
+    unless `force` is set. Returns the number of players updated.
+    """
+    result_repository = GameResultRepository(session)
+    stats_repository = UserStatsRepository(session)
+    replay = RatingReplay(vectorized)
+
+    try:
+        await result_repository.lock_history()
+        after_id, games = 0, 0
+        while rows := await result_repository.history(game_type, after_id, chunk_size):
+            replay.feed(rows)
+            after_id = rows[-1][0]
+            games += len(rows)
+
+        stats = replay.results()
+        uncovered = await stats_repository.played_beyond(game_type, stats)
+        if uncovered and not force:
+            raise IncompleteHistoryError(game_type, uncovered)
+        if uncovered:
+            logger.warning(
+                f"[CHESS][REPLAY] game_type={game_type}: overwriting {len(uncovered)} players "
+                f"with games missing from the history"
+            )
+        await stats_repository.replace_many(game_type, stats)
+        await session.commit()
+    except Exception:
+        await session.rollback()
+        raise
+
+    players = len(stats["profile_id"])
+    logger.info(f"[CHESS][REPLAY] game_type={game_type}: replayed {games} games for {players} players")
+    return players
@@ -1,10 +1,19 @@
-from .config import GameTypes
-from .schema import UserProfile, UserStats
-from sqlalchemy import func, select
+import random
+from .config import GAME_RESULTS_INSERT_CHUNK, RANDOM_PROFILE_ATTEMPTS, GameTypes
+from .schema import Game, GameResult, UserProfile, UserStats
+from sqlalchemy import Integer, any_, bindparam, func, literal, or_, select, text, true, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from src.database.base_repository import BaseRepository
-from typing import List, Optional, Sequence
+from src.database.utils import get_datetime
+from typing import AsyncIterator, Iterable, List, Optional, Sequence
+
+
+# asyncpg allows at most 32767 parameters per statement, so lists of any length are sent as one
+# array parameter each, and matched with `= ANY(...)` or expanded with unnest
+def int_array(name: str, values: Iterable[int]):
+    return bindparam(name, list(values), type_=ARRAY(Integer))
 
 
 class UserProfileRepository(BaseRepository[UserProfile]):
@@ -15,9 +24,52 @@ class UserProfileRepository(BaseRepository[UserProfile]):
 
     async def get_random(self) -> Optional[UserProfile]:
         """Retrieve a random user profile from the database."""
-        stmt = select(UserProfile).order_by(func.random()).limit(1)
-        result = await self.session.execute(stmt)
-        return result.scalar_one_or_none()
+        profiles = await self.get_random_many(1)
+        return profiles[0] if profiles else None
+
+    async def get_random_many(self, count: int) -> List[UserProfile]:
+        """Retrieve up to `count` distinct random user profiles.
+
+        Instead of sorting the whole table by random(), random ids are drawn between the
+        lowest and highest id, and each probe takes the first profile at or after its id with
+        one index lookup. All probes of an attempt run in one query, so the cost depends on
+        `count` and not on the table size. Probes that land on the same profile are retried
+        a few times; fewer profiles are returned only if the table is (almost) that small.
+        Profiles right after a gap in the ids are somewhat more likely to be picked.
+        """
+        bounds = await self.session.execute(select(func.min(UserProfile.id), func.max(UserProfile.id)))
+        low, high = bounds.one()
+        if low is None:
+            return []
+
+        profiles: dict[int, UserProfile] = {}
+        for _ in range(RANDOM_PROFILE_ATTEMPTS):
+            missing = count - len(profiles)
+            if missing <= 0:
+                break
+            # Oversample a little, as some probes hit the same profile
+            starts = [random.randint(low, high) for _ in range(2 * missing)]
+            probes = (
+                func.unnest(bindparam("starts", starts, type_=ARRAY(Integer)))
+                .table_valued("start")
+                .render_derived(name="probes")
+            )
+            picked = (
+                select(UserProfile.id)
+                .where(UserProfile.id >= probes.c.start)
+                .order_by(UserProfile.id)
+                .limit(1)
+                .lateral("picked")
+            )
+            ids = select(picked.c.id).select_from(probes).join(picked, true())
+            stmt = select(UserProfile).where(UserProfile.id.in_(ids), UserProfile.id.not_in(list(profiles)))
+            result = await self.session.execute(stmt)
+            for profile in result.scalars().all():
+                profiles[profile.id] = profile
+
+        picked_profiles = list(profiles.values())
+        random.shuffle(picked_profiles)
+        return picked_profiles[:count]
 
     async def get_by_username(self, username: str) -> Optional[UserProfile]:
         """Retrieve a user profile by username."""
@@ -32,6 +84,35 @@ class UserProfileRepository(BaseRepository[UserProfile]):
         result = await self.session.execute(stmt)
         return result.scalar_one_or_none()
 
+    async def upsert_many(self, rows: List[dict]) -> dict[str, int]:
+        """Insert or update profiles by username in one statement, without committing.
+
+        Returns a mapping of username to profile id.
+        """
+        if not rows:
+            return {}
+
+        now = get_datetime()
+        stmt = insert(UserProfile).values([{**row, "created_at": now, "updated_at": now} for row in rows])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserProfile.username],
+            set_={
+                "name": stmt.excluded.name,
+                "profile_url": stmt.excluded.profile_url,
+                "avatar_url": stmt.excluded.avatar_url,
+                "updated_at": stmt.excluded.updated_at,
+            },
+        ).returning(UserProfile.id, UserProfile.username)
+
+        result = await self.session.execute(stmt)
+        return {username: profile_id for profile_id, username in result.all()}
+
+    async def existing_ids(self, profile_ids: Iterable[int]) -> set[int]:
+        """Return which of the given profile ids exist."""
+        stmt = select(UserProfile.id).where(UserProfile.id == any_(int_array("profile_ids", profile_ids)))
+        result = await self.session.execute(stmt)
+        return set(result.scalars().all())
+
     async def exists(self, profile_id: int) -> bool:
         """Check if a user profile exists by ID."""
         stmt = select(func.count()).select_from(UserProfile).where(UserProfile.id == profile_id)
@@ -80,6 +161,189 @@ class UserStatsRepository(BaseRepository[UserStats]):
 
         return stats_entry
 
+    async def upsert_many(self, rows: List[dict]) -> None:
+        """Insert or overwrite statistics by (profile_id, game_type) in one statement, without committing."""
+        if not rows:
+            return
+
+        now = get_datetime()
+        stmt = insert(UserStats).values([{**row, "created_at": now, "updated_at": now} for row in rows])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserStats.profile_id, UserStats.game_type],
+            set_={
+                "games_played": stmt.excluded.games_played,
+                "games_won": stmt.excluded.games_won,
+                "current_rating": stmt.excluded.current_rating,
+                "highest_rating": func.greatest(UserStats.highest_rating, stmt.excluded.highest_rating),
+                "updated_at": stmt.excluded.updated_at,
+            },
+        )
+        await self.session.execute(stmt)
+
+    async def ensure_many(self, profile_ids: List[int], game_type: GameTypes) -> None:
+        """Create missing default statistics for existing profiles in one statement, without committing.
+
+        Ids without a profile are ignored.
+        """
+        now = get_datetime()
+        source = select(
+            UserProfile.id,
+            literal(str(game_type)),
+            literal(0),
+            literal(0),
+            literal(now),
+            literal(now),
+        ).where(UserProfile.id == any_(int_array("profile_ids", profile_ids)))
+        stmt = (
+            insert(UserStats)
+            .from_select(["profile_id", "game_type", "games_played", "games_won", "created_at", "updated_at"], source)
+            .on_conflict_do_nothing(index_elements=[UserStats.profile_id, UserStats.game_type])
+        )
+        await self.session.execute(stmt)
+
+    async def played_beyond(self, game_type: GameTypes, stats: dict[str, list[int]]) -> list[int]:
+        """Return the ids of players whose stored `games_played` is above the count in `stats`.
+
+        `stats` holds equal-length `profile_id` and `games_played` columns, as for `replace_many`.
+        """
+        if not stats["profile_id"]:
+            return []
+
+        names = ["profile_id", "games_played"]
+        counts = (
+            func.unnest(*(int_array(name, stats[name]) for name in names))
+            .table_valued(*names)
+            .render_derived(name="counts")
+        )
+        stmt = (
+            select(UserStats.profile_id)
+            .where(
+                UserStats.profile_id == counts.c.profile_id,
+                UserStats.game_type == game_type,
+                UserStats.games_played > counts.c.games_played,
+            )
+            .order_by(UserStats.profile_id)
+        )
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def replace_many(self, game_type: GameTypes, stats: dict[str, list[int]]) -> None:
+        """Overwrite the statistics of many players in one statement, without committing.
+
+        `stats` holds equal-length columns: `profile_id`, `games_played`, `games_won`,
+        `current_rating` and `highest_rating`. Each column is sent as one array parameter and
+        unnested in SQL, so the statement size does not grow with the number of players.
+        """
+        if not stats["profile_id"]:
+            return
+
+        names = ["profile_id", "games_played", "games_won", "current_rating", "highest_rating"]
+        rows = (
+            func.unnest(*(int_array(name, stats[name]) for name in names))
+            .table_valued(*names)
+            .render_derived(name="stats")
+        )
+        now = get_datetime()
+        source = select(*(rows.c[name] for name in names), literal(str(game_type)), literal(now), literal(now))
+        stmt = insert(UserStats).from_select([*names, "game_type", "created_at", "updated_at"], source)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserStats.profile_id, UserStats.game_type],
+            set_={
+                "games_played": stmt.excluded.games_played,
+                "games_won": stmt.excluded.games_won,
+                "current_rating": stmt.excluded.current_rating,
+                "highest_rating": stmt.excluded.highest_rating,
+                "updated_at": stmt.excluded.updated_at,
+            },
+        )
+        await self.session.execute(stmt)
+
+    async def lock_many(self, profile_ids: List[int], game_type: GameTypes) -> dict[int, UserStats]:
+        """Lock the statistics rows for the rest of the transaction, keyed by profile id.
+
+        Rows are always locked in profile id order, so concurrent writers cannot deadlock.
+        """
+        stmt = (
+            select(UserStats)
+            .where(
+                UserStats.profile_id == any_(int_array("profile_ids", profile_ids)), UserStats.game_type == game_type
+            )
+            .order_by(UserStats.profile_id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        result = await self.session.execute(stmt)
+        return {stats.profile_id: stats for stats in result.scalars().all()}
+
+    async def apply_deltas(self, game_type: GameTypes, deltas: List[dict]) -> dict[int, UserStats]:
+        """Apply per-player changes in one UPDATE ... FROM unnest(...) RETURNING, without committing.
+
+        Each delta has `profile_id`, `played` and `won` (added to the counters), `rating` (the new
+        current rating) and `highest` (the highest rating reached by these games).
+        """
+        if not deltas:
+            return {}
+
+        names = ["profile_id", "played", "won", "rating", "highest"]
+        changes = (
+            func.unnest(*(int_array(name, [delta[name] for delta in deltas]) for name in names))
+            .table_valued(*names)
+            .render_derived(name="changes")
+        )
+        stmt = (
+            update(UserStats)
+            .where(UserStats.profile_id == changes.c.profile_id, UserStats.game_type == game_type)
+            .values(
+                games_played=UserStats.games_played + changes.c.played,
+                games_won=UserStats.games_won + changes.c.won,
+                current_rating=changes.c.rating,
+                highest_rating=func.greatest(
+                    func.coalesce(UserStats.highest_rating, changes.c.highest), changes.c.highest
+                ),
+                updated_at=get_datetime(),
+            )
+            .returning(UserStats)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        result = await self.session.execute(stmt)
+        return {stats.profile_id: stats for stats in result.scalars().all()}
+
+    async def leaderboard(
+        self, game_type: GameTypes, limit: int, after: Optional[tuple[int, int]] = None
+    ) -> list[tuple[UserStats, str]]:
+        """Return up to `limit` rated players by current rating (best first), with their usernames.
+
+        `after` is the `(current_rating, id)` of the last row of the previous page. Pages are read
+        from the (game_type, current_rating DESC, id) index with no OFFSET, so deep pages cost the
+        same as the first one.
+        """
+        stmt = (
+            select(UserStats, UserProfile.username)
+            .join(UserProfile, UserProfile.id == UserStats.profile_id)
+            .where(UserStats.game_type == game_type, UserStats.current_rating.is_not(None))
+            .order_by(UserStats.current_rating.desc(), UserStats.id)
+            .limit(limit)
+        )
+        if after is not None:
+            rating, stats_id = after
+            stmt = stmt.where(
+                UserStats.current_rating <= rating,
+                or_(UserStats.current_rating < rating, UserStats.id > stats_id),
+            )
+        result = await self.session.execute(stmt)
+        return [(stats, username) for stats, username in result.all()]
+
+    async def iter_ratings(self, game_type: GameTypes, batch_size: int) -> AsyncIterator[list[tuple[int, int]]]:
+        """Stream `(profile_id, current_rating)` of rated players in batches, with a server-side cursor."""
+        stmt = (
+            select(UserStats.profile_id, UserStats.current_rating)
+            .where(UserStats.game_type == game_type, UserStats.current_rating.is_not(None))
+            .execution_options(yield_per=batch_size)
+        )
+        result = await self.session.stream(stmt)
+        async for partition in result.partitions():
+            yield [tuple(row) for row in partition]
+
     @staticmethod
     async def _update_stats_rating(stats: UserStats, new_rating: int) -> UserStats:
         """Helper method to update the rating in user statistics."""
@@ -124,3 +388,76 @@ class UserStatsRepository(BaseRepository[UserStats]):
             await self.session.refresh(stats)
 
         return stats
+
+
+class GameRepository(BaseRepository[Game]):
+    """Repository for games imported from chess.com archives."""
+
+    def __init__(self, session: AsyncSession):
+        super().__init__(Game, session)
+
+    async def insert_many(self, rows: List[dict]) -> int:
+        """Insert games in one statement, skipping ones already imported, without committing.
+
+        Returns the number of new games.
+        """
+        if not rows:
+            return 0
+
+        now = get_datetime()
+        stmt = (
+            insert(Game)
+            .values([{**row, "created_at": now, "updated_at": now} for row in rows])
+            .on_conflict_do_nothing(index_elements=[Game.url])
+            .returning(Game.id)
+        )
+        result = await self.session.execute(stmt)
+        return len(result.all())
+
+
+class GameResultRepository(BaseRepository[GameResult]):
+    """Repository for game results applied from the write-behind queue."""
+
+    def __init__(self, session: AsyncSession):
+        super().__init__(GameResult, session)
+
+    async def insert_new(self, rows: List[dict]) -> set[str]:
+        """Store results by idempotency key in one statement, without committing.
+
+        Returns the keys that were not stored before.
+        """
+        if not rows:
+            return set()
+
+        now = get_datetime()
+        inserted = set()
+        # Chunked to stay below the bind parameter limit of a single statement
+        for start in range(0, len(rows), GAME_RESULTS_INSERT_CHUNK):
+            chunk = rows[start : start + GAME_RESULTS_INSERT_CHUNK]
+            stmt = (
+                insert(GameResult)
+                .values([{**row, "created_at": now, "updated_at": now} for row in chunk])
+                .on_conflict_do_nothing(index_elements=[GameResult.idempotency_key])
+                .returning(GameResult.idempotency_key)
+            )
+            result = await self.session.execute(stmt)
+            inserted.update(result.scalars().all())
+        return inserted
+
+    async def history(self, game_type: GameTypes, after_id: int, limit: int) -> list[tuple[int, int, int, bool]]:
+        """Return up to `limit` results of a game type with id above `after_id`, in id (recording) order.
+
+        Rows are `(id, player_id, opponent_id, won)` tuples, without ORM objects.
+        """
+        stmt = (
+            select(GameResult.id, GameResult.player_id, GameResult.opponent_id, GameResult.won)
+            .where(GameResult.game_type == game_type, GameResult.id > after_id)
+            .order_by(GameResult.id)
+            .limit(limit)
+        )
+        result = await self.session.execute(stmt)
+        return [tuple(row) for row in result.all()]
+
+    async def lock_history(self) -> None:
+        """Block new results until the end of the transaction (existing ones stay readable)."""
+        await self.session.execute(text(f"LOCK TABLE {GameResult.__tablename__} IN SHARE MODE"))
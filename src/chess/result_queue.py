@@ -0,0 +1,135 @@
+"""Write-behind queue for game results.
+
+`/chess/record?deferred=true` appends the result to a Redis Stream and answers 202 right away.
+Consumers (one per app worker, in a consumer group) apply the results in batches, one
+transaction per batch, and acknowledge them afterwards. Delivery is at-least-once: results of a
+consumer that died are claimed by another one after `RESULT_QUEUE_CLAIM_IDLE_MS`, and their
+idempotency keys make re-applying them a no-op.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from .config import (
+    RESULT_QUEUE_BATCH_SIZE,
+    RESULT_QUEUE_BLOCK_MS,
+    RESULT_QUEUE_CLAIM_IDLE_MS,
+    RESULT_QUEUE_GROUP,
+    RESULT_QUEUE_RETRY_DELAY,
+    RESULT_QUEUE_STREAM,
+)
+from .models import GameResultIn
+from .services import PlayGameService
+from fastapi import FastAPI
+from redis.exceptions import ResponseError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from src.cache import CacheService, create_cache_service
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+QueuedResult = tuple[bytes, str, GameResultIn]  # Stream entry id, idempotency key, result
+
+
+def _decode(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class GameResultQueue:
+    def __init__(self, redis_client, stream: str = RESULT_QUEUE_STREAM, group: str = RESULT_QUEUE_GROUP):
+        self.redis = redis_client
+        self.stream = stream
+        self.group = group
+
+    async def enqueue(self, game: GameResultIn, idempotency_key: Optional[str] = None) -> str:
+        """Append a result and return its idempotency key."""
+        idempotency_key = idempotency_key or uuid.uuid4().hex
+        await self.redis.xadd(
+            self.stream,
+            {
+                "key": idempotency_key,
+                "player_id": game.player_id,
+                "opponent_id": game.opponent_id,
+                "game_type": game.game_type,
+                "won": int(game.won),
+            },
+        )
+        return idempotency_key
+
+    async def ensure_group(self) -> None:
+        try:
+            await self.redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    @staticmethod
+    def _parse(entries) -> list[QueuedResult]:
+        results = []
+        for entry_id, fields in entries:
+            if not fields:
+                # Deleted from the stream while pending
+                continue
+            fields = {_decode(name): _decode(value) for name, value in fields.items()}
+            game = GameResultIn(
+                player_id=int(fields["player_id"]),
+                opponent_id=int(fields["opponent_id"]),
+                game_type=fields["game_type"],
+                won=fields["won"] == "1",
+            )
+            results.append((entry_id, fields["key"], game))
+        return results
+
+    async def claim_stale(self, consumer: str, count: int = RESULT_QUEUE_BATCH_SIZE) -> list[QueuedResult]:
+        """Take over results that were delivered but not acknowledged for too long."""
+        _, entries, *_ = await self.redis.xautoclaim(
+            self.stream, self.group, consumer, min_idle_time=RESULT_QUEUE_CLAIM_IDLE_MS, count=count
+        )
+        return self._parse(entries)
+
+    async def read(self, consumer: str, count: int = RESULT_QUEUE_BATCH_SIZE) -> list[QueuedResult]:
+        """Wait up to `RESULT_QUEUE_BLOCK_MS` for new results."""
+        response = await self.redis.xreadgroup(
+            self.group, consumer, {self.stream: ">"}, count=count, block=RESULT_QUEUE_BLOCK_MS
+        )
+        return self._parse(response[0][1]) if response else []
+
+    async def ack(self, entry_ids: list[bytes]) -> None:
+        """Acknowledge applied results and drop them from the stream."""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.xack(self.stream, self.group, *entry_ids)
+            pipe.xdel(self.stream, *entry_ids)
+            await pipe.execute()
+
+
+async def apply_batch(
+    batch: list[QueuedResult],
+    session_factory: async_sessionmaker[AsyncSession],
+    cache: CacheService,
+) -> int:
+    async with session_factory() as session:
+        service = PlayGameService(session, cache)
+        return await service.apply_queued_results([(key, game) for _, key, game in batch])
+
+
+async def run_result_consumer(app: FastAPI, session_factory: async_sessionmaker[AsyncSession]) -> None:
+    """Apply queued results until cancelled; failed batches stay pending and are retried."""
+    queue = GameResultQueue(app.state.redis)
+    consumer = f"{socket.gethostname()}-{os.getpid()}"
+    await queue.ensure_group()
+
+    while True:
+        try:
+            batch = await queue.claim_stale(consumer) or await queue.read(consumer)
+            if not batch:
+                continue
+            applied = await apply_batch(batch, session_factory, create_cache_service(app))
+            await queue.ack([entry_id for entry_id, _, _ in batch])
+            logger.info(f"[CHESS][RESULTS] applied {applied} of {len(batch)} queued results")
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("[CHESS][RESULTS] failed to apply queued results, retrying later")
+            await asyncio.sleep(RESULT_QUEUE_RETRY_DELAY)
@@ -1,23 +1,78 @@
-from .config import GameTypes
-from .models import UserProfileCreate, UserProfileFullOut, UserProfileOut, UserStatsOut
+from .config import (
+    LEADERBOARD_MAX_PAGE_SIZE,
+    LEADERBOARD_PAGE_SIZE,
+    RANDOM_PROFILE_MAX_COUNT,
+    RANKS_MAX_NEIGHBOURHOOD_RADIUS,
+    RANKS_NEIGHBOURHOOD_RADIUS,
+    GameTypes,
+)
+from .ingestion import PIPELINES, IngestionJobStore, IngestionPipeline
+from .models import (
+    GameIngestionRequest,
+    GameResultIn,
+    GameResultsIn,
+    IngestionJobOut,
+    IngestionKind,
+    IngestionRequest,
+    IngestionStatus,
+    LeaderboardPage,
+    RankedPlayerOut,
+    RankOut,
+    UserProfileCreate,
+    UserProfileFullOut,
+    UserProfileOut,
+    UserStatsOut,
+)
+from .ranking import RankingService
+from .result_queue import GameResultQueue
 from .services import PlayGameService, UserProfileService, UserStatsService
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
+from src.cache import CacheService, create_cache_service, get_cache_service, get_redis
+from src.database.connect import AsyncSessionLocal
 from src.database.context import get_db_session
+from src.external_api import create_chess_service
+from src.external_api.exceptions import ChessComError, NotFoundError
+from typing import Optional
 
 router = APIRouter(prefix="/chess", tags=["chess"])
 
 
-def get_profile_service(session: AsyncSession = Depends(get_db_session)) -> UserProfileService:
-    return UserProfileService(session)
+def get_profile_service(
+    session: AsyncSession = Depends(get_db_session),
+    cache: CacheService = Depends(get_cache_service),
+) -> UserProfileService:
+    return UserProfileService(session, cache)
+
+
+def get_stats_service(
+    session: AsyncSession = Depends(get_db_session),
+    cache: CacheService = Depends(get_cache_service),
+) -> UserStatsService:
+    return UserStatsService(session, cache)
+
+
+def get_play_game_service(
+    session: AsyncSession = Depends(get_db_session),
+    cache: CacheService = Depends(get_cache_service),
+) -> PlayGameService:
+    return PlayGameService(session, cache)
 
 
-def get_stats_service(session: AsyncSession = Depends(get_db_session)) -> UserStatsService:
-    return UserStatsService(session)
+def get_ranking_service(redis=Depends(get_redis)) -> RankingService:
+    return RankingService(redis)
 
 
-def get_play_game_service(session: AsyncSession = Depends(get_db_session)) -> PlayGameService:
-    return PlayGameService(session)
+def get_ingestion_store(redis=Depends(get_redis)) -> IngestionJobStore:
+    return IngestionJobStore(redis)
+
+
+def create_ingestion_pipeline(request: Request, store: IngestionJobStore, kind: IngestionKind) -> IngestionPipeline:
+    # The job outlives the request, so it gets its own sessions and no request-scoped background tasks
+    return PIPELINES[kind](
+        create_chess_service(request.app), AsyncSessionLocal, store, create_cache_service(request.app)
+    )
 
 
 # --- User Profile Endpoints ---
@@ -32,22 +87,33 @@ async def create_user_profile(
     return profile
 
 
-@router.get("/profiles/{username}", summary="Get a user profile by username", response_model=UserProfileOut)
-async def get_user_profile(
-    username: str,
+@router.get("/profiles/random", summary="Get a random user profile", response_model=UserProfileOut)
+async def get_random_user_profile(
     profile_service: UserProfileService = Depends(get_profile_service),
 ):
-    profile = await profile_service.get_user_profile_by_username(username)
+    profile = await profile_service.get_random_user_profile()
     if profile is None:
         raise HTTPException(status_code=404, detail="User profile not found") from None
     return profile
 
 
-@router.get("/profiles/random", summary="Get a random user profile", response_model=UserProfileOut)
-async def get_random_user_profile(
+@router.get(
+    "/profiles/random/many", summary="Get several distinct random user profiles", response_model=list[UserProfileOut]
+)
+async def get_random_user_profiles(
+    count: int = Query(..., ge=1, le=RANDOM_PROFILE_MAX_COUNT),
     profile_service: UserProfileService = Depends(get_profile_service),
 ):
-    profile = await profile_service.get_random_user_profile()
+    return await profile_service.get_random_user_profiles(count)
+
+
+# Declared after the fixed /profiles/random routes, which it would otherwise shadow
+@router.get("/profiles/{username}", summary="Get a user profile by username", response_model=UserProfileOut)
+async def get_user_profile(
+    username: str,
+    profile_service: UserProfileService = Depends(get_profile_service),
+):
+    profile = await profile_service.get_user_profile_by_username(username)
     if profile is None:
         raise HTTPException(status_code=404, detail="User profile not found") from None
     return profile
@@ -98,6 +164,62 @@ async def get_user_stats_by_game_type(
     return stats
 
 
+# --- Leaderboard Endpoint ---
+
+
+@router.get(
+    "/leaderboard/{game_type}",
+    summary="Get players of a game type by current rating, one page at a time",
+    response_model=LeaderboardPage,
+)
+async def get_leaderboard(
+    game_type: GameTypes,
+    limit: int = Query(LEADERBOARD_PAGE_SIZE, ge=1, le=LEADERBOARD_MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="`next_cursor` of the previous page"),
+    stats_service: UserStatsService = Depends(get_stats_service),
+):
+    try:
+        return await stats_service.get_leaderboard(game_type, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from None
+
+
+# --- Rank Endpoints ---
+
+
+@router.get(
+    "/ranks/{game_type}/{profile_id}",
+    summary="Get the rank and percentile of a player in a game type",
+    response_model=RankOut,
+)
+async def get_rank(
+    game_type: GameTypes,
+    profile_id: int,
+    ranking: RankingService = Depends(get_ranking_service),
+):
+    rank = await ranking.rank(game_type, profile_id)
+    if rank is None:
+        raise HTTPException(status_code=404, detail="Player has no rating in this game type") from None
+    return rank
+
+
+@router.get(
+    "/ranks/{game_type}/{profile_id}/around",
+    summary="Get the players ranked just above and below a player",
+    response_model=list[RankedPlayerOut],
+)
+async def get_rank_neighbourhood(
+    game_type: GameTypes,
+    profile_id: int,
+    radius: int = Query(RANKS_NEIGHBOURHOOD_RADIUS, ge=1, le=RANKS_MAX_NEIGHBOURHOOD_RADIUS),
+    ranking: RankingService = Depends(get_ranking_service),
+):
+    players = await ranking.around(game_type, profile_id, radius)
+    if players is None:
+        raise HTTPException(status_code=404, detail="Player has no rating in this game type") from None
+    return players
+
+
 # --- Play Game Endpoint ---
 
 
@@ -107,9 +229,126 @@ async def record_result(
     opponent_id: int,
     game_type: GameTypes,
     won: bool,
+    deferred: bool = Query(
+        False,
+        description="Queue the result and answer 202 right away; it is applied to the stats shortly after",
+    ),
+    idempotency_key: Optional[str] = Header(None, max_length=64),
+    redis=Depends(get_redis),
     play_game_service: PlayGameService = Depends(get_play_game_service),
 ):
+    if player_id == opponent_id:
+        raise HTTPException(status_code=422, detail="A player cannot play against themselves") from None
+
+    if deferred:
+        game = GameResultIn(player_id=player_id, opponent_id=opponent_id, game_type=game_type, won=won)
+        key = await GameResultQueue(redis).enqueue(game, idempotency_key)
+        return JSONResponse(status_code=202, content={"status": "queued", "idempotency_key": key})
+
     result = await play_game_service.record_game_result(player_id, opponent_id, game_type, won)
     if result is None:
         raise HTTPException(status_code=404, detail="One or both user profiles not found") from None
     return result
+
+
+@router.post(
+    "/record/batch",
+    summary="Record the results of many games, in the order they were played",
+    response_model=list[UserStatsOut],
+)
+async def record_results(
+    games: GameResultsIn,
+    play_game_service: PlayGameService = Depends(get_play_game_service),
+):
+    stats = await play_game_service.record_game_results(games.results)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="One or more user profiles not found") from None
+    return stats
+
+
+# --- Bulk Ingestion Endpoints ---
+
+
+async def _start_ingestion(
+    request: Request,
+    store: IngestionJobStore,
+    ingestion: IngestionRequest,
+    kind: IngestionKind,
+    since: Optional[str] = None,
+) -> IngestionJobOut:
+    pipeline = create_ingestion_pipeline(request, store, kind)
+
+    usernames = ingestion.usernames
+    if ingestion.title is not None:
+        try:
+            usernames = await pipeline.chess_service.get_users_by_title(ingestion.title)
+        except NotFoundError:
+            raise HTTPException(status_code=404, detail=f"Unknown title '{ingestion.title}'") from None
+        except ChessComError as e:
+            raise HTTPException(
+                status_code=503, detail=f"Could not load players titled '{ingestion.title}': {e}"
+            ) from e
+
+    job_id = await store.create(usernames, kind=kind, title=ingestion.title, since=since)
+    pipeline.start(job_id)
+    return await store.get(job_id)
+
+
+@router.post(
+    "/ingest",
+    summary="Import chess.com players (profiles and stats) in the background",
+    response_model=IngestionJobOut,
+    status_code=202,
+)
+async def start_ingestion(
+    request: Request,
+    ingestion: IngestionRequest,
+    store: IngestionJobStore = Depends(get_ingestion_store),
+):
+    return await _start_ingestion(request, store, ingestion, IngestionKind.PLAYERS)
+
+
+@router.post(
+    "/ingest/games",
+    summary="Import chess.com monthly game archives of players in the background",
+    response_model=IngestionJobOut,
+    status_code=202,
+)
+async def start_game_ingestion(
+    request: Request,
+    ingestion: GameIngestionRequest,
+    store: IngestionJobStore = Depends(get_ingestion_store),
+):
+    return await _start_ingestion(request, store, ingestion, IngestionKind.GAMES, since=ingestion.since)
+
+
+@router.get("/ingest/{job_id}", summary="Get the progress of an ingestion job", response_model=IngestionJobOut)
+async def get_ingestion(
+    job_id: str,
+    store: IngestionJobStore = Depends(get_ingestion_store),
+):
+    job = await store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Ingestion job not found") from None
+    return job
+
+
+@router.post(
+    "/ingest/{job_id}/resume",
+    summary="Resume a failed ingestion job from its last committed batch",
+    response_model=IngestionJobOut,
+    status_code=202,
+)
+async def resume_ingestion(
+    request: Request,
+    job_id: str,
+    store: IngestionJobStore = Depends(get_ingestion_store),
+):
+    job = await store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Ingestion job not found") from None
+    if job.status == IngestionStatus.COMPLETED:
+        raise HTTPException(status_code=409, detail="Ingestion job is already completed") from None
+
+    create_ingestion_pipeline(request, store, job.kind).start(job_id)
+    return job
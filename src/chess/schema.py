@@ -1,5 +1,6 @@
 from .config import GameTypes
-from sqlalchemy import ForeignKey, Integer, String, UniqueConstraint
+import datetime
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, String, Text, UniqueConstraint, desc
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from src.database.base import Base
 from src.database.base_mixins import RecordMixin, TimestampMixin
@@ -23,7 +24,11 @@ class UserStats(Base, RecordMixin, TimestampMixin):
     """SQLAlchemy model for chess user statistics."""
 
     __tablename__ = "user_stats"
-    __table_args__ = (UniqueConstraint("profile_id", "game_type"),)
+    __table_args__ = (
+        UniqueConstraint("profile_id", "game_type"),
+        # Leaderboard pages are range scans of this index (see UserStatsRepository.leaderboard)
+        Index("ix_user_stats_leaderboard", "game_type", desc("current_rating"), "id"),
+    )
 
     game_type: Mapped[GameTypes] = mapped_column(String(50), nullable=False)
     games_played: Mapped[int] = mapped_column(Integer, default=0)
@@ -35,7 +40,45 @@ class UserStats(Base, RecordMixin, TimestampMixin):
     profile: Mapped["UserProfile"] = relationship(back_populates="stats")
 
 
+class Game(Base, RecordMixin, TimestampMixin):
+    """SQLAlchemy model for games imported from chess.com monthly archives."""
+
+    __tablename__ = "games"
+
+    url: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
+    time_class: Mapped[Optional[str]] = mapped_column(String(20))
+    time_control: Mapped[Optional[str]] = mapped_column(String(20))
+    rules: Mapped[str] = mapped_column(String(20), default="chess")
+    rated: Mapped[bool] = mapped_column(Boolean, default=True)
+    white_username: Mapped[str] = mapped_column(String(100), index=True, nullable=False)
+    white_rating: Mapped[Optional[int]] = mapped_column(Integer)
+    white_result: Mapped[Optional[str]] = mapped_column(String(30))
+    black_username: Mapped[str] = mapped_column(String(100), index=True, nullable=False)
+    black_rating: Mapped[Optional[int]] = mapped_column(Integer)
+    black_result: Mapped[Optional[str]] = mapped_column(String(30))
+    end_time: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=False), nullable=False)
+    pgn: Mapped[Optional[str]] = mapped_column(Text)
+
+
+class GameResult(Base, RecordMixin, TimestampMixin):
+    """SQLAlchemy model for the history of recorded game results, in recording (id) order.
+
+    The idempotency key makes results redelivered by the write-behind queue no-ops.
+    """
+
+    __tablename__ = "game_results"
+    __table_args__ = (Index("ix_game_results_game_type_id", "game_type", "id"),)
+
+    idempotency_key: Mapped[str] = mapped_column(String(64), unique=True, nullable=False)
+    player_id: Mapped[int] = mapped_column(ForeignKey("user_profiles.id"))
+    opponent_id: Mapped[int] = mapped_column(ForeignKey("user_profiles.id"))
+    game_type: Mapped[GameTypes] = mapped_column(String(50), nullable=False)
+    won: Mapped[bool] = mapped_column(Boolean, nullable=False)
+
+
 __all__ = [
     "UserStats",
     "UserProfile",
+    "Game",
+    "GameResult",
 ]
@@ -1,13 +1,94 @@
-from .config import K_FACTOR, GameTypes
-from .models import UserProfileCreate, UserProfileFullOut, UserProfileOut, UserStatsOut
-from .repositories import UserProfileRepository, UserStatsRepository
+import base64
+import logging
+import uuid
+from .config import CACHE_NAMESPACE, CACHE_TTL, DEFAULT_RATING, K_FACTOR, GameTypes
+from .models import (
+    GameResultIn,
+    LeaderboardEntry,
+    LeaderboardPage,
+    UserProfileCreate,
+    UserProfileFullOut,
+    UserProfileOut,
+    UserStatsOut,
+)
+from .ranking import RankingService, mirror_ratings
+from .repositories import GameResultRepository, UserProfileRepository, UserStatsRepository
 from sqlalchemy.ext.asyncio import AsyncSession
+from src.cache import CacheService, cached, invalidate_tags
 from typing import Optional, Sequence
 
+logger = logging.getLogger(__name__)
+
+
+def profile_tag(profile_id: int) -> str:
+    """Cache tag carried by every cached read that depends on the profile's stats."""
+    return f"profile:{profile_id}"
+
+
+def profile_username_tag(username: str) -> str:
+    """Cache tag carried by cached reads of a profile by username."""
+    return f"profile_username:{username}"
+
+
+def encode_leaderboard_cursor(rating: int, stats_id: int) -> str:
+    """Opaque cursor pointing after the leaderboard row with this rating and stats id."""
+    return base64.urlsafe_b64encode(f"{rating}:{stats_id}".encode()).decode().rstrip("=")
+
+
+def decode_leaderboard_cursor(cursor: str) -> tuple[int, int]:
+    """Inverse of `encode_leaderboard_cursor`; raises ValueError for a malformed cursor."""
+    try:
+        decoded = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        rating, stats_id = decoded.split(":")
+        return int(rating), int(stats_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid leaderboard cursor: {cursor!r}") from e
+
+
+def calculate_elo_change(rating1: int, rating2: int, result: bool) -> tuple[int, int]:
+    """Calculate the new ELO ratings of two players based on the game result."""
+    k = K_FACTOR  # K-factor in ELO calculation
+
+    expected_score1 = 1 / (1 + 10 ** ((rating2 - rating1) / 400))
+    expected_score2 = 1 / (1 + 10 ** ((rating1 - rating2) / 400))
+
+    actual_score1 = 1.0 if result else 0.0
+    actual_score2 = 0.0 if result else 1.0
+
+    new_rating1 = rating1 + k * (actual_score1 - expected_score1)
+    new_rating2 = rating2 + k * (actual_score2 - expected_score2)
+
+    return int(round(new_rating1)), int(round(new_rating2))
+
+
+def replay_game_results(results: Sequence[GameResultIn], ratings: dict[int, int]) -> list[dict]:
+    """Apply games of one game type in order and return the per-player deltas for `apply_deltas`.
+
+    `ratings` holds every player's rating before the first game.
+    """
+    ratings = dict(ratings)
+    deltas: dict[int, dict] = {}
+
+    for game in results:
+        new_rating1, new_rating2 = calculate_elo_change(ratings[game.player_id], ratings[game.opponent_id], game.won)
+        for profile_id, rating, won in (
+            (game.player_id, new_rating1, game.won),
+            (game.opponent_id, new_rating2, not game.won),
+        ):
+            ratings[profile_id] = rating
+            delta = deltas.setdefault(profile_id, {"profile_id": profile_id, "played": 0, "won": 0, "highest": rating})
+            delta["played"] += 1
+            delta["won"] += int(won)
+            delta["rating"] = rating
+            delta["highest"] = max(delta["highest"], rating)
+
+    return list(deltas.values())
+
 
 class UserProfileService:
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, cache: CacheService):
         self.session = session
+        self.cache = cache
         self.profile_repository = UserProfileRepository(session)
 
     async def create_user_profile(self, profile_data: UserProfileCreate) -> UserProfileOut:
@@ -16,6 +97,13 @@ class UserProfileService:
         profile = await self.profile_repository.create(profile_data.model_dump())
         return UserProfileOut.model_validate(profile)
 
+    @cached(
+        "profile:username:{profile_username}",
+        CACHE_TTL,
+        namespace=CACHE_NAMESPACE,
+        tags=["profile_username:{profile_username}"],
+        model=UserProfileOut,
+    )
     async def get_user_profile_by_username(self, profile_username: str) -> Optional[UserProfileOut]:
         """Retrieve a user profile by username."""
 
@@ -32,6 +120,19 @@ class UserProfileService:
             return None
         return UserProfileOut.model_validate(profile)
 
+    async def get_random_user_profiles(self, count: int) -> list[UserProfileOut]:
+        """Retrieve up to `count` distinct random user profiles."""
+
+        profiles = await self.profile_repository.get_random_many(count)
+        return [UserProfileOut.model_validate(profile) for profile in profiles]
+
+    @cached(
+        "profile:{profile_id}:full",
+        CACHE_TTL,
+        namespace=CACHE_NAMESPACE,
+        tags=["profile:{profile_id}"],
+        model=UserProfileFullOut,
+    )
     async def get_full_user_profile(self, profile_id: int) -> Optional[UserProfileFullOut]:
         """Retrieve a user profile along with associated statistics by id."""
 
@@ -42,16 +143,31 @@ class UserProfileService:
 
 
 class UserStatsService:
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, cache: CacheService):
         self.session = session
+        self.cache = cache
         self.stats_repository = UserStatsRepository(session)
 
+    @cached(
+        "profile:{profile_id}:stats",
+        CACHE_TTL,
+        namespace=CACHE_NAMESPACE,
+        tags=["profile:{profile_id}"],
+        model=list[UserStatsOut],
+    )
     async def get_user_stats(self, profile_id: int) -> Sequence[UserStatsOut]:
         """Retrieve all statistics for a given user by user ID."""
 
         stats = await self.stats_repository.get_by_profile_id(profile_id)
         return [UserStatsOut.model_validate(stat) for stat in stats]
 
+    @cached(
+        "profile:{profile_id}:stats:{game_type}",
+        CACHE_TTL,
+        namespace=CACHE_NAMESPACE,
+        tags=["profile:{profile_id}"],
+        model=UserStatsOut,
+    )
     async def get_user_stats_by_game_type(self, profile_id: int, game_type: GameTypes) -> Optional[UserStatsOut]:
         """Retrieve statistics for a given user by user ID and game type."""
 
@@ -60,71 +176,207 @@ class UserStatsService:
             return None
         return UserStatsOut.model_validate(stat)
 
+    async def get_leaderboard(self, game_type: GameTypes, limit: int, cursor: Optional[str] = None) -> LeaderboardPage:
+        """Return one page of the leaderboard; raises ValueError for a malformed cursor."""
+
+        after = decode_leaderboard_cursor(cursor) if cursor is not None else None
+        # One extra row tells whether there is a next page
+        rows = await self.stats_repository.leaderboard(game_type, limit + 1, after)
+        page = rows[:limit]
+
+        next_cursor = None
+        if len(rows) > limit:
+            last, _ = page[-1]
+            next_cursor = encode_leaderboard_cursor(last.current_rating, last.id)
+
+        entries = [
+            LeaderboardEntry(
+                profile_id=stats.profile_id,
+                username=username,
+                current_rating=stats.current_rating,
+                highest_rating=stats.highest_rating,
+                games_played=stats.games_played,
+                games_won=stats.games_won,
+            )
+            for stats, username in page
+        ]
+        return LeaderboardPage(game_type=game_type, entries=entries, next_cursor=next_cursor)
+
 
 class PlayGameService:
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, cache: CacheService):
         self.session = session
+        self.cache = cache
         self.profile_repository = UserProfileRepository(session)
         self.stats_repository = UserStatsRepository(session)
+        self.result_repository = GameResultRepository(session)
+        self.ranking = RankingService(cache.redis)
 
     @staticmethod
     async def _calculate_elo_change(rating1: int, rating2: int, result: bool) -> tuple[int, int]:
         """Calculate the ELO rating change for two players based on the game result."""
-        k = K_FACTOR  # K-factor in ELO calculation
-
-        expected_score1 = 1 / (1 + 10 ** ((rating2 - rating1) / 400))
-        expected_score2 = 1 / (1 + 10 ** ((rating1 - rating2) / 400))
-
-        actual_score1 = 1.0 if result else 0.0
-        actual_score2 = 0.0 if result else 1.0
-
-        new_rating1 = rating1 + k * (actual_score1 - expected_score1)
-        new_rating2 = rating2 + k * (actual_score2 - expected_score2)
-
-        return int(round(new_rating1)), int(round(new_rating2))
+        return calculate_elo_change(rating1, rating2, result)
 
     async def record_game_result(
         self, profile1_id: int, profile2_id, game_type: GameTypes, result: bool
     ) -> Optional[tuple[UserStatsOut, UserStatsOut]]:
-        """Record the result of a game between two users and update their statistics."""
-
-        if not await self.profile_repository.exists(profile1_id) or not await self.profile_repository.exists(
-            profile2_id
-        ):
-            return None
-
-        profile1_stats = await self.stats_repository.get_by_profile_and_game_type(profile1_id, game_type)
-        profile2_stats = await self.stats_repository.get_by_profile_and_game_type(profile2_id, game_type)
-
-        if profile1_stats is None:
-            profile1_stats = await self.stats_repository.create_by_default(profile1_id, game_type)
-        if profile2_stats is None:
-            profile2_stats = await self.stats_repository.create_by_default(profile2_id, game_type)
-
-        rating1 = profile1_stats.current_rating or 1200
-        rating2 = profile2_stats.current_rating or 1200
-
-        new_rating1, new_rating2 = await self._calculate_elo_change(rating1, rating2, result)
-
-        profile1_stats.current_rating = new_rating1
-        profile2_stats.current_rating = new_rating2
-
-        if profile1_stats.highest_rating is None or new_rating1 > profile1_stats.highest_rating:
-            profile1_stats.highest_rating = new_rating1
-        if profile2_stats.highest_rating is None or new_rating2 > profile2_stats.highest_rating:
-            profile2_stats.highest_rating = new_rating2
-
-        if result:
-            profile1_stats.games_won += 1
-        else:
-            profile2_stats.games_won += 1
-
-        profile1_stats.games_played += 1
-        profile2_stats.games_played += 1
-
-        await self.session.commit()
-
-        await self.session.refresh(profile1_stats)
-        await self.session.refresh(profile2_stats)
-
-        return UserStatsOut.model_validate(profile1_stats), UserStatsOut.model_validate(profile2_stats)
+        """Record the result of a game between two users and update their statistics.
+
+        Runs as one transaction: missing stats are created with INSERT ... ON CONFLICT, both rows
+        are locked with SELECT ... FOR UPDATE so concurrent games for the same player queue up
+        instead of losing updates, and counters are incremented in SQL with UPDATE ... RETURNING.
+        """
+
+        profile_ids = [profile1_id, profile2_id]
+        game = GameResultIn(player_id=profile1_id, opponent_id=profile2_id, game_type=game_type, won=result)
+        try:
+            if not await self._store_history([game]):
+                await self.session.rollback()
+                return None
+            await self.stats_repository.ensure_many(profile_ids, game_type)
+            locked = await self.stats_repository.lock_many(profile_ids, game_type)
+            if profile1_id not in locked or profile2_id not in locked:
+                await self.session.rollback()
+                return None
+
+            rating1 = locked[profile1_id].current_rating or DEFAULT_RATING
+            rating2 = locked[profile2_id].current_rating or DEFAULT_RATING
+            new_rating1, new_rating2 = await self._calculate_elo_change(rating1, rating2, result)
+
+            updated = await self.stats_repository.apply_deltas(
+                game_type,
+                [
+                    {
+                        "profile_id": profile1_id,
+                        "played": 1,
+                        "won": int(result),
+                        "rating": new_rating1,
+                        "highest": new_rating1,
+                    },
+                    {
+                        "profile_id": profile2_id,
+                        "played": 1,
+                        "won": int(not result),
+                        "rating": new_rating2,
+                        "highest": new_rating2,
+                    },
+                ],
+            )
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+
+        final_stats = (
+            UserStatsOut.model_validate(updated[profile1_id]),
+            UserStatsOut.model_validate(updated[profile2_id]),
+        )
+        await self._publish(final_stats)
+        return final_stats
+
+    async def _apply_game_results(self, results: Sequence[GameResultIn]) -> Optional[list[UserStatsOut]]:
+        """Apply game results inside the current transaction; None if any profile does not exist.
+
+        Games are replayed in order per game type, so each player's Elo evolves exactly as if the
+        games were recorded one by one; each game type is then written with a single UPDATE.
+        """
+
+        by_game_type: dict[GameTypes, list[GameResultIn]] = {}
+        for game in results:
+            by_game_type.setdefault(game.game_type, []).append(game)
+
+        final_stats = []
+        # A fixed order across game types too, so concurrent batches cannot deadlock
+        for game_type in sorted(by_game_type):
+            games = by_game_type[game_type]
+            profile_ids = sorted({profile_id for game in games for profile_id in (game.player_id, game.opponent_id)})
+            await self.stats_repository.ensure_many(profile_ids, game_type)
+            locked = await self.stats_repository.lock_many(profile_ids, game_type)
+            if len(locked) != len(profile_ids):
+                return None
+
+            ratings = {profile_id: stats.current_rating or DEFAULT_RATING for profile_id, stats in locked.items()}
+            updated = await self.stats_repository.apply_deltas(game_type, replay_game_results(games, ratings))
+            final_stats.extend(UserStatsOut.model_validate(updated[profile_id]) for profile_id in profile_ids)
+
+        return final_stats
+
+    async def _store_history(self, results: Sequence[GameResultIn]) -> bool:
+        """Add results to `game_results` for rating replays; False if any profile does not exist.
+
+        Done before the statistics rows are locked, so writers queue up behind a running replay
+        (which locks the history) without holding row locks it needs.
+        """
+        profile_ids = {profile_id for game in results for profile_id in (game.player_id, game.opponent_id)}
+        if len(await self.profile_repository.existing_ids(profile_ids)) != len(profile_ids):
+            return False
+        await self.result_repository.insert_new(
+            [{"idempotency_key": uuid.uuid4().hex, **game.model_dump()} for game in results]
+        )
+        return True
+
+    async def _publish(self, stats: Sequence[UserStatsOut]) -> None:
+        """Make committed stats visible: drop cached reads of the players and update their ranks."""
+        touched = {entry.profile_id for entry in stats}
+        if touched:
+            await invalidate_tags(self.cache, *(profile_tag(profile_id) for profile_id in touched))
+        await mirror_ratings(self.ranking, stats)
+
+    async def record_game_results(self, results: Sequence[GameResultIn]) -> Optional[list[UserStatsOut]]:
+        """Record many game results in one transaction and return the final stats of every player involved.
+
+        Returns None (and records nothing) if any profile does not exist.
+        """
+
+        try:
+            final_stats = await self._apply_game_results(results) if await self._store_history(results) else None
+            if final_stats is None:
+                await self.session.rollback()
+                return None
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+
+        await self._publish(final_stats)
+        return final_stats
+
+    async def apply_queued_results(self, results: Sequence[tuple[str, GameResultIn]]) -> int:
+        """Apply results taken from the write-behind queue, each at most once, in one transaction.
+
+        Every result carries an idempotency key that is stored in `game_results` in the same
+        transaction as the stats update, so redelivered results are skipped. Results for unknown
+        profiles are dropped. Returns the number of results applied.
+        """
+
+        # A result enqueued twice under one key is applied once, as first enqueued
+        unique: dict[str, GameResultIn] = {}
+        for key, game in results:
+            unique.setdefault(key, game)
+
+        profile_ids = {profile_id for game in unique.values() for profile_id in (game.player_id, game.opponent_id)}
+        try:
+            existing = await self.profile_repository.existing_ids(profile_ids)
+            valid = []
+            for key, game in unique.items():
+                if game.player_id in existing and game.opponent_id in existing:
+                    valid.append((key, game))
+                else:
+                    logger.warning(f"[CHESS][RESULTS] dropping result key={key}: unknown profile")
+
+            fresh_keys = await self.result_repository.insert_new(
+                [{"idempotency_key": key, **game.model_dump()} for key, game in valid]
+            )
+            fresh = [game for key, game in valid if key in fresh_keys]
+
+            final_stats = await self._apply_game_results(fresh)
+            if final_stats is None:
+                # A profile was deleted meanwhile; roll back so the batch is retried without it
+                raise RuntimeError("Profile disappeared while applying queued game results")
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+
+        await self._publish(final_stats)
+        return len(fresh)
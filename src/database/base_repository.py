@@ -1,7 +1,7 @@
-from sqlalchemy import delete, select, update
+from sqlalchemy import and_, delete, or_, select, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.database.base_mixins import RecordMixin
-from typing import Generic, Optional, Sequence, Type, TypeVar
+from typing import AsyncIterator, Generic, Optional, Sequence, Type, TypeVar
 
 # RecordMixin is used as a bound to ensure the model has an 'id' attribute
 ModelType = TypeVar("ModelType", bound=RecordMixin)
@@ -15,11 +15,64 @@ class BaseRepository(Generic[ModelType]):
         self.session = session
 
     async def get_all(self) -> Sequence[ModelType]:
-        """Return all records of the model."""
+        """Return all records of the model.
+
+        Loads the whole table at once; use `page_after` or `iter_all` for tables that grow.
+        """
         stmt = select(self.model)
         result = await self.session.execute(stmt)
         return result.scalars().all()
 
+    def _order_columns(self, order_by: str) -> list:
+        # The primary key breaks ties, so every record has exactly one position
+        column = getattr(self.model, order_by)
+        return [self.model.id] if order_by == "id" else [column, self.model.id]
+
+    def _after(self, order_by: str, cursor: tuple):
+        """Condition selecting the records after `cursor` in `order_by` order.
+
+        NULLs of a nullable order column sort last, where a row comparison with them is never true.
+        """
+        columns = self._order_columns(order_by)
+        if len(columns) == 1 or not columns[0].expression.nullable:
+            return tuple_(*columns) > tuple_(*cursor)
+
+        column, id_column = columns
+        value, obj_id = cursor
+        if value is None:
+            return and_(column.is_(None), id_column > obj_id)
+        return or_(tuple_(*columns) > tuple_(*cursor), column.is_(None))
+
+    def cursor_of(self, obj: ModelType, order_by: str = "id") -> tuple:
+        """Cursor pointing right after `obj` in `order_by` order, for the next `page_after` call."""
+        return tuple(getattr(obj, column.key) for column in self._order_columns(order_by))
+
+    async def page_after(
+        self, cursor: Optional[tuple] = None, limit: int = 100, order_by: str = "id"
+    ) -> Sequence[ModelType]:
+        """Return up to `limit` records after `cursor`, ordered by the `order_by` column and id.
+
+        `cursor` is None for the first page, then `cursor_of(last record of the previous page)`.
+        Unlike OFFSET, the cost of a page does not grow with its depth when the order columns
+        are indexed. Records with a NULL `order_by` value come last.
+        """
+        columns = self._order_columns(order_by)
+        ordering = [column.asc().nulls_last() if column.expression.nullable else column for column in columns]
+        stmt = select(self.model).order_by(*ordering).limit(limit)
+        if cursor is not None:
+            stmt = stmt.where(self._after(order_by, cursor))
+        result = await self.session.execute(stmt)
+        return result.scalars().all()
+
+    async def iter_all(self, batch_size: int = 1000) -> AsyncIterator[ModelType]:
+        """Yield every record of the model through a server-side cursor, `batch_size` rows at a time.
+
+        Only the current batch is held in memory.
+        """
+        stmt = select(self.model).order_by(self.model.id).execution_options(yield_per=batch_size)
+        async for obj in await self.session.stream_scalars(stmt):
+            yield obj
+
     async def get_by_id(self, obj_id: int) -> Optional[ModelType]:
         """Return a record by primary key."""
         stmt = select(self.model).where(self.model.id == obj_id)
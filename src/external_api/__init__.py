@@ -1,3 +1,11 @@
+from .client import init_http_client
+from .deps import create_chess_service
+from .prefetch import run_prefetcher
 from .router import router as external_api_router
 
-__all__ = ["external_api_router"]
+__all__ = [
+    "external_api_router",
+    "init_http_client",
+    "create_chess_service",
+    "run_prefetcher",
+]
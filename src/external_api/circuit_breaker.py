@@ -0,0 +1,83 @@
+"""Circuit breaker for upstream calls, shared by all workers through Redis.
+
+State is derived from two keys:
+  - `<key>:open` exists (it expires after `reset_timeout`)     -> OPEN: calls fail fast
+  - `<key>:tripped` exists but `<key>:open` has expired         -> HALF-OPEN: one probe call
+  - neither exists                                              -> CLOSED: calls go through
+"""
+
+import logging
+from .exceptions import CircuitOpenError
+from enum import StrEnum
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(StrEnum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Trips after `failure_threshold` failures within `failure_window` seconds."""
+
+    def __init__(
+        self,
+        redis_client,
+        key: str,
+        failure_threshold: int,
+        failure_window: int,
+        reset_timeout: int,
+        probe_timeout: int,
+    ):
+        self.redis = redis_client
+        self.key = key
+        self.failure_threshold = failure_threshold
+        self.failure_window = failure_window
+        self.reset_timeout = reset_timeout
+        self.probe_timeout = probe_timeout
+
+    async def state(self) -> CircuitState:
+        is_open, tripped = await self.redis.mget(f"{self.key}:open", f"{self.key}:tripped")
+        if is_open:
+            return CircuitState.OPEN
+        if tripped:
+            return CircuitState.HALF_OPEN
+        return CircuitState.CLOSED
+
+    async def before_call(self) -> bool:
+        """Raise CircuitOpenError if the call must not go upstream.
+
+        Returns True if the call is the half-open probe, which decides whether the circuit closes.
+        """
+        state = await self.state()
+        if state == CircuitState.CLOSED:
+            return False
+
+        if state == CircuitState.HALF_OPEN:
+            if await self.redis.set(f"{self.key}:probe", 1, nx=True, ex=self.probe_timeout):
+                return True
+
+        raise CircuitOpenError(f"Circuit '{self.key}' is {state}, upstream calls are suspended")
+
+    async def record_success(self, probe: bool) -> None:
+        if probe:
+            await self.redis.delete(f"{self.key}:tripped", f"{self.key}:failures", f"{self.key}:probe")
+            logger.info(f"[CIRCUIT][{self.key}] probe succeeded, circuit closed")
+
+    async def record_failure(self, probe: bool) -> None:
+        if not probe:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.incr(f"{self.key}:failures")
+                pipe.expire(f"{self.key}:failures", self.failure_window, nx=True)
+                failures, _ = await pipe.execute()
+            if failures < self.failure_threshold:
+                return
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.set(f"{self.key}:open", 1, ex=self.reset_timeout)
+            pipe.set(f"{self.key}:tripped", 1)
+            pipe.delete(f"{self.key}:failures", f"{self.key}:probe")
+            await pipe.execute()
+        logger.warning(f"[CIRCUIT][{self.key}] circuit opened for {self.reset_timeout}s")
@@ -0,0 +1,29 @@
+import aiohttp
+from .config import chess_com_config
+
+DEFAULT_HEADERS = {
+    "Host": chess_com_config.api_host,
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3",
+    "Accept": "application/json",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Connection": "keep-alive",
+}
+
+
+def init_http_client() -> aiohttp.ClientSession:
+    """Create the app-lifetime HTTP session used for all chess.com calls.
+
+    Must be called from a running event loop (the app lifespan) and closed on shutdown.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=chess_com_config.connection_limit,
+        limit_per_host=chess_com_config.connection_limit_per_host,
+        ttl_dns_cache=chess_com_config.dns_cache_ttl,
+        keepalive_timeout=chess_com_config.keepalive_timeout,
+    )
+    timeout = aiohttp.ClientTimeout(
+        total=chess_com_config.request_timeout,
+        connect=chess_com_config.connect_timeout,
+        sock_read=chess_com_config.read_timeout,
+    )
+    return aiohttp.ClientSession(connector=connector, timeout=timeout, headers=DEFAULT_HEADERS)
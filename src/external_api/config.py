@@ -1,4 +1,5 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from src.cache import CacheTTL
 
 
 @dataclass
@@ -7,7 +8,66 @@ class ChessComConfig:
     api_base_url: str = "https://api.chess.com"
     web_base_url: str = "https://www.chess.com"
 
-    cache_ttl: int = 60
+    profile_ttl: CacheTTL = field(default_factory=lambda: CacheTTL(soft=60, hard=600, stale_if_error=3600))
+    stats_ttl: CacheTTL = field(default_factory=lambda: CacheTTL(soft=60, hard=600, stale_if_error=3600))
+    titled_ttl: CacheTTL = field(default_factory=lambda: CacheTTL(soft=3600, hard=86400, stale_if_error=86400))
+    # Summaries are rebuilt as soon as the profile or stats they were built from change
+    summary_ttl: CacheTTL = field(default_factory=lambda: CacheTTL(soft=60, hard=600, stale_if_error=3600))
+    archives_ttl: CacheTTL = field(default_factory=lambda: CacheTTL(soft=3600, hard=86400, stale_if_error=86400))
+    not_found_ttl: int = 30  # Seconds a 404 (unknown username or title) is remembered
+
+    # Pooled HTTP client, shared for the lifetime of the app
+    connection_limit: int = 100
+    connection_limit_per_host: int = 50
+    dns_cache_ttl: int = 300  # Seconds
+    keepalive_timeout: float = 30.0  # Seconds an idle connection is kept open
+    request_timeout: float = 10.0  # Seconds for the whole request
+    connect_timeout: float = 3.0
+    read_timeout: float = 5.0
+
+    # Upstream rate limiting, shared by all workers through Redis
+    rate_limit_enabled: bool = True
+    rate_limit_key: str = "ratelimit:chess_com"
+    rate_limit_max_rate: float = 10.0  # Requests per second while chess.com is not throttling us
+    rate_limit_burst: int = 10
+    rate_limit_min_rate: float = 0.5
+    rate_limit_recovery: float = 0.2  # Requests per second regained every second after a 429
+    rate_limit_decrease_factor: float = 0.5  # Rate multiplier applied on a 429
+    max_retries: int = 3  # Retries for 429 and 502/503/504 responses
+    backoff_base: float = 0.5  # Seconds; doubled on every retry, with full jitter
+    backoff_max: float = 10.0
+
+    # Circuit breaker, shared by all workers through Redis
+    circuit_breaker_enabled: bool = True
+    circuit_breaker_key: str = "circuit:chess_com"
+    circuit_failure_threshold: int = 5  # Failures within the window that open the circuit
+    circuit_failure_window: int = 30  # Seconds
+    circuit_reset_timeout: int = 30  # Seconds the circuit stays open before a probe call
+    circuit_probe_timeout: int = 15  # Seconds before a stuck probe lets another caller try
+
+    # Bulk summaries
+    summaries_concurrency: int = 10  # Players fetched at the same time for one request
+    summaries_max_usernames: int = 100
+
+    # Monthly game archives, streamed instead of being loaded whole
+    archive_chunk_size: int = 64 * 1024  # Bytes read from the response at a time
+    archive_read_timeout: float = 30.0  # Seconds without receiving data; there is no limit on the whole download
+
+    # Prefetching of the most requested players, ahead of their cache entries going stale
+    prefetch_enabled: bool = True
+    prefetch_interval: float = 15.0  # Seconds between prefetch rounds
+    prefetch_lead: float = 20.0  # Seconds before going stale at which an entry is refreshed
+    prefetch_top_n: int = 2000  # Most requested usernames kept warm
+    prefetch_budget: int = 100  # Upstream requests per round, on top of the rate limiter
+    prefetch_concurrency: int = 5
+    prefetch_lock_key: str = "prefetch:chess_com:lock"  # Only one worker prefetches per round
+    hot_usernames_key: str = "hot:chess_com"
+    hot_usernames_decay: float = 0.95  # Access counters are multiplied by this every round
+    hot_usernames_max_size: int = 10000  # Usernames tracked; the least requested are dropped
+
+    # Request coalescing for cache misses
+    fetch_lock_ttl: float = 10.0  # Seconds a worker may hold the upstream fetch lock for a key
+    fetch_wait_timeout: float = 10.0  # Seconds other callers wait before fetching themselves
 
 
 chess_com_config = ChessComConfig()
@@ -0,0 +1,80 @@
+import aiohttp
+import logging
+from .circuit_breaker import CircuitBreaker
+from .config import chess_com_config
+from .hot_usernames import HotUsernames
+from .rate_limit import UpstreamRateLimiter
+from .service import ChessService
+from fastapi import BackgroundTasks, FastAPI, Query, Request
+from redis.exceptions import RedisError
+from src.cache import create_cache_service
+
+logger = logging.getLogger(__name__)
+
+
+def create_rate_limiter(redis_client) -> UpstreamRateLimiter | None:
+    if not chess_com_config.rate_limit_enabled:
+        return None
+    return UpstreamRateLimiter(
+        redis_client,
+        key=chess_com_config.rate_limit_key,
+        max_rate=chess_com_config.rate_limit_max_rate,
+        burst=chess_com_config.rate_limit_burst,
+        min_rate=chess_com_config.rate_limit_min_rate,
+        recovery=chess_com_config.rate_limit_recovery,
+        decrease_factor=chess_com_config.rate_limit_decrease_factor,
+    )
+
+
+def create_circuit_breaker(redis_client) -> CircuitBreaker | None:
+    if not chess_com_config.circuit_breaker_enabled:
+        return None
+    return CircuitBreaker(
+        redis_client,
+        key=chess_com_config.circuit_breaker_key,
+        failure_threshold=chess_com_config.circuit_failure_threshold,
+        failure_window=chess_com_config.circuit_failure_window,
+        reset_timeout=chess_com_config.circuit_reset_timeout,
+        probe_timeout=chess_com_config.circuit_probe_timeout,
+    )
+
+
+def create_chess_service(app: FastAPI, background_tasks: BackgroundTasks | None = None) -> ChessService:
+    """Build a ChessService from the app state, for use outside of a request (background jobs)."""
+    return ChessService(
+        app.state.http_client,
+        create_cache_service(app),
+        background_tasks,
+        create_rate_limiter(app.state.redis),
+        create_circuit_breaker(app.state.redis),
+    )
+
+
+async def get_http_client(request: Request) -> aiohttp.ClientSession:
+    return request.app.state.http_client
+
+
+async def get_service(request: Request, background_tasks: BackgroundTasks) -> ChessService:
+    return create_chess_service(request.app, background_tasks)
+
+
+async def record_usernames(request: Request, *usernames: str) -> None:
+    """Count requests for players towards the set the prefetcher keeps warm; never fails the request."""
+    if not chess_com_config.prefetch_enabled:
+        return
+    try:
+        await HotUsernames(request.app.state.redis).record(*usernames)
+    except RedisError:
+        logger.warning("[EXTERNAL-API][PREFETCH] could not record requested usernames", exc_info=True)
+
+
+async def track_username(request: Request, username: str) -> None:
+    await record_usernames(request, username)
+
+
+async def track_usernames(
+    request: Request,
+    # Same limits as the endpoint: FastAPI calls this before it validates the endpoint's own parameters
+    usernames: list[str] = Query(..., min_length=1, max_length=chess_com_config.summaries_max_usernames),
+) -> None:
+    await record_usernames(request, *usernames)
@@ -0,0 +1,26 @@
+class ChessComError(Exception):
+    """Base error for failures talking to the chess.com public API."""
+
+
+class NotFoundError(ChessComError):
+    """chess.com answered 404, e.g. for an unknown username or title."""
+
+
+class RateLimitedError(ChessComError):
+    """chess.com kept answering 429 after all retries."""
+
+    def __init__(self, message: str, retry_after: float | None = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(ChessComError):
+    """Upstream calls are suspended because chess.com has been failing."""
+
+
+__all__ = [
+    "ChessComError",
+    "NotFoundError",
+    "RateLimitedError",
+    "CircuitOpenError",
+]
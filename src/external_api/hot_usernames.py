@@ -0,0 +1,40 @@
+"""Recent popularity of chess.com usernames.
+
+Requests bump a per-username counter in a Redis sorted set. The prefetcher decays all counters
+once per round, so the set ranks players by how often they were requested lately.
+"""
+
+from .config import chess_com_config
+
+
+class HotUsernames:
+    """Exponentially decayed access counters in a Redis sorted set."""
+
+    def __init__(
+        self,
+        redis_client,
+        key: str = chess_com_config.hot_usernames_key,
+        decay: float = chess_com_config.hot_usernames_decay,
+        max_size: int = chess_com_config.hot_usernames_max_size,
+    ):
+        self.redis = redis_client
+        self.key = key
+        self.decay = decay
+        self.max_size = max_size
+
+    async def record(self, *usernames: str) -> None:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for username in usernames:
+                pipe.zincrby(self.key, 1, username)
+            await pipe.execute()
+
+    async def decay_all(self) -> None:
+        """Age every counter by one step and forget the least requested usernames."""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zunionstore(self.key, {self.key: self.decay})
+            pipe.zremrangebyrank(self.key, 0, -(self.max_size + 1))
+            await pipe.execute()
+
+    async def top(self, count: int) -> list[str]:
+        usernames = await self.redis.zrevrange(self.key, 0, count - 1)
+        return [username.decode() if isinstance(username, bytes) else username for username in usernames]
@@ -1,9 +1,10 @@
+from .api.value import Record
 from pydantic import BaseModel, Field, HttpUrl
 from typing import TYPE_CHECKING, Optional
 
 if TYPE_CHECKING:
     from .api import PlayerProfileAPI, PlayerStatsAPI
-    from .api.value import ModeStats, Record
+    from .api.value import ModeStats
 
 
 class PlayerModeRecord(BaseModel):
@@ -100,3 +101,18 @@ class PlayerSummary(BaseModel):
             best_puzzle_rush_score=best_puzzle_rush,
             highest_tactic_rating=highest_tactic,
         )
+
+
+class PlayerSummaryError(BaseModel):
+    """Why a summary could not be built for one of the requested players."""
+
+    username: str
+    status_code: int = Field(..., description="HTTP status the single-player endpoint would have returned.")
+    detail: str
+
+
+class PlayerSummaries(BaseModel):
+    """Summaries for several players; failures for individual players do not fail the batch."""
+
+    summaries: list[PlayerSummary] = Field([], description="Summaries in the order of the requested usernames.")
+    errors: list[PlayerSummaryError] = Field([], description="Players whose summary could not be built.")
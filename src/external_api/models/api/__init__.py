@@ -1,6 +1,6 @@
 from .value import ModeStats, PuzzleRush, Tactics
 from datetime import datetime
-from pydantic import BaseModel, Field, HttpUrl
+from pydantic import BaseModel, ConfigDict, Field, HttpUrl
 from typing import Literal, Optional
 
 ChessTimeClass = Literal["bullet", "blitz", "rapid", "daily"]
@@ -37,6 +37,16 @@ class TitlePlayersListAPI(BaseModel):
     players: list[str]
 
 
+# for: https://api.chess.com/pub/player/{username}/games/archives
+class GameArchivesAPI(BaseModel):
+    """API response for the list of a player's monthly game archives."""
+
+    archives: list[str]  # .../games/{YYYY}/{MM}, oldest first
+
+    def months(self) -> list[tuple[int, int]]:
+        return [(int(url.rsplit("/", 2)[-2]), int(url.rsplit("/", 1)[-1])) for url in self.archives]
+
+
 # for: https://api.chess.com/pub/player/{username}/stats
 class PlayerStatsAPI(BaseModel):
     chess_daily: Optional[ModeStats] = Field(None, alias="chess_daily")
@@ -48,10 +58,7 @@ class PlayerStatsAPI(BaseModel):
     tactics: Optional[Tactics] = None
     puzzle_rush: Optional[PuzzleRush] = Field(None, alias="puzzle_rush")
 
-    class Config:
-        allow_population_by_field_name = True
-        allow_population_by_alias = True
-        extra = "ignore"
+    model_config = ConfigDict(populate_by_name=True, extra="ignore")
 
 
 # for: any
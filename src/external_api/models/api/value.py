@@ -1,6 +1,18 @@
 from datetime import datetime
-from pydantic import BaseModel, validator
-from typing import Optional
+from pydantic import BaseModel, field_validator
+from typing import Any, Optional
+
+
+def parse_unix_date(v: Any) -> Any:
+    """chess.com sends dates as UNIX timestamps (seconds); 0 means no date.
+
+    Anything else (datetime, ISO string from a cached, already normalized model) is left to pydantic.
+    """
+    if v is None or v == 0:
+        return None
+    if isinstance(v, (int, float)) or (isinstance(v, str) and v.isdigit()):
+        return datetime.fromtimestamp(int(v))
+    return v
 
 
 class RatingEntry(BaseModel):
@@ -9,17 +21,10 @@ class RatingEntry(BaseModel):
     rd: Optional[int] = None
     game: Optional[str] = None
 
-    @validator("date", pre=True, always=True)
+    @field_validator("date", mode="before")
+    @classmethod
     def _parse_date(cls, v):
-        if v is None or v == 0:
-            return None
-        if isinstance(v, datetime):
-            return v
-        try:
-            # очікуємо ціле число UNIX timestamp (секунди)
-            return datetime.fromtimestamp(int(v))
-        except Exception as e:
-            raise ValueError("date must be unix timestamp (int) or datetime") from e
+        return parse_unix_date(v)
 
 
 class Record(BaseModel):
@@ -40,16 +45,10 @@ class TacticScore(BaseModel):
     rating: int
     date: Optional[datetime] = None
 
-    @validator("date", pre=True, always=True)
+    @field_validator("date", mode="before")
+    @classmethod
     def _parse_date(cls, v):
-        if v is None or v == 0:
-            return None
-        if isinstance(v, datetime):
-            return v
-        try:
-            return datetime.fromtimestamp(int(v))
-        except Exception as e:
-            raise ValueError("date must be unix timestamp (int) or datetime") from e
+        return parse_unix_date(v)
 
 
 class Tactics(BaseModel):
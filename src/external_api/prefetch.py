@@ -0,0 +1,85 @@
+"""Keeps the cache warm for the most requested chess.com players.
+
+A background task started from the app lifespan takes the top players from `HotUsernames`
+and refreshes their cache entries shortly before they go stale.
+"""
+
+import asyncio
+import logging
+from .config import chess_com_config
+from .deps import create_chess_service
+from .exceptions import CircuitOpenError, RateLimitedError
+from .hot_usernames import HotUsernames
+from .service import ChessService
+from fastapi import FastAPI
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamBudget:
+    """Upper bound on upstream requests made by one prefetch round."""
+
+    def __init__(self, requests: int):
+        self.remaining = requests
+        self.used = 0
+        self.stopped = False
+
+    def take(self) -> bool:
+        if self.stopped or self.remaining <= 0:
+            return False
+        self.remaining -= 1
+        self.used += 1
+        return True
+
+    def refund(self) -> None:
+        self.remaining += 1
+        self.used -= 1
+
+    def stop(self) -> None:
+        self.stopped = True
+
+
+async def prefetch_round(service: ChessService, hot: HotUsernames) -> int:
+    """Refresh the hottest players and return the number of upstream requests made."""
+    await hot.decay_all()
+    usernames = await hot.top(chess_com_config.prefetch_top_n)
+
+    budget = UpstreamBudget(chess_com_config.prefetch_budget)
+    semaphore = asyncio.Semaphore(chess_com_config.prefetch_concurrency)
+
+    async def prefetch(username: str) -> None:
+        async with semaphore:
+            if budget.stopped or budget.remaining <= 0:
+                return
+            try:
+                await service.prefetch_player(username, budget, chess_com_config.prefetch_lead)
+            except (CircuitOpenError, RateLimitedError) as e:
+                # Leave chess.com alone until the next round
+                budget.stop()
+                logger.warning(f"[EXTERNAL-API][PREFETCH] chess.com unavailable, round stopped: {e}")
+            except Exception as e:
+                logger.warning(f"[EXTERNAL-API][PREFETCH] failed for username={username}: {e!r}")
+
+    await asyncio.gather(*(prefetch(username) for username in usernames))
+
+    return budget.used
+
+
+async def run_prefetcher(app: FastAPI) -> None:
+    """Run a prefetch round every `prefetch_interval` seconds; one worker per round does the work."""
+    redis = app.state.redis
+    hot = HotUsernames(redis)
+    interval = chess_com_config.prefetch_interval
+
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if not await redis.set(chess_com_config.prefetch_lock_key, 1, nx=True, px=int(interval * 1000)):
+                continue
+            requests = await prefetch_round(create_chess_service(app), hot)
+            if requests:
+                logger.info(f"[EXTERNAL-API][PREFETCH] refreshed hot players with {requests} upstream requests")
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("[EXTERNAL-API][PREFETCH] prefetch round failed")
@@ -0,0 +1,125 @@
+"""Token-bucket rate limiting of upstream calls, shared by all workers through Redis."""
+
+import asyncio
+import email.utils
+import random
+import time
+
+# Takes a token, refilling the bucket at the current rate. The rate recovers linearly
+# towards the maximum after being lowered by a 429. Returns the seconds to wait (0 = go).
+ACQUIRE_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local max_rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local recovery = tonumber(ARGV[3])
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts', 'rate', 'blocked_until')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+local rate = tonumber(state[3]) or max_rate
+local blocked_until = tonumber(state[4]) or 0
+
+local elapsed = math.max(0, now - ts)
+rate = math.min(max_rate, rate + recovery * elapsed)
+tokens = math.min(burst, tokens + elapsed * rate)
+
+local wait = 0
+if now < blocked_until then
+    wait = blocked_until - now
+elseif tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now, 'rate', rate, 'blocked_until', blocked_until)
+redis.call('EXPIRE', KEYS[1], 3600)
+return tostring(wait)
+"""
+
+# Lowers the rate multiplicatively (at most once per second, so a burst of 429s from
+# concurrent requests counts once) and blocks every worker until Retry-After has passed.
+THROTTLED_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local max_rate = tonumber(ARGV[1])
+local min_rate = tonumber(ARGV[2])
+local factor = tonumber(ARGV[3])
+local retry_after = tonumber(ARGV[4])
+
+local state = redis.call('HMGET', KEYS[1], 'rate', 'blocked_until', 'decreased_at')
+local rate = tonumber(state[1]) or max_rate
+local blocked_until = tonumber(state[2]) or 0
+local decreased_at = tonumber(state[3]) or 0
+
+if now - decreased_at >= 1 then
+    rate = math.max(min_rate, rate * factor)
+    decreased_at = now
+end
+blocked_until = math.max(blocked_until, now + retry_after)
+
+redis.call('HSET', KEYS[1], 'rate', rate, 'blocked_until', blocked_until, 'decreased_at', decreased_at, 'tokens', 0, 'ts', now)
+redis.call('EXPIRE', KEYS[1], 3600)
+return tostring(rate)
+"""
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Parse a Retry-After header given either as seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+class UpstreamRateLimiter:
+    """Adaptive token bucket in Redis.
+
+    Every worker takes tokens from the same bucket. A 429 lowers the permitted rate by
+    `decrease_factor` and pauses all workers for Retry-After; the rate then recovers by
+    `recovery` requests/s every second until it is back at `max_rate`.
+    """
+
+    def __init__(
+        self,
+        redis_client,
+        key: str,
+        max_rate: float,
+        burst: int,
+        min_rate: float,
+        recovery: float,
+        decrease_factor: float,
+    ):
+        self.key = key
+        self.max_rate = max_rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.recovery = recovery
+        self.decrease_factor = decrease_factor
+        self._acquire = redis_client.register_script(ACQUIRE_SCRIPT)
+        self._throttled = redis_client.register_script(THROTTLED_SCRIPT)
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent upstream."""
+        while True:
+            wait = float(await self._acquire(keys=[self.key], args=[self.max_rate, self.burst, self.recovery]))
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    async def throttled(self, retry_after: float | None) -> float:
+        """Record a 429 and return the newly permitted rate."""
+        args = [self.max_rate, self.min_rate, self.decrease_factor, retry_after or 0]
+        return float(await self._throttled(keys=[self.key], args=args))
@@ -1,56 +1,87 @@
-import aiohttp
-from .models import PlayerSummary
+from .config import chess_com_config
+from .deps import get_service, track_username, track_usernames
+from .exceptions import CircuitOpenError, NotFoundError, RateLimitedError
+from .models import PlayerSummaries, PlayerSummary
 from .models.api import PlayerProfileAPI, PlayerStatsAPI
 from .service import ChessService
-from fastapi import APIRouter, Depends, HTTPException
-from src.cache import CacheService, get_cache_service
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 
 router = APIRouter(prefix="/external-api", tags=["external-api"])
 
 
-async def get_http_client():
-    async with aiohttp.ClientSession() as session:
-        yield session
+def retry_after_header(error: RateLimitedError) -> dict[str, str] | None:
+    return {"Retry-After": str(int(error.retry_after))} if error.retry_after else None
 
 
-async def get_service(
-    cache: CacheService = Depends(get_cache_service),
-    client: aiohttp.ClientSession = Depends(get_http_client),
-) -> ChessService:
-    return ChessService(client, cache)
-
-
-@router.get("/profile", response_model=PlayerProfileAPI)
+@router.get("/profile", dependencies=[Depends(track_username)], response_model=PlayerProfileAPI)
 async def get_profile(username: str, service: ChessService = Depends(get_service)):
     try:
         profile = await service.get_player_profile(username)
         return profile
+    except NotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+    except RateLimitedError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers=retry_after_header(e)) from e
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
-@router.get("/stats", response_model=PlayerStatsAPI)
+@router.get("/stats", dependencies=[Depends(track_username)], response_model=PlayerStatsAPI)
 async def get_stats(username: str, service: ChessService = Depends(get_service)):
     try:
         stats = await service.get_player_stats(username)
         return stats
+    except NotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+    except RateLimitedError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers=retry_after_header(e)) from e
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
-@router.get("/summary", response_model=PlayerSummary)
+@router.get("/summary", dependencies=[Depends(track_username)], response_model=PlayerSummary)
 async def get_summary(username: str, service: ChessService = Depends(get_service)):
     try:
-        summary = await service.get_player_summary(username)
-        return summary
+        summary_json = await service.get_player_summary_json(username)
+        return Response(content=summary_json, media_type="application/json")
+    except NotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+    except RateLimitedError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers=retry_after_header(e)) from e
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
+@router.get("/summaries", dependencies=[Depends(track_usernames)], response_model=PlayerSummaries)
+async def get_summaries(
+    usernames: list[str] = Query(..., min_length=1, max_length=chess_com_config.summaries_max_usernames),
+    service: ChessService = Depends(get_service),
+):
+    return await service.get_player_summaries(usernames)
+
+
 @router.get("/users-by-title", response_model=list[str])
 async def get_users_by_title(title_abbrev: str, service: ChessService = Depends(get_service)):
     try:
         users = await service.get_users_by_title(title_abbrev)
         return users
+    except NotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+    except RateLimitedError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers=retry_after_header(e)) from e
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
+
+
+@router.post("/invalidate", summary="Drop every cached chess.com payload for a player")
+async def invalidate_player(username: str, service: ChessService = Depends(get_service)):
+    await service.invalidate_player(username)
+    return {"status": "invalidated", "username": username}
@@ -1,8 +1,30 @@
 import aiohttp
+import asyncio
+import logging
+from .circuit_breaker import CircuitBreaker
 from .config import chess_com_config
-from .models import PlayerSummary
-from .models.api import PlayerProfileAPI, PlayerStatsAPI, TitlePlayersListAPI
-from src.cache import CacheService
+from .exceptions import ChessComError, CircuitOpenError, NotFoundError, RateLimitedError
+from .models import PlayerSummaries, PlayerSummary, PlayerSummaryError
+from .models.api import GameArchivesAPI, PlayerProfileAPI, PlayerStatsAPI, TitlePlayersListAPI
+from .rate_limit import UpstreamRateLimiter, backoff_delay, parse_retry_after
+from .streaming import iter_json_array
+from contextlib import asynccontextmanager
+from fastapi import BackgroundTasks
+from pydantic import BaseModel
+from src.cache import CachedValue, CacheService, NotModified, cached, invalidate_tags, previous_meta
+from src.cache.singleflight import SingleFlight
+from typing import TYPE_CHECKING, Any, AsyncIterator, TypeVar
+
+if TYPE_CHECKING:
+    from .prefetch import UpstreamBudget
+
+logger = logging.getLogger(__name__)
+
+CACHE_NAMESPACE = "chess_com"
+
+RETRY_STATUSES = {429, 502, 503, 504}
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
 
 
 class ChessService:
@@ -11,62 +33,280 @@ class ChessService:
     api_url = chess_com_config.api_base_url
     url = chess_com_config.web_base_url
 
-    default_headers = {
-        "Host": chess_com_config.api_host,
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3",
-        "Accept": "application/json",
-        "Accept-Language": "en-US,en;q=0.9",
-        "Connection": "keep-alive",
-    }
+    flights = SingleFlight(
+        lock_ttl=chess_com_config.fetch_lock_ttl,
+        wait_timeout=chess_com_config.fetch_wait_timeout,
+    )
 
-    def __init__(self, client: aiohttp.ClientSession, cache: CacheService):
+    def __init__(
+        self,
+        client: aiohttp.ClientSession,
+        cache: CacheService,
+        background_tasks: BackgroundTasks | None = None,
+        rate_limiter: UpstreamRateLimiter | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+    ):
         self.client = client
-        self.client.headers.update(self.default_headers)
         self.cache = cache
+        self.background_tasks = background_tasks
+        self.rate_limiter = rate_limiter
+        self.circuit_breaker = circuit_breaker
 
-    async def get_player_profile(self, username) -> PlayerProfileAPI:
-        """Fetches the profile of a chess player by username."""
+    @asynccontextmanager
+    async def _circuit(self):
+        """Records the outcome of the upstream call made inside the block with the circuit breaker."""
+
+        if self.circuit_breaker is None:
+            yield
+            return
+
+        probe = await self.circuit_breaker.before_call()
+        try:
+            yield
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            # 4xx answers mean chess.com is up; only outages and 5xx count as failures
+            if isinstance(e, aiohttp.ClientResponseError) and e.status < 500:
+                await self.circuit_breaker.record_success(probe)
+            else:
+                await self.circuit_breaker.record_failure(probe)
+            raise
+        except (ChessComError, NotModified):
+            await self.circuit_breaker.record_success(probe)
+            raise
+
+        await self.circuit_breaker.record_success(probe)
+
+    async def _fetch_model(self, path: str, model: type[ModelT]) -> ModelT | CachedValue:
+        """Fetches a document from the chess.com public API through the circuit breaker."""
+
+        async with self._circuit():
+            return await self._request_model(path, model)
+
+    @asynccontextmanager
+    async def _request(self, path: str, headers: dict | None = None, **kwargs):
+        """Opens the response, retrying 429 and transient 5xx answers with backoff."""
+
+        url = f"{self.api_url}{path}"
+        max_retries = chess_com_config.max_retries
+
+        for attempt in range(max_retries + 1):
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire()
+
+            async with self.client.get(url, headers=headers or {}, **kwargs) as response:
+                if response.status == 304:
+                    raise NotModified()
+                if response.status == 404:
+                    raise NotFoundError(f"Not found on chess.com: {path}")
+
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if response.status not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    yield response
+                    return
+                if attempt == max_retries:
+                    if response.status == 429:
+                        raise RateLimitedError(f"Rate limited by chess.com: {path}", retry_after)
+                    response.raise_for_status()
+
+            if response.status == 429 and self.rate_limiter is not None:
+                rate = await self.rate_limiter.throttled(retry_after)
+                logger.warning(f"[EXTERNAL-API][RATE-LIMIT] 429 from chess.com, permitted rate lowered to {rate:.2f}/s")
+
+            delay = max(
+                retry_after or 0, backoff_delay(attempt, chess_com_config.backoff_base, chess_com_config.backoff_max)
+            )
+            await asyncio.sleep(delay)
+
+    async def _request_model(self, path: str, model: type[ModelT]) -> ModelT | CachedValue:
+        """Loads a whole JSON document and validates it as `model` straight from the raw bytes.
+
+        When revalidating a cached payload, its ETag/Last-Modified validators are sent along;
+        a 304 raises NotModified so the cached payload is kept as-is.
+        """
+
+        validators = previous_meta()
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+        async with self._request(path, headers) as response:
+            data = model.model_validate_json(await response.read())
+            etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+            if etag or last_modified:
+                return CachedValue(data, {"etag": etag, "last_modified": last_modified})
+            return data
 
-        cache_key = f"player_profile:{username}"
-        cached_profile = await self.cache.cache_get(cache_key)
-        if cached_profile:
-            return PlayerProfileAPI(**cached_profile)
+    @cached(
+        "player_profile:{username}",
+        chess_com_config.profile_ttl,
+        namespace=CACHE_NAMESPACE,
+        model=PlayerProfileAPI,
+        tags=["player:{username}"],
+        invalidates=["summary:{username}"],
+        negative_on=(NotFoundError,),
+        negative_ttl=chess_com_config.not_found_ttl,
+        flights=flights,
+    )
+    async def _get_profile(self, username: str) -> PlayerProfileAPI:
+        return await self._fetch_model(f"/pub/player/{username}", PlayerProfileAPI)
 
-        response = await self.client.get(f"{self.api_url}/pub/player/{username}")
-        response.raise_for_status()
+    @cached(
+        "player_stats:{username}",
+        chess_com_config.stats_ttl,
+        namespace=CACHE_NAMESPACE,
+        model=PlayerStatsAPI,
+        tags=["player:{username}"],
+        invalidates=["summary:{username}"],
+        negative_on=(NotFoundError,),
+        negative_ttl=chess_com_config.not_found_ttl,
+        flights=flights,
+    )
+    async def _get_stats(self, username: str) -> PlayerStatsAPI:
+        return await self._fetch_model(f"/pub/player/{username}/stats", PlayerStatsAPI)
 
-        data = await response.json()
-        await self.cache.cache_set(cache_key, data, ttl=chess_com_config.cache_ttl)  # Cache
+    @cached(
+        "titled_players:{title_abbrev}",
+        chess_com_config.titled_ttl,
+        namespace=CACHE_NAMESPACE,
+        model=TitlePlayersListAPI,
+        negative_on=(NotFoundError,),
+        negative_ttl=chess_com_config.not_found_ttl,
+        flights=flights,
+    )
+    async def _get_titled(self, title_abbrev: str) -> TitlePlayersListAPI:
+        return await self._fetch_model(f"/pub/titled/{title_abbrev}", TitlePlayersListAPI)
 
-        return PlayerProfileAPI(**data)
+    @cached(
+        "game_archives:{username}",
+        chess_com_config.archives_ttl,
+        namespace=CACHE_NAMESPACE,
+        model=GameArchivesAPI,
+        tags=["player:{username}"],
+        negative_on=(NotFoundError,),
+        negative_ttl=chess_com_config.not_found_ttl,
+        flights=flights,
+    )
+    async def _get_archives(self, username: str) -> GameArchivesAPI:
+        return await self._fetch_model(f"/pub/player/{username}/games/archives", GameArchivesAPI)
+
+    @cached(
+        "player_summary:{username}",
+        chess_com_config.summary_ttl,
+        namespace=CACHE_NAMESPACE,
+        tags=["player:{username}", "summary:{username}"],
+        negative_on=(NotFoundError,),
+        negative_ttl=chess_com_config.not_found_ttl,
+        flights=flights,
+    )
+    async def _get_summary_json(self, username: str) -> str:
+        profile, stats = await asyncio.gather(
+            self.get_player_profile(username),
+            self.get_player_stats(username),
+        )
+        return PlayerSummary.from_api_data(profile=profile, stats=stats).model_dump_json()
+
+    async def get_player_profile(self, username) -> PlayerProfileAPI:
+        """Fetches the profile of a chess player by username."""
+
+        return await self._get_profile(username)
 
     async def get_player_stats(self, username) -> PlayerStatsAPI:
         """Fetches the statistics of a chess player by username."""
 
-        cache_key = f"player_stats:{username}"
-        cached_stats = await self.cache.cache_get(cache_key)
-        if cached_stats:
-            return PlayerStatsAPI(**cached_stats)
+        return await self._get_stats(username)
 
-        response = await self.client.get(f"{self.api_url}/pub/player/{username}/stats")
-        response.raise_for_status()
+    async def get_player_summary_json(self, username) -> bytes:
+        """Fetches the summary of a chess player as serialized JSON, ready to be sent as is.
 
-        data = await response.json()
-        await self.cache.cache_set(cache_key, data, ttl=chess_com_config.cache_ttl)  # Cache
+        The summary is cached on its own and rebuilt only when the profile or stats change, so
+        a hit is one cache lookup without building any model.
+        """
 
-        return PlayerStatsAPI(**data)
+        summary_json = await self._get_summary_json(username)
+        return summary_json.encode()
 
     async def get_player_summary(self, username) -> PlayerSummary:
         """Fetches the summary of a chess player by username."""
 
-        profile = await self.get_player_profile(username)
-        stats = await self.get_player_stats(username)
+        return PlayerSummary.model_validate_json(await self.get_player_summary_json(username))
+
+    async def get_player_summaries(self, usernames: list[str]) -> PlayerSummaries:
+        """Fetches summaries for several players concurrently, reporting failures per player."""
 
-        return PlayerSummary.from_api_data(profile=profile, stats=stats)
+        usernames = list(dict.fromkeys(usernames))
+        semaphore = asyncio.Semaphore(chess_com_config.summaries_concurrency)
+
+        async def fetch(username: str) -> PlayerSummary:
+            async with semaphore:
+                return await self.get_player_summary(username)
+
+        results = await asyncio.gather(*(fetch(username) for username in usernames), return_exceptions=True)
+
+        summaries = PlayerSummaries()
+        for username, result in zip(usernames, results, strict=True):
+            if isinstance(result, NotFoundError):
+                summaries.errors.append(PlayerSummaryError(username=username, status_code=404, detail=str(result)))
+            elif isinstance(result, (RateLimitedError, CircuitOpenError)):
+                summaries.errors.append(PlayerSummaryError(username=username, status_code=503, detail=str(result)))
+            elif isinstance(result, Exception):
+                summaries.errors.append(PlayerSummaryError(username=username, status_code=500, detail=str(result)))
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                summaries.summaries.append(result)
+
+        return summaries
 
     async def get_users_by_title(self, title_abbrev: str) -> list[str]:
         """Fetches a list of usernames with a specific chess title."""
 
-        response = await self.client.get(f"{self.api_url}/pub/titled/{title_abbrev}")
-        response.raise_for_status()
-        return TitlePlayersListAPI(**await response.json()).players
+        titled = await self._get_titled(title_abbrev)
+        return titled.players
+
+    async def get_game_archives(self, username: str) -> list[tuple[int, int]]:
+        """Lists the months (year, month) for which the player has a game archive, oldest first."""
+
+        archives = await self._get_archives(username)
+        return archives.months()
+
+    async def iter_archive_games(self, username: str, year: int, month: int) -> AsyncIterator[dict[str, Any]]:
+        """Streams the raw games of one monthly archive.
+
+        Archives can be many MB, so the response is parsed while it is being received and only
+        the game being read is held in memory. Archives are not cached.
+        """
+
+        path = f"/pub/player/{username}/games/{year:04d}/{month:02d}"
+        timeout = aiohttp.ClientTimeout(
+            total=None,
+            sock_connect=chess_com_config.connect_timeout,
+            sock_read=chess_com_config.archive_read_timeout,
+        )
+
+        async with self._circuit(), self._request(path, timeout=timeout) as response:
+            chunks = response.content.iter_chunked(chess_com_config.archive_chunk_size)
+            async for game in iter_json_array(chunks, key="games"):
+                yield game
+
+    async def prefetch_player(self, username: str, budget: "UpstreamBudget", lead: float) -> None:
+        """Refreshes the player's cached payloads that go stale within `lead` seconds.
+
+        Each upstream request is taken from `budget`, and refreshing stops once it runs out.
+        The summary is rebuilt last, from the refreshed profile and stats.
+        """
+
+        for fetcher in (ChessService._get_profile, ChessService._get_stats):
+            if not budget.take():
+                return
+            if not await fetcher.prefetch(self, username, lead=lead):
+                budget.refund()
+
+        await ChessService._get_summary_json.prefetch(self, username, lead=lead)
+
+    async def invalidate_player(self, username: str) -> None:
+        """Drops every cached chess.com payload for the player."""
+
+        await invalidate_tags(self.cache, f"player:{username}")
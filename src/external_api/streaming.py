@@ -0,0 +1,123 @@
+"""Incremental parsing of large JSON documents received in chunks."""
+
+import json
+import re
+from typing import Any, AsyncIterable, AsyncIterator
+
+# Bytes that change nesting or string state; everything else is skipped without being looked at
+_STRUCTURE = re.compile(rb'["\[\]{}]')
+_STRING_END = re.compile(rb'["\\]')
+
+
+class JsonArrayStream:
+    """Yields the items of one JSON array as soon as each of them is complete.
+
+    The array is either the document itself (`key=None`) or the value of `key` in the top-level
+    object, e.g. `{"games": [...]}` with `key="games"`. Only the item being received is kept in
+    memory. Items are expected to be objects or arrays; scalars in the array are skipped.
+    """
+
+    def __init__(self, key: str | None = None):
+        self.key = key
+        self.done = False
+        self._buffer = bytearray()
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._string_start = 0
+        self._last_key: bytes | None = None
+        self._array_depth: int | None = None  # Depth inside the target array once it is found
+        self._item_start: int | None = None
+
+    def _is_target(self) -> bool:
+        if self.key is None:
+            return self._depth == 0
+        return self._depth == 1 and self._last_key is not None and json.loads(self._last_key) == self.key
+
+    def feed(self, chunk: bytes) -> list[Any]:
+        """Consume the next chunk and return the items it completed."""
+        if self.done:
+            return []
+
+        buffer = self._buffer
+        buffer += chunk
+        items = []
+        pos = self._pos
+
+        while True:
+            if self._in_string:
+                match = _STRING_END.search(buffer, pos)
+                if match is None:
+                    pos = len(buffer)
+                    break
+                if match.group() == b"\\":
+                    if match.end() >= len(buffer):
+                        # The escaped character is in the next chunk
+                        pos = match.start()
+                        break
+                    pos = match.end() + 1
+                    continue
+                pos = match.end()
+                self._in_string = False
+                if self._array_depth is None and self._depth == 1:
+                    self._last_key = bytes(buffer[self._string_start : pos])
+                continue
+
+            match = _STRUCTURE.search(buffer, pos)
+            if match is None:
+                pos = len(buffer)
+                break
+            char, pos = match.group(), match.end()
+
+            if char == b'"':
+                self._in_string = True
+                self._string_start = match.start()
+            elif char in b"[{":
+                if self._array_depth is None:
+                    if char == b"[" and self._is_target():
+                        self._array_depth = self._depth + 1
+                elif self._depth == self._array_depth:
+                    self._item_start = match.start()
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._array_depth is None:
+                    continue
+                if self._depth == self._array_depth and self._item_start is not None:
+                    items.append(json.loads(buffer[self._item_start : pos]))
+                    self._item_start = None
+                elif self._depth < self._array_depth:
+                    self.done = True
+                    break
+
+        # Drop everything that is no longer needed, keeping the partial item or string
+        keep = pos
+        if self._item_start is not None:
+            keep = min(keep, self._item_start)
+        if self._in_string and self._array_depth is None:
+            keep = min(keep, self._string_start)
+        del buffer[:keep]
+        self._pos = pos - keep
+        if self._item_start is not None:
+            self._item_start -= keep
+        if self._in_string and self._array_depth is None:
+            self._string_start -= keep
+
+        return items
+
+    def close(self) -> None:
+        """Check that the whole array was received."""
+        if not self.done:
+            target = "top-level array" if self.key is None else f"array '{self.key}'"
+            raise ValueError(f"JSON document ended before the end of the {target}")
+
+
+async def iter_json_array(chunks: AsyncIterable[bytes], key: str | None = None) -> AsyncIterator[Any]:
+    """Parse a chunked JSON document and yield the items of its array (see `JsonArrayStream`)."""
+    stream = JsonArrayStream(key)
+    async for chunk in chunks:
+        for item in stream.feed(chunk):
+            yield item
+        if stream.done:
+            return
+    stream.close()
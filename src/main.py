@@ -1,11 +1,17 @@
+import asyncio
+import contextlib
 from alembic import command
 from alembic.config import Config
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from src.cache import cache_router, init_redis
-from src.chess import chess_router
+from src.cache import cache_router, create_local_cache, init_redis, run_invalidation_listener
+from src.cache.config import redis_config
+from src.chess import chess_router, run_result_consumer
+from src.chess.config import RESULT_QUEUE_CONSUMER_ENABLED
 from src.core import health_router
-from src.external_api import external_api_router
+from src.database.connect import AsyncSessionLocal
+from src.external_api import external_api_router, init_http_client, run_prefetcher
+from src.external_api.config import chess_com_config
 from src.storage import storage_router
 from src.telemetry import init_telemetry, setup_logging
 
@@ -31,8 +37,32 @@ async def lifespan(app: FastAPI):
     except Exception:
         raise
 
+    app.state.http_client = init_http_client()
+
+    invalidation_task = None
+    app.state.local_cache = create_local_cache()
+    if app.state.local_cache is not None:
+        invalidation_task = asyncio.create_task(
+            run_invalidation_listener(redis, app.state.local_cache, redis_config.INVALIDATION_CHANNEL)
+        )
+
+    prefetch_task = None
+    if chess_com_config.prefetch_enabled:
+        prefetch_task = asyncio.create_task(run_prefetcher(app))
+
+    result_consumer_task = None
+    if RESULT_QUEUE_CONSUMER_ENABLED:
+        result_consumer_task = asyncio.create_task(run_result_consumer(app, AsyncSessionLocal))
+
     yield
 
+    for task in (result_consumer_task, prefetch_task, invalidation_task):
+        if task is not None:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+    await app.state.http_client.close()
     await app.state.redis.aclose()
 
 
@@ -0,0 +1,110 @@
+"""Fakes shared by several test modules."""
+
+import json
+from src.chess.config import GameTypes
+from src.chess.models import GameResultIn
+
+PROFILE = {
+    "player_id": 1,
+    "url": "https://www.chess.com/member/hikaru",
+    "username": "hikaru",
+    "followers": 10,
+    "status": "premium",
+}
+
+STATS = {
+    "chess_blitz": {
+        "last": {"rating": 3300, "date": 1700000000, "rd": 30},
+        "best": {"rating": 3400, "date": 1600000000, "game": "https://www.chess.com/game/live/1"},
+        "record": {"win": 10, "loss": 2, "draw": 3},
+    },
+}
+
+
+class FakeResponse:
+    def __init__(self, payload, status=200, headers=None):
+        self.payload = payload
+        self.status = status
+        self.headers = headers or {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    def raise_for_status(self):
+        pass
+
+    async def read(self):
+        return json.dumps(self.payload).encode()
+
+
+class FakeContent:
+    def __init__(self, data: bytes):
+        self.data = data
+
+    async def iter_chunked(self, size):
+        for i in range(0, len(self.data), size):
+            yield self.data[i : i + size]
+
+
+class FakeClient:
+    def __init__(self, payloads):
+        self.payloads = payloads
+        self.headers = {}
+        self.requests = []
+        self.request_headers = []
+
+    def get(self, url, headers=None, **kwargs):
+        self.requests.append(url)
+        self.request_headers.append(headers or {})
+        payload = self.payloads.get(url)
+        if isinstance(payload, list):
+            return payload.pop(0)
+        if payload is None:
+            return FakeResponse({"code": 0, "message": "User not found."}, status=404)
+        return FakeResponse(payload)
+
+
+def game(player_id, opponent_id, won=True):
+    return GameResultIn(player_id=player_id, opponent_id=opponent_id, game_type=GameTypes.BLITZ, won=won)
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+class FakeStream:
+    def __init__(self, rows):
+        self.rows = iter(rows)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self.rows)
+        except StopIteration:
+            raise StopAsyncIteration from None
+
+
+class RecordingSession:
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.statements = []
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        return FakeResult(self.rows)
+
+    async def stream_scalars(self, stmt):
+        self.statements.append(stmt)
+        return FakeStream(self.rows)
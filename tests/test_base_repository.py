@@ -0,0 +1,58 @@
+from sqlalchemy.dialects import postgresql
+from src.chess.schema import UserProfile
+from src.database.base_repository import BaseRepository
+from tests.fakes import RecordingSession
+
+
+def sql(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+async def test_first_page_has_no_cursor_condition():
+    session = RecordingSession()
+    await BaseRepository(UserProfile, session).page_after(limit=10)
+
+    query = sql(session.statements[0])
+    assert "WHERE" not in query
+    assert query.endswith("ORDER BY user_profiles.id \n LIMIT 10")
+
+
+async def test_next_page_starts_after_the_cursor_with_id_as_tie_breaker():
+    session = RecordingSession()
+    repository = BaseRepository(UserProfile, session)
+    last = UserProfile(id=7, username="magnus")
+
+    cursor = repository.cursor_of(last, order_by="username")
+    await repository.page_after(cursor, limit=10, order_by="username")
+
+    assert cursor == ("magnus", 7)
+    query = sql(session.statements[0])
+    assert "WHERE (user_profiles.username, user_profiles.id) > ('magnus', 7)" in query
+    assert "ORDER BY user_profiles.username, user_profiles.id" in query
+
+
+async def test_nullable_order_column_keeps_nulls_last_across_pages():
+    session = RecordingSession()
+    repository = BaseRepository(UserProfile, session)
+
+    await repository.page_after(("https://a.example/1.png", 3), limit=10, order_by="avatar_url")
+    cursor = repository.cursor_of(UserProfile(id=7, avatar_url=None), order_by="avatar_url")
+    await repository.page_after(cursor, limit=10, order_by="avatar_url")
+
+    before_nulls, among_nulls = (sql(stmt) for stmt in session.statements)
+    assert "ORDER BY user_profiles.avatar_url ASC NULLS LAST, user_profiles.id" in before_nulls
+    assert (
+        "WHERE (user_profiles.avatar_url, user_profiles.id) > ('https://a.example/1.png', 3)"
+        " OR user_profiles.avatar_url IS NULL" in before_nulls
+    )
+    assert "WHERE user_profiles.avatar_url IS NULL AND user_profiles.id > 7" in among_nulls
+
+
+async def test_iter_all_streams_with_yield_per():
+    profiles = [UserProfile(id=profile_id) for profile_id in range(3)]
+    session = RecordingSession(profiles)
+
+    streamed = [profile async for profile in BaseRepository(UserProfile, session).iter_all(batch_size=2)]
+
+    assert streamed == profiles
+    assert session.statements[0].get_execution_options()["yield_per"] == 2
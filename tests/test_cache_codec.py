@@ -0,0 +1,46 @@
+import json
+
+import pytest
+from src.cache import CacheService
+from src.cache.codec import CacheCodec, CodecError
+
+VALUE = {"username": "hikaru", "ratings": [3200, 3300], "premium": True, "fide": None}
+
+
+@pytest.mark.parametrize("serializer", ["json", "orjson", "msgpack"])
+def test_round_trip(serializer):
+    if serializer != "json":
+        pytest.importorskip(serializer)
+    codec = CacheCodec(serializer=serializer)
+
+    assert codec.decode(codec.encode(VALUE)) == VALUE
+
+
+def test_large_payloads_are_compressed():
+    codec = CacheCodec(serializer="json", threshold=64)
+    value = {"games": ["e4 e5 Nf3 Nc6"] * 100}
+
+    encoded = codec.encode(value)
+
+    assert encoded[2] == 1
+    assert len(encoded) < len(json.dumps(value))
+    assert codec.decode(encoded) == value
+
+
+def test_small_payloads_are_not_compressed():
+    assert CacheCodec(serializer="json", threshold=1024).encode(VALUE)[2] == 0
+
+
+def test_decodes_legacy_json_entries():
+    assert CacheCodec().decode(json.dumps(VALUE)) == VALUE
+
+
+def test_unknown_codec_is_rejected():
+    with pytest.raises(CodecError):
+        CacheCodec().decode(b"\x00\x09\x00payload")
+
+
+async def test_cache_service_treats_unreadable_entries_as_misses(fake_redis):
+    await fake_redis.set("key", b"\x00\x09\x00payload")
+
+    assert await CacheService(fake_redis).cache_get("key") is None
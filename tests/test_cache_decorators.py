@@ -0,0 +1,140 @@
+import asyncio
+
+import pytest
+from pydantic import BaseModel
+from src.cache import (
+    CacheService,
+    CacheTTL,
+    LocalCache,
+    TieredCacheService,
+    cached,
+    invalidate_namespace,
+    invalidate_tags,
+)
+from src.cache.decorators import _refresh_tasks
+
+
+class Item(BaseModel):
+    id: int
+    name: str
+
+
+class Repository:
+    def __init__(self, cache: CacheService):
+        self.cache = cache
+        self.calls = 0
+
+    @cached("item:{item_id}", 60, namespace="items", tags=["owner:{owner}"], model=Item)
+    async def get_item(self, item_id: int, owner: str = "alice") -> Item:
+        self.calls += 1
+        return Item(id=item_id, name=f"item-{self.calls}")
+
+    @cached("missing:{item_id}", 60, namespace="items")
+    async def get_missing(self, item_id: int):
+        self.calls += 1
+        return None
+
+    @cached("flaky:{item_id}", CacheTTL(soft=0, hard=0, stale_if_error=60), namespace="items")
+    async def get_flaky(self, item_id: int) -> int:
+        self.calls += 1
+        if self.calls > 1:
+            raise ConnectionError("upstream down")
+        return self.calls
+
+    @cached("slow:{item_id}", CacheTTL(soft=0, hard=60), namespace="items")
+    async def get_slow(self, item_id: int) -> int:
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return self.calls
+
+
+@pytest.fixture
+def repository(fake_redis):
+    return Repository(CacheService(fake_redis))
+
+
+async def test_results_are_cached_and_validated(repository):
+    first = await repository.get_item(1)
+    second = await repository.get_item(1)
+
+    assert isinstance(second, Item)
+    assert first == second
+    assert repository.calls == 1
+    assert await repository.cache.cache_get("items:v1:item:1") is not None
+
+
+class CountingRedis:
+    """Counts every use of the Redis client."""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = 0
+
+    def __getattr__(self, name):
+        self.calls += 1
+        return getattr(self.redis, name)
+
+
+async def test_warm_tiered_read_makes_no_redis_call(fake_redis):
+    redis = CountingRedis(fake_redis)
+    repository = Repository(TieredCacheService(redis, LocalCache(100, 30), "cache:invalidate"))
+    await repository.get_item(1)
+
+    redis.calls = 0
+    for _ in range(5):
+        await repository.get_item(1)
+    assert redis.calls == 0
+    assert repository.calls == 1
+
+    await invalidate_tags(repository.cache, "owner:alice")
+    await repository.get_item(1)
+    assert repository.calls == 2
+
+
+async def test_bumping_a_tag_invalidates_its_entries(repository):
+    await repository.get_item(1)
+    await repository.get_item(2, owner="bob")
+
+    await invalidate_tags(repository.cache, "owner:alice")
+    await repository.get_item(1)
+    await repository.get_item(2, owner="bob")
+
+    assert repository.calls == 3
+
+
+async def test_bumping_the_namespace_invalidates_everything(repository):
+    await repository.get_item(1)
+    await invalidate_namespace(repository.cache, "items")
+    await repository.get_item(1)
+
+    assert repository.calls == 2
+
+
+async def test_none_is_not_cached(repository):
+    await repository.get_missing(1)
+    await repository.get_missing(1)
+
+    assert repository.calls == 2
+
+
+async def test_concurrent_misses_are_coalesced(repository):
+    results = await asyncio.gather(*(repository.get_slow(1) for _ in range(5)))
+
+    assert results == [1] * 5
+    assert repository.calls == 1
+
+
+async def test_stale_values_are_served_while_refreshing(repository):
+    assert await repository.get_slow(1) == 1
+    assert await repository.get_slow(1) == 1
+
+    await asyncio.gather(*_refresh_tasks)
+
+    assert repository.calls == 2
+
+
+async def test_expired_value_is_served_if_recompute_fails(repository):
+    assert await repository.get_flaky(1) == 1
+    assert await repository.get_flaky(1) == 1
+
+    assert repository.calls == 2
@@ -0,0 +1,34 @@
+import pytest
+from src.cache import CacheService, get_cache_service
+from src.main import app
+
+
+@pytest.fixture
+def cache_service(fake_redis):
+    return CacheService(fake_redis)
+
+
+async def test_cache_set_many_and_get_many(cache_service, fake_redis):
+    await cache_service.cache_set_many({"a": {"x": 1}, "b": [1, 2]}, ttl=30)
+
+    values = await cache_service.cache_get_many(["a", "b", "missing"])
+
+    assert values == {"a": {"x": 1}, "b": [1, 2]}
+    assert 0 < await fake_redis.ttl("a") <= 30
+
+
+async def test_cache_get_many_empty(cache_service):
+    assert await cache_service.cache_get_many([]) == {}
+
+
+def test_mset_and_mget_routes(client, fake_redis):
+    app.dependency_overrides[get_cache_service] = lambda: CacheService(fake_redis)
+    try:
+        response = client.post("/cache/mset", json={"items": {"k1": "v1", "k2": "v2"}, "ttl": 60})
+        assert response.status_code == 200
+
+        response = client.post("/cache/mget", json={"keys": ["k1", "k2", "k3"]})
+        assert response.status_code == 200
+        assert response.json() == {"values": {"k1": "v1", "k2": "v2"}, "missing": ["k3"]}
+    finally:
+        app.dependency_overrides.pop(get_cache_service, None)
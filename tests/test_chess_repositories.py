@@ -0,0 +1,29 @@
+from sqlalchemy.dialects.postgresql import asyncpg
+from src.chess.config import RECORD_BATCH_MAX_SIZE, GameTypes
+from src.chess.repositories import UserProfileRepository, UserStatsRepository
+from tests.fakes import RecordingSession
+
+# Highest number of bind parameters asyncpg sends in one statement
+ASYNCPG_MAX_PARAMS = 32767
+
+
+def param_count(stmt) -> int:
+    return len(stmt.compile(dialect=asyncpg.dialect()).positiontup)
+
+
+async def test_largest_batch_fits_in_one_statement_each():
+    session = RecordingSession()
+    profile_ids = list(range(1, 2 * RECORD_BATCH_MAX_SIZE + 1))
+    deltas = [
+        {"profile_id": profile_id, "played": 1, "won": 1, "rating": 1216, "highest": 1216} for profile_id in profile_ids
+    ]
+
+    await UserProfileRepository(session).existing_ids(profile_ids)
+    stats_repository = UserStatsRepository(session)
+    await stats_repository.ensure_many(profile_ids, GameTypes.BLITZ)
+    await stats_repository.lock_many(profile_ids, GameTypes.BLITZ)
+    await stats_repository.apply_deltas(GameTypes.BLITZ, deltas)
+
+    assert len(session.statements) == 4
+    for stmt in session.statements:
+        assert param_count(stmt) < ASYNCPG_MAX_PARAMS
@@ -0,0 +1,72 @@
+import datetime
+import pytest
+from src.cache import get_redis
+from src.chess.models import UserProfileOut
+from src.chess.router import get_play_game_service, get_profile_service
+from src.main import app
+
+NOW = datetime.datetime(2026, 1, 1)
+
+
+def profile(profile_id, username):
+    return UserProfileOut(
+        id=profile_id,
+        created_at=NOW,
+        updated_at=NOW,
+        username=username,
+        name=username,
+        profile_url=f"https://www.chess.com/member/{username}",
+    )
+
+
+class FakeProfileService:
+    async def get_user_profile_by_username(self, username):
+        return profile(1, username)
+
+    async def get_random_user_profile(self):
+        return profile(2, "lucky")
+
+    async def get_random_user_profiles(self, count):
+        return [profile(profile_id, f"lucky{profile_id}") for profile_id in range(count)]
+
+
+@pytest.fixture
+def profile_client(client):
+    app.dependency_overrides[get_profile_service] = FakeProfileService
+    yield client
+    app.dependency_overrides.pop(get_profile_service)
+
+
+def test_random_profile_is_not_shadowed_by_username_lookup(profile_client):
+    response = profile_client.get("/chess/profiles/random")
+
+    assert response.status_code == 200
+    assert response.json()["username"] == "lucky"
+
+
+def test_random_profiles_return_count_profiles(profile_client):
+    response = profile_client.get("/chess/profiles/random/many", params={"count": 3})
+
+    assert response.status_code == 200
+    assert len(response.json()) == 3
+    assert profile_client.get("/chess/profiles/random/many", params={"count": 0}).status_code == 422
+
+
+def test_username_lookup_still_works(profile_client):
+    assert profile_client.get("/chess/profiles/magnus").json()["username"] == "magnus"
+
+
+@pytest.mark.parametrize("deferred", [False, True])
+def test_game_against_oneself_is_rejected(client, deferred):
+    app.dependency_overrides[get_play_game_service] = lambda: None
+    app.dependency_overrides[get_redis] = lambda: None
+    try:
+        response = client.post(
+            "/chess/record",
+            params={"player_id": 1, "opponent_id": 1, "game_type": "blitz", "won": True, "deferred": deferred},
+        )
+    finally:
+        app.dependency_overrides.pop(get_play_game_service)
+        app.dependency_overrides.pop(get_redis)
+
+    assert response.status_code == 422
@@ -0,0 +1,161 @@
+import json
+import pytest
+from src.cache import CacheService
+from src.cache.decorators import _refresh_tasks
+from src.external_api.config import chess_com_config
+from src.external_api.exceptions import NotFoundError, RateLimitedError
+from src.external_api.service import ChessService
+from tests.fakes import PROFILE, STATS, FakeClient, FakeContent, FakeResponse
+
+
+@pytest.fixture
+def http_client():
+    return FakeClient(
+        {
+            f"{ChessService.api_url}/pub/player/hikaru": PROFILE,
+            f"{ChessService.api_url}/pub/player/hikaru/stats": STATS,
+        }
+    )
+
+
+@pytest.fixture
+def service(http_client, fake_redis):
+    return ChessService(http_client, CacheService(fake_redis))
+
+
+async def test_profile_is_fetched_once_and_cached(service, http_client):
+    first = await service.get_player_profile("hikaru")
+    second = await service.get_player_profile("hikaru")
+
+    assert first == second
+    assert first.username == "hikaru"
+    assert len(http_client.requests) == 1
+
+
+async def test_stale_profile_is_served_and_refreshed_in_background(service, http_client):
+    await service.get_player_profile("hikaru")
+    cache_key = "chess_com:v1:player_profile:hikaru"
+    entry = await service.cache.cache_get(cache_key)
+    entry["stored_at"] -= chess_com_config.profile_ttl.soft + 1
+    await service.cache.cache_set(cache_key, entry, ttl=60)
+    http_client.payloads[f"{ChessService.api_url}/pub/player/hikaru"] = {**PROFILE, "followers": 11}
+
+    profile = await service.get_player_profile("hikaru")
+    assert profile.followers == 10
+
+    for task in list(_refresh_tasks):
+        await task
+
+    assert len(http_client.requests) == 2
+    assert (await service.get_player_profile("hikaru")).followers == 11
+
+
+async def test_stats_are_cached_as_normalized_model(service):
+    stats = await service.get_player_stats("hikaru")
+
+    entry = await service.cache.cache_get("chess_com:v1:player_stats:hikaru")
+    blitz = entry["value"]["chess_blitz"]
+    assert blitz["last"]["date"] == stats.chess_blitz.last.date.isoformat()
+    assert blitz["record"]["win"] == 10
+
+    assert await service.get_player_stats("hikaru") == stats
+
+
+async def test_invalidate_player_drops_cached_payloads(service, http_client):
+    await service.get_player_profile("hikaru")
+    await service.invalidate_player("hikaru")
+    await service.get_player_profile("hikaru")
+
+    assert len(http_client.requests) == 2
+
+
+async def test_unknown_username_is_cached_as_not_found(service, http_client):
+    for _ in range(3):
+        with pytest.raises(NotFoundError):
+            await service.get_player_profile("nobody")
+
+    assert len(http_client.requests) == 1
+
+
+async def test_summaries_report_failures_per_player(service):
+    result = await service.get_player_summaries(["hikaru", "nobody", "hikaru"])
+
+    assert [summary.username for summary in result.summaries] == ["hikaru"]
+    assert result.summaries[0].blitz.wins == 10
+    assert [(error.username, error.status_code) for error in result.errors] == [("nobody", 404)]
+
+
+async def test_throttled_requests_are_retried(service, http_client, mocker):
+    sleep = mocker.patch("src.external_api.service.asyncio.sleep")
+    http_client.payloads[f"{ChessService.api_url}/pub/player/hikaru"] = [
+        FakeResponse({}, status=429, headers={"Retry-After": "2"}),
+        FakeResponse(PROFILE),
+    ]
+
+    profile = await service.get_player_profile("hikaru")
+
+    assert profile.username == "hikaru"
+    assert sleep.await_args.args[0] >= 2
+
+
+async def test_rate_limited_after_retries_are_exhausted(service, http_client, mocker):
+    mocker.patch("src.external_api.service.asyncio.sleep")
+    retries = chess_com_config.max_retries
+    http_client.payloads[f"{ChessService.api_url}/pub/player/hikaru"] = [
+        FakeResponse({}, status=429) for _ in range(retries + 1)
+    ]
+
+    with pytest.raises(RateLimitedError):
+        await service.get_player_profile("hikaru")
+
+
+async def test_stale_payload_is_revalidated_with_etag(service, http_client):
+    url = f"{ChessService.api_url}/pub/player/hikaru"
+    http_client.payloads[url] = [
+        FakeResponse(PROFILE, headers={"ETag": '"v1"'}),
+        FakeResponse(None, status=304),
+    ]
+    await service.get_player_profile("hikaru")
+    cache_key = "chess_com:v1:player_profile:hikaru"
+    entry = await service.cache.cache_get(cache_key)
+    entry["stored_at"] -= chess_com_config.profile_ttl.hard + 1
+    await service.cache.cache_set(cache_key, entry, ttl=60)
+
+    profile = await service.get_player_profile("hikaru")
+
+    assert profile.username == "hikaru"
+    assert http_client.request_headers[-1] == {"If-None-Match": '"v1"'}
+    refreshed = await service.cache.cache_get(cache_key)
+    assert refreshed["meta"]["etag"] == '"v1"'
+    assert refreshed["stored_at"] > entry["stored_at"]
+
+
+async def test_archive_games_are_streamed(service, http_client, monkeypatch):
+    monkeypatch.setattr(chess_com_config, "archive_chunk_size", 16)
+    games = [{"url": f"https://www.chess.com/game/live/{i}", "end_time": 1700000000} for i in range(5)]
+    response = FakeResponse(None)
+    response.content = FakeContent(json.dumps({"games": games}).encode())
+    http_client.payloads[f"{ChessService.api_url}/pub/player/hikaru/games/2024/01"] = [response]
+    http_client.payloads[f"{ChessService.api_url}/pub/player/hikaru/games/archives"] = {
+        "archives": [f"{ChessService.api_url}/pub/player/hikaru/games/2024/01"]
+    }
+
+    assert await service.get_game_archives("hikaru") == [(2024, 1)]
+    assert [game async for game in service.iter_archive_games("hikaru", 2024, 1)] == games
+
+
+async def test_summary_is_cached_as_json_and_rebuilt_when_profile_changes(service, http_client):
+    first = await service.get_player_summary_json("hikaru")
+    assert await service.get_player_summary_json("hikaru") == first
+    assert json.loads(first)["blitz"]["wins"] == 10
+    assert len(http_client.requests) == 2
+
+    cache_key = "chess_com:v1:player_profile:hikaru"
+    entry = await service.cache.cache_get(cache_key)
+    entry["stored_at"] -= chess_com_config.profile_ttl.hard + 1
+    await service.cache.cache_set(cache_key, entry, ttl=60)
+    http_client.payloads[f"{ChessService.api_url}/pub/player/hikaru"] = {**PROFILE, "followers": 11}
+    await service.get_player_profile("hikaru")
+
+    summary = await service.get_player_summary("hikaru")
+    assert summary.followers == 11
@@ -0,0 +1,56 @@
+import pytest
+from src.external_api.circuit_breaker import CircuitBreaker, CircuitState
+from src.external_api.exceptions import CircuitOpenError
+
+
+@pytest.fixture
+def breaker(fake_redis):
+    return CircuitBreaker(
+        fake_redis,
+        key="circuit:test",
+        failure_threshold=3,
+        failure_window=30,
+        reset_timeout=30,
+        probe_timeout=10,
+    )
+
+
+async def trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        await breaker.record_failure(probe=await breaker.before_call())
+
+
+async def test_opens_after_threshold_failures(breaker):
+    await trip(breaker)
+
+    assert await breaker.state() == CircuitState.OPEN
+    with pytest.raises(CircuitOpenError):
+        await breaker.before_call()
+
+
+async def test_half_open_allows_a_single_probe(breaker, fake_redis):
+    await trip(breaker)
+    await fake_redis.delete("circuit:test:open")  # reset timeout elapsed
+
+    assert await breaker.before_call() is True
+    with pytest.raises(CircuitOpenError):
+        await breaker.before_call()
+
+
+async def test_successful_probe_closes_the_circuit(breaker, fake_redis):
+    await trip(breaker)
+    await fake_redis.delete("circuit:test:open")
+
+    await breaker.record_success(probe=await breaker.before_call())
+
+    assert await breaker.state() == CircuitState.CLOSED
+    assert await breaker.before_call() is False
+
+
+async def test_failed_probe_reopens_the_circuit(breaker, fake_redis):
+    await trip(breaker)
+    await fake_redis.delete("circuit:test:open")
+
+    await breaker.record_failure(probe=await breaker.before_call())
+
+    assert await breaker.state() == CircuitState.OPEN
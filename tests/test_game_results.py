@@ -0,0 +1,35 @@
+import pytest
+from pydantic import ValidationError
+from src.chess.services import calculate_elo_change, replay_game_results
+from tests.fakes import game
+
+
+def test_replay_matches_recording_games_one_by_one():
+    games = [game(1, 2), game(2, 3), game(1, 3, won=False), game(3, 2)]
+    ratings = {1: 1200, 2: 1400, 3: 1300}
+
+    expected = dict(ratings)
+    for g in games:
+        expected[g.player_id], expected[g.opponent_id] = calculate_elo_change(
+            expected[g.player_id], expected[g.opponent_id], g.won
+        )
+
+    deltas = {delta["profile_id"]: delta for delta in replay_game_results(games, ratings)}
+
+    assert {profile_id: delta["rating"] for profile_id, delta in deltas.items()} == expected
+    assert deltas[1]["played"] == 2 and deltas[1]["won"] == 1
+    assert deltas[2]["played"] == 3 and deltas[2]["won"] == 1
+    assert deltas[3]["played"] == 3 and deltas[3]["won"] == 2
+
+
+def test_replay_tracks_highest_rating_reached():
+    deltas = replay_game_results([game(1, 2), game(1, 2, won=False)], {1: 1200, 2: 1200})
+    player = next(delta for delta in deltas if delta["profile_id"] == 1)
+
+    assert player["highest"] == 1216
+    assert player["rating"] < player["highest"]
+
+
+def test_game_against_oneself_is_rejected():
+    with pytest.raises(ValidationError):
+        game(1, 1)
@@ -0,0 +1,245 @@
+import pytest
+from contextlib import asynccontextmanager
+from src.cache import CacheService
+from src.chess.config import GameTypes
+from src.chess.ingestion import GameIngestionPipeline, IngestionJobStore, PlayerIngestionPipeline, stats_rows
+from src.chess.models import IngestionKind, IngestionStatus
+from src.external_api.exceptions import CircuitOpenError, NotFoundError
+from src.external_api.models.api import PlayerProfileAPI, PlayerStatsAPI
+
+
+class FakeChessService:
+    def __init__(self, missing=(), unavailable=(), archives=None):
+        self.missing = set(missing)
+        self.unavailable = set(unavailable)
+        self.archives = archives or {}
+
+    async def get_player_profile(self, username):
+        if username in self.unavailable:
+            raise CircuitOpenError("circuit is open")
+        if username in self.missing:
+            raise NotFoundError(username)
+        # chess.com matches usernames case-insensitively and answers in lowercase
+        return PlayerProfileAPI(player_id=1, url=f"https://www.chess.com/member/{username}", username=username.lower())
+
+    async def get_player_stats(self, username):
+        return PlayerStatsAPI()
+
+    async def get_game_archives(self, username):
+        if username in self.missing:
+            raise NotFoundError(username)
+        return sorted(self.archives.get(username, {}))
+
+    async def iter_archive_games(self, username, year, month):
+        for game in self.archives[username][(year, month)]:
+            yield game
+
+
+def game(url, white="a", black="b"):
+    return {
+        "url": url,
+        "end_time": 1700000000,
+        "time_class": "blitz",
+        "white": {"username": white, "rating": 2000, "result": "win"},
+        "black": {"username": black, "rating": 1900, "result": "resigned"},
+    }
+
+
+class RecordingPipeline(PlayerIngestionPipeline):
+    def __init__(self, chess_service, store):
+        super().__init__(chess_service, session_factory=None, store=store, cache=None)
+        self.saved = []
+
+    async def _save(self, players):
+        self.saved.extend(profile.username for profile, _ in players)
+
+
+@pytest.fixture
+def store(fake_redis):
+    return IngestionJobStore(fake_redis)
+
+
+def test_stats_rows_maps_played_modes():
+    stats = PlayerStatsAPI(
+        chess_blitz={
+            "last": {"rating": 2500},
+            "best": {"rating": 2600},
+            "record": {"win": 10, "loss": 5, "draw": 2},
+        },
+        chess_rapid={"last": {"rating": 2400}},
+    )
+
+    rows = {row["game_type"]: row for row in stats_rows(7, stats)}
+
+    assert set(rows) == {GameTypes.BLITZ, GameTypes.RAPID}
+    assert rows[GameTypes.BLITZ] == {
+        "profile_id": 7,
+        "game_type": GameTypes.BLITZ,
+        "games_played": 17,
+        "games_won": 10,
+        "current_rating": 2500,
+        "highest_rating": 2600,
+    }
+    assert rows[GameTypes.RAPID]["highest_rating"] == 2400
+
+
+async def test_job_records_failed_players(store):
+    job_id = await store.create(["a", "b", "b", "c"], title="GM")
+    pipeline = RecordingPipeline(FakeChessService(missing={"b"}), store)
+
+    await pipeline.run(job_id)
+
+    job = await store.get(job_id)
+    assert job.status == IngestionStatus.COMPLETED
+    assert (job.total, job.processed, job.imported, job.failed) == (3, 3, 2, 1)
+    assert job.failed_usernames == ["b"]
+    assert pipeline.saved == ["a", "c"]
+
+
+async def test_unavailable_upstream_stops_the_job_and_resume_continues(store):
+    job_id = await store.create(["a", "b", "c", "d"])
+
+    pipeline = RecordingPipeline(FakeChessService(unavailable={"c"}), store)
+    pipeline.batch_size = 2
+    await pipeline.run(job_id)
+
+    job = await store.get(job_id)
+    assert job.status == IngestionStatus.FAILED
+    assert job.processed == 2
+    assert pipeline.saved == ["a", "b"]
+
+    pipeline = RecordingPipeline(FakeChessService(), store)
+    await pipeline.run(job_id)
+
+    job = await store.get(job_id)
+    assert job.status == IngestionStatus.COMPLETED
+    assert job.error is None
+    assert (job.processed, job.imported) == (4, 4)
+    assert pipeline.saved == ["c", "d"]
+
+
+async def test_running_job_is_not_started_twice(store):
+    job_id = await store.create(["a"])
+    assert await store.acquire(job_id)
+
+    pipeline = RecordingPipeline(FakeChessService(), store)
+    await pipeline.run(job_id)
+
+    assert pipeline.saved == []
+    assert (await store.get(job_id)).processed == 0
+
+
+async def test_lock_is_only_released_by_its_owner(store, fake_redis):
+    job_id = await store.create(["a"])
+    stale = await store.acquire(job_id)
+    await fake_redis.delete(f"ingest:{job_id}:lock")  # Expired while the first worker was stuck
+    owner = await store.acquire(job_id)
+
+    await store.release(job_id, stale)
+    assert await store.acquire(job_id) is None
+
+    await store.release(job_id, owner)
+    assert await store.acquire(job_id) is not None
+
+
+async def test_finished_job_expires_until_resumed(store, fake_redis):
+    job_id = await store.create(["a", "b"])
+    key = f"ingest:{job_id}"
+
+    pipeline = RecordingPipeline(FakeChessService(missing={"b"}), store)
+    await pipeline.run(job_id)
+
+    for state_key in (key, f"{key}:usernames", f"{key}:failed"):
+        assert await fake_redis.ttl(state_key) > 0
+
+    await store.set_status(job_id, IngestionStatus.RUNNING)
+    assert await fake_redis.ttl(key) == -1
+
+
+class FakeSession:
+    @asynccontextmanager
+    async def begin(self):
+        yield
+
+
+@asynccontextmanager
+async def fake_session_factory():
+    yield FakeSession()
+
+
+class FakeProfileRepository:
+    def __init__(self, session):
+        pass
+
+    async def upsert_many(self, rows):
+        usernames = [row["username"] for row in rows]
+        # Postgres rejects an upsert that touches the same row twice
+        assert len(usernames) == len(set(usernames))
+        return {username: profile_id for profile_id, username in enumerate(usernames, start=1)}
+
+
+class FakeStatsRepository:
+    def __init__(self, session):
+        pass
+
+    async def upsert_many(self, rows):
+        pass
+
+
+async def test_saved_players_invalidate_their_cached_reads(store, fake_redis, monkeypatch):
+    monkeypatch.setattr("src.chess.ingestion.UserProfileRepository", FakeProfileRepository)
+    monkeypatch.setattr("src.chess.ingestion.UserStatsRepository", FakeStatsRepository)
+    job_id = await store.create(["a", "b"])
+    pipeline = PlayerIngestionPipeline(FakeChessService(), fake_session_factory, store, CacheService(fake_redis))
+
+    await pipeline.run(job_id)
+
+    assert await fake_redis.mget("tag:profile:1", "tag:profile:2") == [b"1", b"1"]
+    assert await fake_redis.mget("tag:profile_username:a", "tag:profile_username:b") == [b"1", b"1"]
+
+
+async def test_usernames_differing_in_case_are_one_player(store, fake_redis, monkeypatch):
+    monkeypatch.setattr("src.chess.ingestion.UserProfileRepository", FakeProfileRepository)
+    monkeypatch.setattr("src.chess.ingestion.UserStatsRepository", FakeStatsRepository)
+    chess_service = FakeChessService()
+    pipeline = PlayerIngestionPipeline(chess_service, fake_session_factory, store, CacheService(fake_redis))
+
+    assert await store.usernames(await store.create(["Hikaru", "hikaru"]), 0, 10) == ["hikaru"]
+
+    # Jobs created before usernames were lowercased can still hold both spellings
+    players = [await pipeline._fetch(username) for username in ("Hikaru", "hikaru")]
+    await pipeline._save(players)
+    assert await fake_redis.get("tag:profile_username:hikaru") == b"1"
+
+
+class RecordingGamePipeline(GameIngestionPipeline):
+    def __init__(self, chess_service, store):
+        super().__init__(chess_service, session_factory=None, store=store, cache=None)
+        self.inserted = []
+
+    async def _insert(self, rows):
+        new = [row for row in rows if row["url"] not in self.inserted]
+        self.inserted.extend(row["url"] for row in new)
+        return len(new)
+
+
+async def test_game_job_imports_archives_since_month(store, monkeypatch):
+    monkeypatch.setattr("src.chess.ingestion.INGEST_GAMES_BATCH_SIZE", 2)
+    archives = {
+        "a": {
+            (2023, 12): [game("g0")],
+            (2024, 1): [game("g1"), game("g2"), game("g3")],
+            (2024, 2): [game("g4")],
+        },
+        "b": {(2024, 1): [game("g1")]},
+    }
+    job_id = await store.create(["a", "b", "c"], kind=IngestionKind.GAMES, since="2024-01")
+    pipeline = RecordingGamePipeline(FakeChessService(missing={"c"}, archives=archives), store)
+
+    await pipeline.run(job_id)
+
+    job = await store.get(job_id)
+    assert job.kind == IngestionKind.GAMES
+    assert job.status == IngestionStatus.COMPLETED
+    assert (job.processed, job.imported, job.failed_usernames) == (3, 4, ["c"])
+    assert sorted(pipeline.inserted) == ["g1", "g2", "g3", "g4"]
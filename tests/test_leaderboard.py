@@ -0,0 +1,59 @@
+import pytest
+from src.chess.config import GameTypes
+from src.chess.schema import UserStats
+from src.chess.services import UserStatsService, decode_leaderboard_cursor, encode_leaderboard_cursor
+
+
+class FakeStatsRepository:
+    """Serves rows sorted like the leaderboard index and records the keyset it was asked for."""
+
+    def __init__(self, rows):
+        self.rows = sorted(rows, key=lambda row: (-row[0].current_rating, row[0].id))
+        self.calls = []
+
+    async def leaderboard(self, game_type, limit, after=None):
+        self.calls.append(after)
+        rows = self.rows
+        if after is not None:
+            rows = [row for row in rows if (-row[0].current_rating, row[0].id) > (-after[0], after[1])]
+        return rows[:limit]
+
+
+def stats(stats_id, rating):
+    return UserStats(
+        id=stats_id,
+        profile_id=stats_id * 10,
+        game_type=GameTypes.BLITZ,
+        current_rating=rating,
+        games_played=1,
+        games_won=0,
+    )
+
+
+def test_cursor_round_trip():
+    assert decode_leaderboard_cursor(encode_leaderboard_cursor(1500, 42)) == (1500, 42)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", encode_leaderboard_cursor(1, 2)[:-1] + "!"])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_leaderboard_cursor(cursor)
+
+
+async def test_pages_follow_the_cursor_until_the_last_page():
+    ratings = {1: 1500, 2: 1600, 3: 1500, 4: 1400, 5: 1500}
+    service = UserStatsService(session=None, cache=None)
+    service.stats_repository = FakeStatsRepository(
+        [(stats(stats_id, rating), f"user{stats_id}") for stats_id, rating in ratings.items()]
+    )
+
+    seen, cursor = [], None
+    while True:
+        page = await service.get_leaderboard(GameTypes.BLITZ, limit=2, cursor=cursor)
+        seen.extend(entry.username for entry in page.entries)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert seen == ["user2", "user1", "user3", "user5", "user4"]
+    assert service.stats_repository.calls == [None, (1500, 1), (1500, 5)]
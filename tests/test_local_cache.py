@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+from src.cache import CacheService, LocalCache, TieredCacheService, run_invalidation_listener
+
+CHANNEL = "cache:invalidate"
+
+
+def test_local_cache_evicts_least_recently_used():
+    cache = LocalCache(max_size=2, max_ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b", None) is None
+    assert cache.get("c") == 3
+
+
+def test_local_cache_ttl_is_capped(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("src.cache.local.time.monotonic", lambda: now[0])
+    cache = LocalCache(max_size=10, max_ttl=5)
+    cache.set("a", 1, ttl=60)
+
+    now[0] += 6
+
+    assert cache.get("a", None) is None
+
+
+async def test_tiered_cache_reads_from_local_layer(fake_redis):
+    service = TieredCacheService(fake_redis, LocalCache(100, 30), CHANNEL)
+    await service.cache_set("key", {"value": 1}, ttl=60)
+    await fake_redis.delete("key")
+
+    assert await service.cache_get("key") == {"value": 1}
+
+
+async def test_tiered_cache_populates_local_layer_on_miss(fake_redis):
+    await CacheService(fake_redis).cache_set_many({"a": 1, "b": 2}, ttl=60)
+    local = LocalCache(100, 30)
+    service = TieredCacheService(fake_redis, local, CHANNEL)
+
+    assert await service.cache_get_many(["a", "b", "c"]) == {"a": 1, "b": 2}
+    assert local.get("a") == 1
+
+
+@pytest.mark.parametrize("operation", ["set", "delete"])
+async def test_writes_invalidate_other_workers(fake_redis, operation):
+    writer = TieredCacheService(fake_redis, LocalCache(100, 30), CHANNEL)
+    reader_local = LocalCache(100, 30)
+    reader_local.set("key", "stale")
+    listener = asyncio.create_task(run_invalidation_listener(fake_redis, reader_local, CHANNEL))
+    await asyncio.sleep(0.05)
+
+    if operation == "set":
+        await writer.cache_set("key", "fresh", ttl=60)
+    else:
+        await writer.cache_delete("key")
+    await asyncio.sleep(0.05)
+    listener.cancel()
+
+    assert reader_local.get("key", None) is None
+
+
+async def test_malformed_invalidation_messages_are_skipped(fake_redis):
+    reader_local = LocalCache(100, 30)
+    reader_local.set("key", "stale")
+    listener = asyncio.create_task(run_invalidation_listener(fake_redis, reader_local, CHANNEL))
+    await asyncio.sleep(0.05)
+
+    for data in ("not json", "[1, 2]", '{"keys": 5}'):
+        await fake_redis.publish(CHANNEL, data)
+    await TieredCacheService(fake_redis, LocalCache(100, 30), CHANNEL).cache_delete("key")
+    await asyncio.sleep(0.05)
+
+    assert not listener.done()
+    listener.cancel()
+    assert reader_local.get("key", None) is None
@@ -0,0 +1,92 @@
+import time
+
+import pytest
+from src.cache import CacheService
+from src.external_api.config import chess_com_config
+from src.external_api.deps import get_service
+from src.external_api.hot_usernames import HotUsernames
+from src.external_api.prefetch import prefetch_round
+from src.external_api.service import ChessService
+from tests.fakes import PROFILE, STATS, FakeClient
+
+USERNAMES = ["hikaru", "magnus", "fabiano"]
+
+
+@pytest.fixture
+def http_client():
+    payloads = {}
+    for username in USERNAMES:
+        payloads[f"{ChessService.api_url}/pub/player/{username}"] = {**PROFILE, "username": username}
+        payloads[f"{ChessService.api_url}/pub/player/{username}/stats"] = STATS
+    return FakeClient(payloads)
+
+
+@pytest.fixture
+def service(http_client, fake_redis):
+    return ChessService(http_client, CacheService(fake_redis))
+
+
+@pytest.fixture
+def hot(fake_redis):
+    return HotUsernames(fake_redis, key="hot:test", decay=0.5, max_size=2)
+
+
+async def age_entries(service, username, seconds):
+    for name in ("player_profile", "player_stats", "player_summary"):
+        key = f"chess_com:v1:{name}:{username}"
+        entry = await service.cache.cache_get(key)
+        entry["stored_at"] -= seconds
+        await service.cache.cache_set(key, entry, ttl=600)
+
+
+async def test_hot_usernames_are_ranked_and_trimmed(hot):
+    await hot.record("magnus", "hikaru", "hikaru")
+    await hot.record("fabiano")
+    await hot.decay_all()
+
+    assert await hot.top(10) == ["hikaru", "magnus"]
+    assert await hot.redis.zscore("hot:test", "hikaru") == 1.0
+
+
+async def test_round_refreshes_entries_about_to_go_stale(service, http_client, hot, fake_redis):
+    for username in USERNAMES:
+        await service.get_player_summary(username)
+    await hot.record("hikaru", "hikaru", "magnus")
+    await age_entries(service, "hikaru", chess_com_config.profile_ttl.soft - chess_com_config.prefetch_lead / 2)
+    http_client.requests.clear()
+
+    requests = await prefetch_round(service, hot)
+
+    assert requests == 2
+    assert sorted(http_client.requests) == [
+        f"{ChessService.api_url}/pub/player/hikaru",
+        f"{ChessService.api_url}/pub/player/hikaru/stats",
+    ]
+    entry = await service.cache.cache_get("chess_com:v1:player_summary:hikaru")
+    assert time.time() - entry["stored_at"] < 5
+
+
+async def test_round_stays_within_budget(service, http_client, hot, monkeypatch):
+    monkeypatch.setattr(chess_com_config, "prefetch_budget", 3)
+    await hot.record("hikaru", "magnus")
+
+    requests = await prefetch_round(service, hot)
+
+    assert requests == 3
+    assert len(http_client.requests) == 3
+
+
+def test_rejected_summaries_request_records_no_username(client, monkeypatch):
+    recorded = []
+
+    async def record_usernames(request, *usernames):
+        recorded.extend(usernames)
+
+    monkeypatch.setattr("src.external_api.deps.record_usernames", record_usernames)
+    monkeypatch.setitem(client.app.dependency_overrides, get_service, lambda: None)
+    usernames = [f"player{i}" for i in range(chess_com_config.summaries_max_usernames + 1)]
+
+    response = client.get("/external-api/summaries", params={"usernames": usernames})
+
+    assert response.status_code == 422
+    assert recorded == []
@@ -0,0 +1,67 @@
+import pytest
+from src.chess.config import GameTypes
+from src.chess.ranking import RankingService
+
+BLITZ = GameTypes.BLITZ
+
+
+@pytest.fixture
+def ranking(fake_redis):
+    return RankingService(fake_redis, prefix="ranks:test")
+
+
+async def test_equal_ratings_share_a_rank(ranking):
+    await ranking.update(BLITZ, {1: 1500, 2: 1600, 3: 1500, 4: 1400})
+
+    ranks = {profile_id: await ranking.rank(BLITZ, profile_id) for profile_id in (1, 2, 3, 4)}
+
+    assert {profile_id: rank.rank for profile_id, rank in ranks.items()} == {1: 2, 2: 1, 3: 2, 4: 4}
+    assert ranks[2].percentile == 75.0
+    assert ranks[1].percentile == ranks[3].percentile == 25.0
+    assert ranks[4].percentile == 0.0
+    assert ranks[1].total == 4
+    assert await ranking.rank(BLITZ, 5) is None
+    assert await ranking.rank(GameTypes.RAPID, 1) is None
+
+
+async def test_neighbourhood_is_centred_on_the_player(ranking):
+    await ranking.update(BLITZ, {profile_id: 1000 + 10 * profile_id for profile_id in range(1, 11)})
+    await ranking.update(BLITZ, {4: 1060})  # Ties with player 6
+
+    players = await ranking.around(BLITZ, 3, radius=2)
+
+    assert [(player.profile_id, player.rank) for player in players] == [(4, 5), (5, 7), (3, 8), (2, 9), (1, 10)]
+    assert [player.profile_id for player in await ranking.around(BLITZ, 10, radius=1)] == [10, 9]
+    assert await ranking.around(BLITZ, 11, radius=1) is None
+
+
+class FakeStatsRepository:
+    batches = []
+    during_rebuild = None
+
+    def __init__(self, session):
+        pass
+
+    async def iter_ratings(self, game_type, batch_size):
+        for index, batch in enumerate(self.batches):
+            if index == 1:
+                await self.during_rebuild()
+            yield batch
+
+
+async def test_rebuild_replaces_the_set_and_keeps_ratings_written_meanwhile(ranking, monkeypatch):
+    await ranking.update(BLITZ, {1: 1000, 99: 2000})
+
+    async def play():
+        # Player 1 was already streamed, player 3 not yet
+        await ranking.update(BLITZ, {1: 1550, 3: 1700})
+
+    FakeStatsRepository.batches = [[(1, 1500), (2, 1600)], [(3, 1650)]]
+    FakeStatsRepository.during_rebuild = staticmethod(play)
+    monkeypatch.setattr("src.chess.ranking.UserStatsRepository", FakeStatsRepository)
+
+    assert await ranking.rebuild(session=None, game_type=BLITZ) == 3
+
+    ratings = await ranking.redis.zrange("ranks:test:blitz", 0, -1, withscores=True)
+    assert {int(member): int(score) for member, score in ratings} == {1: 1550, 2: 1600, 3: 1700}
+    assert not await ranking.redis.exists("ranks:test:blitz:rebuild", "ranks:test:blitz:rebuilding")
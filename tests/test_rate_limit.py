@@ -0,0 +1,35 @@
+import pytest
+from src.external_api.rate_limit import UpstreamRateLimiter, parse_retry_after
+
+
+@pytest.fixture
+def limiter(fake_redis):
+    return UpstreamRateLimiter(
+        fake_redis,
+        key="ratelimit:test",
+        max_rate=10,
+        burst=2,
+        min_rate=1,
+        recovery=0.1,
+        decrease_factor=0.5,
+    )
+
+
+async def test_burst_is_served_without_waiting(limiter, mocker):
+    sleep = mocker.patch("src.external_api.rate_limit.asyncio.sleep")
+
+    await limiter.acquire()
+    await limiter.acquire()
+
+    sleep.assert_not_awaited()
+
+
+async def test_throttling_lowers_rate_once_per_burst_of_429s(limiter):
+    assert await limiter.throttled(None) == 5
+    assert await limiter.throttled(None) == 5
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
@@ -0,0 +1,124 @@
+import pytest
+import random
+from src.chess.config import GameTypes
+from src.chess.rating_replay import IncompleteHistoryError, RatingReplay, replay_ratings, schedule_waves
+from src.chess.services import replay_game_results
+from tests.fakes import game
+
+
+def history(count, players=50, seed=1):
+    rng = random.Random(seed)
+    rows = []
+    for game_id in range(1, count + 1):
+        player_id, opponent_id = rng.sample(range(1, players + 1), 2)
+        rows.append((game_id, player_id, opponent_id, rng.random() < 0.5))
+    return rows
+
+
+def test_waves_keep_each_players_games_in_order():
+    rows = history(500)
+    waves = schedule_waves([row[1] for row in rows], [row[2] for row in rows])
+
+    seen: dict[int, int] = {}
+    for (_, player_id, opponent_id, _), wave in zip(rows, waves, strict=True):
+        assert wave > seen.get(player_id, -1) and wave > seen.get(opponent_id, -1)
+        seen[player_id] = seen[opponent_id] = wave
+
+
+def test_replay_matches_recording_games_one_by_one():
+    rows = history(300)
+    replay = RatingReplay(vectorized=False)
+    replay.feed(rows)
+    stats = replay.results()
+
+    games = [game(player_id, opponent_id, won) for _, player_id, opponent_id, won in rows]
+    players = {profile_id for row in rows for profile_id in row[1:3]}
+    expected = {d["profile_id"]: d for d in replay_game_results(games, dict.fromkeys(players, 1200))}
+
+    for profile_id, played, won, rating, highest in zip(*stats.values(), strict=True):
+        delta = expected[profile_id]
+        assert (played, won, rating, highest) == (delta["played"], delta["won"], delta["rating"], delta["highest"])
+
+
+def test_vectorized_replay_matches_sequential_replay_across_chunks():
+    rows = history(5000, players=300)
+    sequential = RatingReplay(vectorized=False)
+    sequential.feed(rows)
+
+    vectorized = RatingReplay(vectorized=True)
+    for start in range(0, len(rows), 777):
+        vectorized.feed(rows[start : start + 777])
+
+    assert vectorized.results() == sequential.results()
+
+
+class FakeSession:
+    def __init__(self):
+        self.committed = False
+
+    async def commit(self):
+        self.committed = True
+
+    async def rollback(self):
+        pass
+
+
+class FakeResultRepository:
+    def __init__(self, session, rows):
+        self.rows = rows
+
+    async def lock_history(self):
+        pass
+
+    async def history(self, game_type, after_id, limit):
+        return [row for row in self.rows if row[0] > after_id][:limit]
+
+
+class FakeStatsRepository:
+    """Holds stored `games_played` counts and records the stats written by the replay."""
+
+    def __init__(self, session, played):
+        self.played = played
+        self.replaced = None
+
+    async def played_beyond(self, game_type, stats):
+        return [
+            profile_id
+            for profile_id, played in zip(stats["profile_id"], stats["games_played"], strict=True)
+            if self.played.get(profile_id, 0) > played
+        ]
+
+    async def replace_many(self, game_type, stats):
+        self.replaced = stats
+
+
+@pytest.fixture
+def repositories(monkeypatch):
+    rows = [(1, 1, 2, True), (2, 2, 3, False)]
+    # Player 3 has games from before game_results existed
+    stats_repository = FakeStatsRepository(None, {1: 1, 2: 2, 3: 5})
+    monkeypatch.setattr(
+        "src.chess.rating_replay.GameResultRepository", lambda session: FakeResultRepository(session, rows)
+    )
+    monkeypatch.setattr("src.chess.rating_replay.UserStatsRepository", lambda session: stats_repository)
+    return stats_repository
+
+
+async def test_replay_refuses_to_drop_games_missing_from_the_history(repositories):
+    session = FakeSession()
+
+    with pytest.raises(IncompleteHistoryError) as error:
+        await replay_ratings(session, GameTypes.BLITZ)
+
+    assert error.value.profile_ids == [3]
+    assert repositories.replaced is None
+    assert not session.committed
+
+
+async def test_forced_replay_overwrites_incomplete_players(repositories):
+    session = FakeSession()
+
+    assert await replay_ratings(session, GameTypes.BLITZ, force=True) == 3
+
+    assert repositories.replaced["profile_id"] == [1, 2, 3]
+    assert session.committed
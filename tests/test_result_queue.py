@@ -0,0 +1,84 @@
+import pytest
+from src.cache import CacheService
+from src.chess.config import GameTypes
+from src.chess.models import GameResultIn
+from src.chess.result_queue import GameResultQueue
+from src.chess.services import PlayGameService
+
+GAME = GameResultIn(player_id=1, opponent_id=2, game_type=GameTypes.BLITZ, won=True)
+
+
+@pytest.fixture
+async def queue(fake_redis):
+    queue = GameResultQueue(fake_redis, stream="results:test", group="test")
+    await queue.ensure_group()
+    return queue
+
+
+async def test_results_are_read_once_and_removed_on_ack(queue):
+    key = await queue.enqueue(GAME, "game-1")
+
+    batch = await queue.read("worker-1")
+    assert [(result_key, game) for _, result_key, game in batch] == [(key, GAME)]
+    assert await queue.read("worker-2") == []
+
+    await queue.ack([entry_id for entry_id, _, _ in batch])
+    assert await queue.redis.xlen("results:test") == 0
+
+
+async def test_unacknowledged_results_are_claimed_by_another_consumer(queue, monkeypatch):
+    monkeypatch.setattr("src.chess.result_queue.RESULT_QUEUE_CLAIM_IDLE_MS", 0)
+    await queue.enqueue(GAME)
+    await queue.read("worker-1")
+
+    claimed = await queue.claim_stale("worker-2")
+
+    assert [game for _, _, game in claimed] == [GAME]
+
+
+async def test_creating_the_group_twice_is_harmless(queue):
+    await queue.ensure_group()
+
+
+class FakeSession:
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+
+class FakeProfileRepository:
+    async def existing_ids(self, profile_ids):
+        return set(profile_ids)
+
+
+class FakeResultRepository:
+    """Stores keys like INSERT ... ON CONFLICT DO NOTHING RETURNING."""
+
+    def __init__(self):
+        self.keys = set()
+
+    async def insert_new(self, rows):
+        inserted = {row["idempotency_key"] for row in rows} - self.keys
+        self.keys |= inserted
+        return inserted
+
+
+async def test_result_enqueued_twice_in_one_batch_is_applied_once(fake_redis):
+    service = PlayGameService(FakeSession(), CacheService(fake_redis))
+    service.profile_repository = FakeProfileRepository()
+    service.result_repository = FakeResultRepository()
+    applied = []
+
+    async def apply_game_results(games):
+        applied.extend(games)
+        return []
+
+    service._apply_game_results = apply_game_results
+    rematch = GameResultIn(player_id=1, opponent_id=2, game_type=GameTypes.BLITZ, won=False)
+
+    count = await service.apply_queued_results([("game-1", GAME), ("game-2", rematch), ("game-1", rematch)])
+
+    assert count == 2
+    assert applied == [GAME, rematch]
@@ -0,0 +1,56 @@
+import asyncio
+
+from src.cache.singleflight import SingleFlight
+
+
+async def test_concurrent_callers_share_one_load(fake_redis):
+    flights = SingleFlight()
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def check():
+        return None
+
+    results = await asyncio.gather(*(flights.run(fake_redis, "key", load, check) for _ in range(10)))
+
+    assert results == ["value"] * 10
+    assert calls == 1
+    assert not await fake_redis.exists("lock:key")
+
+
+async def test_waits_for_lock_held_by_another_worker(fake_redis):
+    flights = SingleFlight(poll_interval=0.01)
+    await fake_redis.set("lock:key", "other-worker", px=1000)
+    cached = {}
+
+    async def load():
+        raise AssertionError("must not load while another worker holds the lock")
+
+    async def check():
+        return cached.get("key")
+
+    async def other_worker_finishes():
+        await asyncio.sleep(0.03)
+        cached["key"] = "from-other-worker"
+
+    asyncio.create_task(other_worker_finishes())
+
+    assert await flights.run(fake_redis, "key", load, check) == "from-other-worker"
+
+
+async def test_loads_directly_after_wait_timeout(fake_redis):
+    flights = SingleFlight(wait_timeout=0.05, poll_interval=0.01)
+    await fake_redis.set("lock:key", "stuck-worker", px=10_000)
+
+    async def load():
+        return "value"
+
+    async def check():
+        return None
+
+    assert await flights.run(fake_redis, "key", load, check) == "value"
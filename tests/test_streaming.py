@@ -0,0 +1,53 @@
+import json
+import pytest
+from src.external_api.streaming import JsonArrayStream, iter_json_array
+
+GAMES = [
+    {"url": f"https://www.chess.com/game/live/{i}", "pgn": '[Event "Live \\"Chess\\""]\n1. e4 {[%clk 0:03:00]} 1-0'}
+    for i in range(20)
+]
+
+
+def chunked(data: bytes, size: int) -> list[bytes]:
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 4096])
+def test_items_are_yielded_across_chunk_boundaries(size):
+    document = json.dumps({"note": "games", "other": [1, {"games": []}], "games": GAMES, "after": [0]}).encode()
+
+    stream = JsonArrayStream(key="games")
+    items = [item for chunk in chunked(document, size) for item in stream.feed(chunk)]
+    stream.close()
+
+    assert items == GAMES
+
+
+def test_top_level_array():
+    stream = JsonArrayStream()
+
+    assert stream.feed(b'[{"a": 1}, [2], 3, {"b": "]"}]') == [{"a": 1}, [2], {"b": "]"}]
+    assert stream.done
+
+
+def test_only_the_partial_item_is_buffered():
+    stream = JsonArrayStream(key="games")
+    stream.feed(b'{"games": [' + b",".join(json.dumps(game).encode() for game in GAMES) + b', {"url": "x", ')
+
+    assert bytes(stream._buffer) == b'{"url": "x", '
+
+
+def test_truncated_document_raises():
+    stream = JsonArrayStream(key="games")
+    stream.feed(b'{"games": [{"a": 1}, {"b"')
+
+    with pytest.raises(ValueError):
+        stream.close()
+
+
+async def test_iter_json_array():
+    async def chunks():
+        for chunk in chunked(json.dumps({"games": GAMES}).encode(), 10):
+            yield chunk
+
+    assert [item async for item in iter_json_array(chunks(), key="games")] == GAMES